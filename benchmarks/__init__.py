@@ -0,0 +1 @@
+"""Offline throughput and latency benchmarks for the MAS framework."""
@@ -0,0 +1,82 @@
+"""Synthetic payload generators for the benchmark suite.
+
+Every generator takes a seed so runs on different commits see identical
+inputs.
+"""
+
+import random
+import string
+from typing import Any, Dict
+
+WORDS = [
+    "agent", "workflow", "stage", "message", "payload", "schema", "record",
+    "sensor", "value", "pipeline", "document", "system", "result", "batch"
+]
+
+def sensor_payload(records: int = 1000, groups: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """Payload for the ``data_pipeline`` example.
+
+    Args:
+        records: Number of entries in ``data``
+        groups: Number of distinct ``name`` values
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    return {
+        "data": [
+            {"name": f"sensor_{rng.randrange(groups)}", "value": rng.uniform(-100.0, 100.0)}
+            for _ in range(records)
+        ],
+        "schema_version": "1.0"
+    }
+
+def document_payload(size: int = 10000, seed: int = 0) -> Dict[str, Any]:
+    """Payload for the ``document_processing`` example.
+
+    Args:
+        size: Approximate length of ``text`` in characters
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word.capitalize() if rng.random() < 0.2 else word)
+        length += len(word) + 1
+    return {
+        "text": " ".join(words)[:size],
+        "metadata": {"type": "synthetic", "seed": seed}
+    }
+
+def _random_string(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.ascii_letters) for _ in range(length))
+
+def nested_payload(depth: int = 3, width: int = 4, string_length: int = 16, seed: int = 0) -> Dict[str, Any]:
+    """Payload for ``main_workflow`` in the root ``config.json``.
+
+    Args:
+        depth: Nesting depth of ``nested_data``
+        width: Keys per nested object and items in ``list_data``
+        string_length: Length of generated strings
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+
+    def build(level: int) -> Dict[str, Any]:
+        node: Dict[str, Any] = {}
+        for i in range(width):
+            if level < depth and i == 0:
+                node[f"child_{i}"] = build(level + 1)
+            elif i % 3 == 1:
+                node[f"number_{i}"] = rng.randint(0, 1000)
+            else:
+                node[f"text_{i}"] = _random_string(rng, string_length)
+        return node
+
+    return {
+        "text_data": _random_string(rng, string_length),
+        "nested_data": build(1),
+        "list_data": [_random_string(rng, string_length) for _ in range(width)],
+        "number": rng.randint(0, 1000)
+    }
@@ -0,0 +1,361 @@
+"""Run the benchmark suite and write the results as JSON.
+
+Usage::
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --only data_pipeline --records 10000
+    python -m benchmarks.run --output new.json --compare results.json
+
+Each benchmark reports records/sec and per-call latency percentiles in
+microseconds. Everything runs in-process against the example
+configurations, except the startup benchmarks, which time ``import mas``
+and ``WorkflowManager`` construction in fresh interpreters; no services
+or network access are needed.
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from mas.agent import Agent
+from mas.schema import compile_validator, validate
+from mas.workflow import WorkflowManager
+from .payloads import document_payload, nested_payload, sensor_payload
+
+ROOT = Path(__file__).parent.parent
+
+CONFIGS = {
+    "data_pipeline": ROOT / "examples" / "data_pipeline" / "config.json",
+    "document_processing": ROOT / "examples" / "document_processing" / "config.json",
+    "main_workflow": ROOT / "config.json"
+}
+
+class EchoAgent(Agent):
+    """Agent that returns its payload, isolating envelope handling costs."""
+
+    def process_message(self, message: Dict) -> Dict:
+        return message["payload"]
+
+def load_config(name: str) -> Dict[str, Any]:
+    with open(CONFIGS[name], "r") as f:
+        return json.load(f)
+
+def measure(
+    func: Callable[[Any], Any],
+    inputs: List[Any],
+    records_per_call: int = 1,
+    warmup: int = 10
+) -> Dict[str, Any]:
+    """Time ``func`` over each input, one call per input.
+
+    The first ``warmup`` inputs are run but not timed. Inputs are built
+    before timing starts so payload generation and copying are excluded.
+
+    Returns:
+        Call count, records/sec and latency statistics in microseconds
+    """
+    for item in inputs[:warmup]:
+        func(item)
+    timed = inputs[warmup:]
+
+    samples = np.empty(len(timed), dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i, item in enumerate(timed):
+        start = clock()
+        func(item)
+        samples[i] = clock() - start
+
+    return summarize(samples, records_per_call)
+
+def summarize(samples: np.ndarray, records_per_call: int = 1) -> Dict[str, Any]:
+    """Call count, records/sec and latency statistics for per-call nanosecond timings."""
+    total = int(samples.sum())
+    micros = samples / 1000.0
+    return {
+        "calls": len(samples),
+        "records": len(samples) * records_per_call,
+        "total_seconds": total / 1e9,
+        "records_per_sec": len(samples) * records_per_call / (total / 1e9) if total else None,
+        "latency_us": {
+            "mean": float(micros.mean()),
+            "min": float(micros.min()),
+            "p50": float(np.percentile(micros, 50)),
+            "p99": float(np.percentile(micros, 99)),
+            "max": float(micros.max())
+        }
+    }
+
+def _copies(template: Any, count: int) -> List[Any]:
+    return [copy.deepcopy(template) for _ in range(count)]
+
+def _run(name: str, func: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run one benchmark, recording a failure instead of aborting the suite."""
+    try:
+        return func()
+    except Exception as e:
+        logging.getLogger(__name__).warning("Benchmark %s failed: %s", name, e)
+        return {"error": f"{type(e).__name__}: {e}"}
+
+def workflow_benchmarks(args: argparse.Namespace) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """``start_workflow`` over each example workflow."""
+    count = args.iterations + args.warmup
+
+    def start_workflow(name: str, build_payload: Callable[[], Dict[str, Any]], records: int):
+        def bench():
+            manager = WorkflowManager(load_config(name))
+            return measure(
+                lambda payload: manager.start_workflow(name, payload),
+                _copies(build_payload(), count), records, args.warmup
+            )
+        return bench
+
+    return {
+        "workflow.data_pipeline.start_workflow": start_workflow(
+            "data_pipeline", lambda: sensor_payload(args.records, args.groups, args.seed), args.records
+        ),
+        "workflow.document_processing.start_workflow": start_workflow(
+            "document_processing", lambda: document_payload(args.document_size, args.seed), 1
+        ),
+        "workflow.main_workflow.start_workflow": start_workflow(
+            "main_workflow", lambda: nested_payload(args.depth, args.width, seed=args.seed), 1
+        )
+    }
+
+def agent_benchmarks(args: argparse.Namespace) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Each data agent on its own, fed the output of the stage before it."""
+    return _agent_chain(args, lambda: load_config("data_pipeline"), "agent")
+
+def columnar_benchmarks(args: argparse.Namespace) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """The data agents on a RecordBatch, which the validator builds from the records."""
+    def columnar_config() -> Dict[str, Any]:
+        config = load_config("data_pipeline")
+        config["agents"]["data_validator"]["config"]["columnar"] = True
+        return config
+
+    return _agent_chain(args, columnar_config, "columnar")
+
+def _agent_chain(
+    args: argparse.Namespace,
+    build_config: Callable[[], Dict[str, Any]],
+    prefix: str
+) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Benchmarks for each data agent, sharing one manager and input chain.
+
+    The manager and inputs are built by the first benchmark that runs, so
+    skipped benchmarks cost nothing and setup errors are reported by
+    ``_run`` like any other failure.
+    """
+    count = args.iterations + args.warmup
+    chain = ["data_validator", "data_transformer", "data_aggregator", "data_formatter"]
+    prepared: Dict[str, Any] = {}
+
+    def setup() -> Dict[str, Any]:
+        if not prepared:
+            manager = WorkflowManager(build_config())
+            inputs = {}
+            template = sensor_payload(args.records, args.groups, args.seed)
+            for agent_key in chain:
+                inputs[agent_key] = template
+                template = manager.agents[agent_key].process_message(copy.deepcopy(template))
+            prepared.update(manager=manager, inputs=inputs)
+        return prepared
+
+    def bench(agent_key: str):
+        def run():
+            state = setup()
+            agent = state["manager"].agents[agent_key]
+            template = state["inputs"][agent_key]
+            return measure(agent.process_message, _copies(template, count), _record_count(template), args.warmup)
+        return run
+
+    return {f"{prefix}.{agent_key}.process_message": bench(agent_key) for agent_key in chain}
+
+def _record_count(payload: Dict[str, Any]) -> int:
+    """Records an agent processes for a payload: its data, or the groups it formats."""
+    return len(payload["data"]) if "data" in payload else len(payload["aggregates"])
+
+def message_benchmarks(args: argparse.Namespace) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """``Agent.receive_message`` and schema validation."""
+    count = args.iterations + args.warmup
+
+    def receive_message(mode: str):
+        def bench():
+            schemas = load_config("main_workflow")["message_schemas"]
+            payload = nested_payload(args.depth, args.width, seed=args.seed)
+            agent = EchoAgent("echo", {"message_schemas": schemas, "message_validation": mode})
+            messages = [agent.create_message(copy.deepcopy(payload)).to_dict() for _ in range(count)]
+            return measure(agent.receive_message, messages, 1, args.warmup)
+        return bench
+
+    def envelope_validation(mode: str):
+        def bench():
+            schemas = load_config("main_workflow")["message_schemas"]
+            payload = nested_payload(args.depth, args.width, seed=args.seed)
+            validator = compile_validator(schemas["standard_formats"]["agent_request"], mode)
+            agent = EchoAgent("echo", {})
+            messages = [agent.create_message(payload).to_dict() for _ in range(count)]
+            return measure(validator, messages, 1, args.warmup)
+        return bench
+
+    def input_validation():
+        input_schema = (
+            load_config("data_pipeline")["agents"]["data_validator"]["config"]["input_validation"]["schema"]
+        )
+        sensor = sensor_payload(args.records, args.groups, args.seed)
+        return measure(lambda instance: validate(instance, input_schema), [sensor] * count, args.records, args.warmup)
+
+    return {
+        "message.receive_message.full": receive_message("full"),
+        "message.receive_message.fast": receive_message("fast"),
+        "schema.envelope.full": envelope_validation("full"),
+        "schema.envelope.fast": envelope_validation("fast"),
+        "schema.data_pipeline_input": input_validation
+    }
+
+# Run in a fresh interpreter; prints the nanoseconds taken by the timed part
+_IMPORT_SCRIPT = """
+import time
+start = time.perf_counter_ns()
+import mas
+print(time.perf_counter_ns() - start)
+"""
+
+_MANAGER_SCRIPT = """
+import json, sys, time
+from mas.workflow import WorkflowManager
+with open(sys.argv[1]) as f:
+    config = json.load(f)
+start = time.perf_counter_ns()
+WorkflowManager(config)
+print(time.perf_counter_ns() - start)
+"""
+
+def cold_start(script: str, runs: int, *script_args: str) -> Dict[str, Any]:
+    """Time ``script`` in ``runs`` fresh interpreters, as reported by the script."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    samples = np.empty(runs, dtype=np.int64)
+    for i in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", script, *script_args],
+            cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+        )
+        if result.returncode:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        samples[i] = int(result.stdout.strip().splitlines()[-1])
+    return summarize(samples)
+
+def startup_benchmarks(args: argparse.Namespace) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Cold ``import mas`` and ``WorkflowManager`` construction."""
+    def manager(name: str):
+        return lambda: cold_start(_MANAGER_SCRIPT, args.startup_runs, str(CONFIGS[name]))
+
+    benchmarks = {"startup.import_mas": lambda: cold_start(_IMPORT_SCRIPT, args.startup_runs)}
+    benchmarks.update({f"startup.{name}.workflow_manager": manager(name) for name in CONFIGS})
+    return benchmarks
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run all selected benchmarks.
+
+    Returns:
+        Dict with run metadata and a result entry per benchmark
+    """
+    benchmarks = {}
+    for group in (workflow_benchmarks, agent_benchmarks, columnar_benchmarks, message_benchmarks, startup_benchmarks):
+        benchmarks.update(group(args))
+
+    results = {}
+    for name, bench in benchmarks.items():
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        results[name] = _run(name, bench)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "parameters": {
+                "records": args.records,
+                "groups": args.groups,
+                "document_size": args.document_size,
+                "depth": args.depth,
+                "width": args.width,
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "startup_runs": args.startup_runs,
+                "seed": args.seed
+            }
+        },
+        "results": results
+    }
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Describe throughput and p99 changes between two result files."""
+    lines = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "error" in before or "error" in result:
+            continue
+        throughput = result["records_per_sec"] / before["records_per_sec"]
+        p99 = result["latency_us"]["p99"] / before["latency_us"]["p99"]
+        lines.append(f"{name}: throughput x{throughput:.2f}, p99 x{p99:.2f}")
+    return lines
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run MAS benchmarks")
+    parser.add_argument("--records", type=int, default=1000, help="records per data pipeline payload")
+    parser.add_argument("--groups", type=int, default=10, help="distinct group keys in data pipeline payloads")
+    parser.add_argument("--document-size", type=int, default=10000, help="characters per document")
+    parser.add_argument("--depth", type=int, default=3, help="nesting depth of main_workflow payloads")
+    parser.add_argument("--width", type=int, default=4, help="keys per level of main_workflow payloads")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per benchmark")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed calls per benchmark")
+    parser.add_argument("--startup-runs", type=int, default=10, help="fresh interpreters per startup benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--output", help="write results to this file instead of stdout")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    report = run_suite(args)
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        for line in compare(baseline, report):
+            print(line, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,13 @@ __license__ = "MIT"
 __copyright__ = "Copyright 2025 Ken Huang, Distributedapps.ai"
 
 from .agent import Agent, AgentType, MessageStatus
+from .message import Message
 from .workflow import WorkflowManager
 
 __all__ = [
     "Agent",
     "AgentType",
+    "Message",
     "MessageStatus",
     "WorkflowManager"
 ]
@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
+import asyncio
 from enum import Enum
-from typing import Dict, Any, Optional
-import uuid
-from datetime import datetime
+from typing import Dict, Any, List, Optional
 import json
 import logging
-import jsonschema
+from .cache import ResultCache, memoize
+from .message import Message
+from .schema import compile_validator
 
 logger = logging.getLogger(__name__)
 
@@ -21,62 +22,107 @@ class MessageStatus(Enum):
     PENDING = "pending"
 
 class Agent(ABC):
-    """Base class for all agents in the system."""
+    """Base class for all agents in the system.
     
-    def __init__(self, agent_id: str, config: Dict[str, Any]):
+    ``sharing`` declares how WorkflowManagers may share instances (see
+    ``mas.agent_pool``): "shared" for thread-safe agents without per-call
+    state, "per_worker" for stateless agents that are not thread-safe, and
+    "per_manager" (the default) for agents that keep state between calls.
+    """
+    
+    sharing = "per_manager"
+    
+    def __init__(
+        self,
+        agent_id: str,
+        config: Dict[str, Any],
+        system_config: Optional[Dict[str, Any]] = None,
+        llm_config: Optional[Dict[str, Any]] = None
+    ):
         """Initialize the agent.
         
         Args:
             agent_id: Unique identifier for this agent
-            config: Agent-specific configuration
+            config: Agent-specific configuration (the ``config`` section of
+                its entry)
+            system_config: The ``system_config`` section of the configuration
+            llm_config: The ``llm_configs`` entry named by the agent's
+                ``llm_config``, already resolved
         """
         self.agent_id = agent_id
         self.config = config
+        self.system_config = system_config if system_config is not None else {}
+        self.llm_config = llm_config
+        
+        # Compile envelope validators once; "fast" uses plain Python checks
+        # for flat envelope schemas instead of jsonschema
+        message_schemas = config.get("message_schemas", {}).get("standard_formats", {})
+        validation_mode = config.get("message_validation", "full")
+        self._message_validators = {
+            message_type: compile_validator(schema, validation_mode)
+            for message_type, schema in message_schemas.items()
+        }
+        
+        # Opt-in memoization for agents whose output depends only on the
+        # payload, declared with a "cache" section in the agent config
+        self.result_cache = ResultCache.from_config(config.get("cache"))
+        if self.result_cache is not None:
+            self.process_message = memoize(self.process_message, self.result_cache)
     
-    def create_message(self, payload: Dict, message_type: str = "agent_request") -> Dict:
+    def create_message(
+        self,
+        payload: Dict,
+        message_type: str = "agent_request",
+        *,
+        status: str = MessageStatus.PENDING.value,
+        request_id: Optional[str] = None
+    ) -> Message:
         """Create a standardized message format.
         
+        The request id and timestamp are generated lazily, also when the
+        message is validated, so passing ``request_id`` (e.g. to keep a
+        request chain) never generates an id that is thrown away.
+        
         Args:
             payload: The message payload
             message_type: Type of message (agent_request or agent_response)
+            status: Initial message status
+            request_id: Request id to use instead of a newly generated one
             
         Returns:
-            Dict containing the formatted message
+            Message envelope supporting dict-style access
         """
-        message = {
-            "request_id": str(uuid.uuid4()),
-            "timestamp": datetime.utcnow().isoformat(),
-            "source_agent": self.agent_id,
-            "message_type": message_type,
-            "status": MessageStatus.PENDING.value,
-            "payload": payload
-        }
+        message = Message(
+            payload=payload,
+            source_agent=self.agent_id,
+            message_type=message_type,
+            status=status,
+            request_id=request_id
+        )
         
         # Validate message against schema if available
-        try:
-            if message_schemas := self.config.get("message_schemas", {}).get("standard_formats", {}):
-                if schema := message_schemas.get(message_type):
-                    jsonschema.validate(instance=message, schema=schema)
-        except jsonschema.exceptions.ValidationError as e:
-            logger.error(f"Message validation failed: {str(e)}")
-            raise
+        if validator := self._message_validators.get(message_type):
+            try:
+                validator(message.validation_dict())
+            except Exception as e:
+                logger.error(f"Message validation failed: {str(e)}")
+                raise
             
         return message
 
-    def receive_message(self, message: Dict) -> Dict:
+    def receive_message(self, message: Dict) -> Message:
         """Handle incoming messages and process them.
         
         Args:
             message: The incoming message to process
             
         Returns:
-            Dict containing the response message
+            Message containing the response
         """
         try:
             # Validate incoming message
-            if message_schemas := self.config.get("message_schemas", {}).get("standard_formats", {}):
-                if schema := message_schemas.get("agent_request"):
-                    jsonschema.validate(instance=message, schema=schema)
+            if validator := self._message_validators.get("agent_request"):
+                validator(message.validation_dict() if isinstance(message, Message) else message)
             
             # Log message receipt
             logger.debug(f"Agent {self.agent_id} received message: {message.get('request_id')}")
@@ -84,25 +130,22 @@ class Agent(ABC):
             # Process the message
             response = self.process_message(message)
             
-            # Create response message
-            response_message = self.create_message(
+            # Create response message, maintaining the request chain
+            return self.create_message(
                 payload=response,
-                message_type="agent_response"
+                message_type="agent_response",
+                status=MessageStatus.SUCCESS.value,
+                request_id=message.get("request_id")
             )
-            response_message["status"] = MessageStatus.SUCCESS.value
-            response_message["request_id"] = message.get("request_id")  # Maintain request chain
-            
-            return response_message
             
         except Exception as e:
             logger.error(f"Error processing message in agent {self.agent_id}: {str(e)}")
-            error_response = self.create_message(
+            return self.create_message(
                 payload={"error": str(e), "original_message": message},
-                message_type="agent_response"
+                message_type="agent_response",
+                status=MessageStatus.ERROR.value,
+                request_id=message.get("request_id")
             )
-            error_response["status"] = MessageStatus.ERROR.value
-            error_response["request_id"] = message.get("request_id")
-            return error_response
 
     @abstractmethod
     def process_message(self, message: Dict) -> Dict:
@@ -117,3 +160,47 @@ class Agent(ABC):
             Dict containing the processed message
         """
         raise NotImplementedError("Concrete agents must implement process_message")
+
+    async def aprocess_message(self, message: Dict) -> Dict:
+        """Asynchronously process an incoming message.
+        
+        I/O-bound agents should override this with a native coroutine. The
+        default runs process_message in the event loop's default executor so
+        synchronous agents never block the loop.
+        
+        Args:
+            message: The message to process
+            
+        Returns:
+            Dict containing the processed message
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.process_message, message)
+
+    def close(self):
+        """Release resources held by the agent, such as open output files.
+        
+        Called by ``WorkflowManager.shutdown``; the default does nothing.
+        """
+
+    def process_batch(self, messages: List[Dict]) -> List[Any]:
+        """Process a batch of messages.
+        
+        Agents with a vectorized implementation can override this hook. The
+        default loops over process_message. Failures are isolated per item:
+        an item that raises gets the exception in its result slot instead of
+        failing the whole batch.
+        
+        Args:
+            messages: The messages to process
+            
+        Returns:
+            List with one result (or raised exception) per message, in order
+        """
+        results = []
+        for message in messages:
+            try:
+                results.append(self.process_message(message))
+            except Exception as e:
+                results.append(e)
+        return results
@@ -0,0 +1,226 @@
+"""Agent instances shared across WorkflowManagers."""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import threading
+import weakref
+from .agent import Agent
+from .agent_registry import AGENT_REGISTRY, create_agent, resolve_llm_config
+from .cache import payload_key
+from .message import Message
+
+# How an agent type may be shared, declared by Agent.sharing or the
+# "sharing" key of an agent entry:
+#   shared       one thread-safe instance for every manager with the same entry
+#   per_worker   stateless but not thread-safe: each call checks out an idle
+#                instance from a pool shared by those managers
+#   per_manager  one instance per manager (agents keeping state between calls)
+SHARING_MODES = ("shared", "per_worker", "per_manager")
+
+class _WorkerInstances:
+    """Idle instances of a per_worker agent, shared by the managers using it."""
+
+    def __init__(self, build: Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]], max_idle: int):
+        self.build = build
+        self.agent_config = build[0]
+        self.max_idle = max_idle
+        self.idle: List[Agent] = []
+        self.created = 0
+        self.lock = threading.Lock()
+
+class WorkerAgent:
+    """Stands in for a per_worker agent in a WorkflowManager.
+
+    Every call checks out an instance nobody else is using (creating one
+    when all are busy), so concurrent stages and stream workers never share
+    an instance, while sequential calls keep reusing the same few. It has
+    the attributes of an Agent; ``result_cache`` is None as each instance
+    memoizes with its own cache.
+    """
+
+    sharing = "per_worker"
+
+    def __init__(self, instances: _WorkerInstances):
+        self._instances = instances
+        agent_config, system_config, llm_configs = instances.build
+        self.agent_id = agent_config.get("id")
+        self.config = agent_config.get("config", {})
+        self.system_config = system_config
+        self.llm_config = resolve_llm_config(agent_config, llm_configs)
+        self.result_cache = None
+
+    @contextmanager
+    def checkout(self) -> Iterator[Agent]:
+        """Borrow an instance for exclusive use."""
+        instances = self._instances
+        with instances.lock:
+            agent = instances.idle.pop() if instances.idle else None
+        if agent is None:
+            agent = create_agent(*instances.build)
+            with instances.lock:
+                instances.created += 1
+        try:
+            yield agent
+        finally:
+            with instances.lock:
+                keep = len(instances.idle) < instances.max_idle
+                if keep:
+                    instances.idle.append(agent)
+            if not keep:
+                agent.close()
+
+    def create_message(self, payload: Dict, message_type: str = "agent_request", **kwargs: Any) -> Message:
+        with self.checkout() as agent:
+            return agent.create_message(payload, message_type, **kwargs)
+
+    def process_message(self, message: Dict) -> Dict:
+        with self.checkout() as agent:
+            return agent.process_message(message)
+
+    def process_batch(self, messages: List[Dict]) -> List[Any]:
+        with self.checkout() as agent:
+            return agent.process_batch(messages)
+
+    async def aprocess_message(self, message: Dict) -> Dict:
+        with self.checkout() as agent:
+            return await agent.aprocess_message(message)
+
+    def receive_message(self, message: Dict) -> Any:
+        with self.checkout() as agent:
+            return agent.receive_message(message)
+
+    def close(self):
+        """Close the idle instances."""
+        with self._instances.lock:
+            idle, self._instances.idle = self._instances.idle, []
+        for agent in idle:
+            agent.close()
+
+class AgentPool:
+    """Builds agents for WorkflowManagers, sharing instances where it is safe.
+
+    Instances are keyed by agent id and a hash of the whole agent entry,
+    the system configuration and the agent's LLM settings, so only managers
+    built from identical settings share them. The pool holds
+    them weakly: an instance lives as long as some manager uses it. Shared
+    instances are built once even when several managers start at the same
+    time, and closed when the last manager using them releases them.
+    """
+
+    def __init__(self, max_idle: int = 8):
+        """Initialize the pool.
+
+        Args:
+            max_idle: Idle instances kept per per_worker agent
+        """
+        self.max_idle = max_idle
+        self._shared: "weakref.WeakValueDictionary[Tuple[str, str], Agent]" = weakref.WeakValueDictionary()
+        self._workers: "weakref.WeakValueDictionary[Tuple[str, str], _WorkerInstances]" = weakref.WeakValueDictionary()
+        # Managers using each shared instance or per_worker instance set
+        self._users: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # Reentrant: a finalizer may run while this thread holds the lock
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def sharing(agent_config: Dict[str, Any]) -> str:
+        """The sharing mode of an agent entry.
+
+        Raises:
+            ValueError: If the mode or agent type is invalid
+        """
+        sharing = agent_config.get("sharing")
+        if sharing is None:
+            agent_type = agent_config.get("type")
+            if agent_type not in AGENT_REGISTRY:
+                raise ValueError(f"Unknown agent type: {agent_type}")
+            sharing = getattr(AGENT_REGISTRY[agent_type], "sharing", "per_manager")
+        if sharing not in SHARING_MODES:
+            raise ValueError(f"sharing must be one of {', '.join(SHARING_MODES)}, got {sharing}")
+        return sharing
+
+    def acquire(
+        self,
+        agent_key: str,
+        agent_config: Dict[str, Any],
+        system_config: Optional[Dict[str, Any]] = None,
+        llm_configs: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Return the agent a manager should use for an agent entry.
+
+        Pair with release() when the manager shuts down.
+
+        Args:
+            agent_key: Key of the entry in the ``agents`` section
+            agent_config: The agent entry
+            system_config: The ``system_config`` section
+            llm_configs: The ``llm_configs`` section
+
+        Returns:
+            A shared instance, a WorkerAgent, or a new instance
+        """
+        sharing = self.sharing(agent_config)
+        system_config = system_config if system_config is not None else {}
+        build = (agent_config, system_config, llm_configs)
+        # Only the LLM entry the agent uses is part of its identity
+        entry_hash = payload_key([agent_config, system_config, resolve_llm_config(agent_config, llm_configs)])
+        if sharing == "per_manager" or entry_hash is None:
+            return create_agent(*build)
+        key = (agent_config.get("id", agent_key), entry_hash)
+
+        if sharing == "per_worker":
+            with self._lock:
+                instances = self._workers.get(key)
+                if instances is None:
+                    instances = _WorkerInstances(build, self.max_idle)
+                    self._workers[key] = instances
+            agent = WorkerAgent(instances)
+            with self._lock:
+                self._users[instances] = self._users.get(instances, 0) + 1
+            return agent
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Build outside the pool lock so unrelated agents construct in parallel
+        with key_lock:
+            agent = self._shared.get(key)
+            if agent is None:
+                agent = create_agent(*build)
+                self._shared[key] = agent
+                weakref.finalize(agent, self._forget, key)
+            with self._lock:
+                self._users[agent] = self._users.get(agent, 0) + 1
+        return agent
+
+    def _forget(self, key: Tuple[str, str]):
+        with self._lock:
+            if key not in self._shared:
+                self._key_locks.pop(key, None)
+
+    def release(self, agent: Any):
+        """Give back an agent from acquire(), closing it if nobody else uses it."""
+        target = agent._instances if isinstance(agent, WorkerAgent) else agent
+        with self._lock:
+            users = self._users.get(target)
+            if users is not None:
+                if users > 1:
+                    self._users[target] = users - 1
+                    return
+                del self._users[target]
+                for key, shared in list(self._shared.items()):
+                    if shared is target:
+                        del self._shared[key]
+        agent.close()
+
+    def snapshot(self) -> Dict[str, int]:
+        """Number of shared instances and of per_worker instances created and idle."""
+        with self._lock:
+            workers = list(self._workers.values())
+            return {
+                "shared": len(self._shared),
+                "worker_instances": sum(instances.created for instances in workers),
+                "idle": sum(len(instances.idle) for instances in workers)
+            }
+
+# Pool used by WorkflowManagers that are not given one
+default_pool = AgentPool()
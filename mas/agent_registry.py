@@ -1,25 +1,179 @@
 """Registry of available agent types."""
 
-from typing import Dict, Type
+from collections.abc import MutableMapping
+from functools import lru_cache
+from importlib import import_module
+from typing import Any, Dict, Iterator, Optional, Type, Union
+import inspect
+import logging
+import threading
+import uuid
 from .agent import Agent
-from .agents.document_reader import DocumentReader
-from .agents.document_processor import DocumentProcessor
-from .agents.document_writer import DocumentWriter
-from .agents.data_validator import DataValidator
-from .agents.data_transformer import DataTransformer
-from .agents.data_aggregator import DataAggregator
-from .agents.data_formatter import DataFormatter
+
+logger = logging.getLogger(__name__)
+
+# Entry point group third-party packages use to provide agent types, e.g.
+# [project.entry-points."mas.agents"] my_agent = "my_package.agents:MyAgent"
+ENTRY_POINT_GROUP = "mas.agents"
+
+def _entry_points(group: str) -> Any:
+    # Imported here: importlib.metadata is slow to import and only needed for discovery
+    from importlib import metadata
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=group)
+    return entry_points.get(group, ())
+
+class AgentRegistry(MutableMapping):
+    """Agent types mapped to their classes, imported on first use.
+    
+    Entries are classes or ``"module:ClassName"`` import paths; a path is
+    imported the first time its type is looked up and the class is cached
+    in its place, so building a document agent never imports NumPy.
+    Agent types provided by installed packages through the
+    ``"mas.agents"`` entry point group are discovered the first time a
+    type is not found (or the registry is iterated); they never replace
+    a type registered here.
+    """
+    
+    def __init__(self, entries: Dict[str, Union[str, Type[Agent]]], group: str = ENTRY_POINT_GROUP):
+        self._entries: Dict[str, Any] = dict(entries)
+        self.group = group
+        self._discovered = False
+        self._lock = threading.Lock()
+    
+    def discover(self):
+        """Add agent types from installed entry points (once)."""
+        with self._lock:
+            if self._discovered:
+                return
+            self._discovered = True
+            for entry_point in _entry_points(self.group):
+                if entry_point.name in self._entries:
+                    logger.warning(f"Ignoring entry point {entry_point.value} for existing agent type {entry_point.name}")
+                else:
+                    self._entries[entry_point.name] = entry_point
+    
+    def _resolve(self, agent_type: str, entry: Any) -> Type[Agent]:
+        try:
+            if isinstance(entry, str):
+                module_name, _, class_name = entry.partition(":")
+                agent_class = getattr(import_module(module_name), class_name)
+            else:
+                agent_class = entry.load()
+        except (ImportError, AttributeError) as e:
+            raise ImportError(f"Cannot load agent type {agent_type}: {e}") from e
+        with self._lock:
+            if self._entries.get(agent_type) is entry:
+                self._entries[agent_type] = agent_class
+        return agent_class
+    
+    def __getitem__(self, agent_type: str) -> Type[Agent]:
+        if agent_type not in self._entries:
+            self.discover()
+        entry = self._entries[agent_type]
+        if isinstance(entry, type):
+            return entry
+        return self._resolve(agent_type, entry)
+    
+    def __contains__(self, agent_type: object) -> bool:
+        if agent_type not in self._entries:
+            self.discover()
+        return agent_type in self._entries
+    
+    def __setitem__(self, agent_type: str, agent_class: Union[str, Type[Agent]]):
+        with self._lock:
+            self._entries[agent_type] = agent_class
+    
+    def __delitem__(self, agent_type: str):
+        with self._lock:
+            del self._entries[agent_type]
+    
+    def __iter__(self) -> Iterator[str]:
+        self.discover()
+        return iter(list(self._entries))
+    
+    def __len__(self) -> int:
+        self.discover()
+        return len(self._entries)
 
 # Registry of agent types to their implementing classes
-AGENT_REGISTRY: Dict[str, Type[Agent]] = {
+AGENT_REGISTRY = AgentRegistry({
     # Document Processing Agents
-    "document_reader": DocumentReader,
-    "document_processor": DocumentProcessor,
-    "document_writer": DocumentWriter,
+    "document_reader": "mas.agents.document_reader:DocumentReader",
+    "document_processor": "mas.agents.document_processor:DocumentProcessor",
+    "document_writer": "mas.agents.document_writer:DocumentWriter",
     
     # Data Pipeline Agents
-    "data_validator": DataValidator,
-    "data_transformer": DataTransformer,
-    "data_aggregator": DataAggregator,
-    "data_formatter": DataFormatter
-}
+    "data_validator": "mas.agents.data_validator:DataValidator",
+    "data_transformer": "mas.agents.data_transformer:DataTransformer",
+    "data_aggregator": "mas.agents.data_aggregator:DataAggregator",
+    "data_formatter": "mas.agents.data_formatter:DataFormatter",
+    
+    # Core Workflow Agents
+    "starter": "mas.agents.starter_agent:StarterAgent",
+    "processor": "mas.agents.processor_agent:ProcessorAgent",
+    "end": "mas.agents.end_agent:EndAgent",
+    "error_handler": "mas.agents.error_handler:ErrorHandlerAgent"
+})
+
+def resolve_llm_config(agent_config: Dict[str, Any], llm_configs: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Return the LLM settings for an agent entry.
+    
+    ``llm_config`` names an entry of the ``llm_configs`` section, or is
+    the settings themselves.
+    
+    Raises:
+        ValueError: If the named entry does not exist
+    """
+    llm_config = agent_config.get("llm_config")
+    if llm_config is None or isinstance(llm_config, dict):
+        return llm_config
+    if not llm_configs or llm_config not in llm_configs:
+        raise ValueError(f"Unknown llm_config for agent {agent_config.get('id')}: {llm_config}")
+    return llm_configs[llm_config]
+
+@lru_cache(maxsize=None)
+def _takes_context(agent_class: type) -> bool:
+    """Whether an agent class's constructor accepts system_config and llm_config."""
+    parameters = inspect.signature(agent_class.__init__).parameters
+    return (
+        all(name in parameters for name in ("system_config", "llm_config"))
+        or any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values())
+    )
+
+def create_agent(
+    agent_config: Dict[str, Any],
+    system_config: Optional[Dict[str, Any]] = None,
+    llm_configs: Optional[Dict[str, Any]] = None
+) -> Agent:
+    """Create an agent instance from its configuration entry.
+    
+    The system configuration and the agent's resolved LLM settings are
+    passed to the constructor; agents whose constructor only takes
+    ``(agent_id, config)`` get them as attributes instead.
+    
+    Args:
+        agent_config: Entry from the ``agents`` section of the configuration
+        system_config: The ``system_config`` section
+        llm_configs: The ``llm_configs`` section
+        
+    Returns:
+        The initialized agent
+    """
+    agent_type = agent_config.get("type")
+    if agent_type not in AGENT_REGISTRY:
+        raise ValueError(f"Unknown agent type: {agent_type}")
+    
+    agent_class = AGENT_REGISTRY[agent_type]
+    llm_config = resolve_llm_config(agent_config, llm_configs)
+    system_config = system_config if system_config is not None else {}
+    agent_id = agent_config.get("id", str(uuid.uuid4()))
+    config = agent_config.get("config", {})
+    if _takes_context(agent_class):
+        return agent_class(agent_id=agent_id, config=config, system_config=system_config, llm_config=llm_config)
+    
+    agent = agent_class(agent_id=agent_id, config=config)
+    agent.system_config = system_config
+    agent.llm_config = llm_config
+    return agent
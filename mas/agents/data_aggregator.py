@@ -1,41 +1,189 @@
 """Data Aggregator Agent for computing statistics."""
 
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import datetime
+import threading
+import time
 import numpy as np
-from collections import defaultdict
 from ..agent import Agent
+from ..aggregation import GroupBy, StreamingAggregate, check_methods, factorize
+from ..record_batch import RecordBatch
 
 class DataAggregator(Agent):
-    """Agent that performs data aggregation."""
-    
+    """Agent that performs data aggregation.
+
+    ``aggregation.method`` is a single method name, giving
+    ``{"aggregates": {group: value}}``, or a list of names, giving
+    ``{"aggregates": {group: {method: value}}}``. Supported methods are
+    count, sum, mean, median, min, max, std, var, first and last, and
+    percentiles written as "p<q>" (e.g. "p95").
+
+    With ``aggregation.mode: "streaming"`` each message is folded into
+    running per-group state instead of being aggregated on its own. Results
+    are emitted when a message carries ``"flush": true``, when
+    ``window_messages`` messages or ``window_seconds`` seconds have
+    accumulated, or when flush() is called. Medians and percentiles come
+    from a quantile sketch with ``relative_accuracy`` error; first and last
+    are not available in streaming mode.
+
+    ``data`` may be a list of records or a RecordBatch, whose group and
+    value columns are aggregated without building records.
+    """
+
+    def __init__(
+        self,
+        agent_id: str,
+        config: Dict[str, Any],
+        system_config: Optional[Dict[str, Any]] = None,
+        llm_config: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(agent_id, config, system_config, llm_config)
+        self._stream_lock = threading.Lock()
+        self._reset_window()
+
     def process_message(self, message: Dict) -> Dict:
         """Aggregate data according to configuration."""
         aggregation_config = self.config.get("aggregation", {})
+        if aggregation_config.get("mode", "batch") == "streaming":
+            return self._process_streaming(message)
+
         method = aggregation_config.get("method", "mean")
         group_by = aggregation_config.get("group_by", "name")
-        
+
+        methods = self._methods(method)
+        check_methods(methods)
+
         data = message.get("data", [])
         if not data:
             return {"aggregates": {}}
-        
+
         # Group data
-        groups = defaultdict(list)
-        for item in data:
-            group_key = item.get(group_by)
-            if group_key is None:
-                raise ValueError(f"Missing group key '{group_by}' in item")
-            groups[group_key].append(item.get("value", 0))
-        
+        groups, codes = self._groups(data, group_by)
+        values = self._values(data)
+        grouped = GroupBy(codes, values, len(groups))
+
         # Compute aggregates
-        aggregates = {}
-        for group_key, values in groups.items():
-            if method == "mean":
-                aggregates[group_key] = np.mean(values)
-            elif method == "median":
-                aggregates[group_key] = np.median(values)
-            elif method == "sum":
-                aggregates[group_key] = np.sum(values)
-            else:
-                raise ValueError(f"Unknown aggregation method: {method}")
-        
-        return {"aggregates": aggregates}
+        columns = {name: grouped.aggregate(name).tolist() for name in methods}
+        return {"aggregates": self._format(method, groups, columns)}
+
+    @property
+    def state(self) -> StreamingAggregate:
+        """Running state of the current streaming window."""
+        return self._state
+
+    def merge_state(self, state: Union[StreamingAggregate, Dict[str, Any]]):
+        """Fold a partial state from another worker into the current window.
+
+        Args:
+            state: A StreamingAggregate or its to_dict() form
+        """
+        if isinstance(state, dict):
+            state = StreamingAggregate.from_dict(state)
+        with self._stream_lock:
+            self._state.merge(state)
+
+    def flush(self) -> Dict:
+        """Emit the results of the current streaming window and start a new one."""
+        with self._stream_lock:
+            return self._emit()
+
+    def _process_streaming(self, message: Dict) -> Dict:
+        """Fold a message into the running state, emitting at window boundaries."""
+        aggregation_config = self.config.get("aggregation", {})
+        group_by = aggregation_config.get("group_by", "name")
+        window_messages = aggregation_config.get("window_messages")
+        window_seconds = aggregation_config.get("window_seconds")
+        check_methods(self._methods(aggregation_config.get("method", "mean")), streaming=True)
+
+        data = message.get("data", [])
+        groups, codes = self._groups(data, group_by)
+        values = self._values(data)
+
+        with self._stream_lock:
+            self._state.update_groups(groups, codes, values)
+            self._window_messages += 1
+
+            if (
+                message.get("flush")
+                or (window_messages and self._window_messages >= window_messages)
+                or (window_seconds and time.monotonic() - self._window_started >= window_seconds)
+            ):
+                return self._emit()
+
+            return {
+                "aggregates": {},
+                "window": {
+                    "messages": self._window_messages,
+                    "start": self._window_start_time,
+                    "complete": False
+                }
+            }
+
+    def _emit(self) -> Dict:
+        """Build the window result and reset the state. Caller holds the lock."""
+        aggregation_config = self.config.get("aggregation", {})
+        method = aggregation_config.get("method", "mean")
+        state = self._state
+
+        columns = {name: state.aggregate(name) for name in self._methods(method)}
+        result = {
+            "aggregates": self._format(method, state.keys, columns),
+            "window": {
+                "messages": self._window_messages,
+                "start": self._window_start_time,
+                "end": datetime.utcnow().isoformat(),
+                "complete": True
+            }
+        }
+        if aggregation_config.get("emit_state", False):
+            result["state"] = state.to_dict()
+
+        self._reset_window()
+        return result
+
+    def _reset_window(self):
+        relative_accuracy = self.config.get("aggregation", {}).get("relative_accuracy", 0.01)
+        self._state = StreamingAggregate(relative_accuracy)
+        self._window_messages = 0
+        self._window_started = time.monotonic()
+        self._window_start_time = datetime.utcnow().isoformat()
+
+    @staticmethod
+    def _methods(method: Union[str, List[str]]) -> List[str]:
+        return [method] if isinstance(method, str) else list(method)
+
+    @staticmethod
+    def _groups(data: Union[List[Dict], RecordBatch], group_by: str) -> Tuple[List[Any], np.ndarray]:
+        """Distinct group keys in order of first appearance and the group of each record."""
+        if isinstance(data, RecordBatch):
+            if len(data) and data.missing(group_by):
+                raise ValueError(f"Missing group key '{group_by}' in item")
+            groups, codes = data.encoded(group_by) if len(data) else ([], np.zeros(0, dtype=np.intp))
+            if any(key is None for key in groups):
+                raise ValueError(f"Missing group key '{group_by}' in item")
+            return groups, codes
+        keys = [item.get(group_by) for item in data]
+        if any(key is None for key in keys):
+            raise ValueError(f"Missing group key '{group_by}' in item")
+        return factorize(keys, count=len(keys))
+
+    @staticmethod
+    def _values(data: Union[List[Dict], RecordBatch]) -> np.ndarray:
+        if isinstance(data, RecordBatch):
+            if "value" not in data:
+                return np.zeros(len(data))
+            values = data.column("value").astype(np.float64)
+            if data.missing("value"):
+                values[~data.present["value"]] = 0
+            return values
+        return np.fromiter((item.get("value", 0) for item in data), dtype=np.float64, count=len(data))
+
+    @staticmethod
+    def _format(method: Union[str, List[str]], groups: List[Any], columns: Dict[str, List[Any]]) -> Dict:
+        """Shape per-method columns into the aggregates mapping."""
+        if isinstance(method, str):
+            return dict(zip(groups, columns[method]))
+        return {
+            group_key: {name: column[i] for name, column in columns.items()}
+            for i, group_key in enumerate(groups)
+        }
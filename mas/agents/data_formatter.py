@@ -1,27 +1,54 @@
 """Data Formatter Agent for formatting output."""
 
-from typing import Dict
-import json
+from typing import Any, Dict, Iterable, Optional
 from datetime import datetime
 from ..agent import Agent
+from ..record_batch import RecordBatch
+from ..sinks import create_sink
 
 class DataFormatter(Agent):
-    """Agent that formats data for output."""
+    """Agent that formats data for output.
+    
+    With a ``"sink"`` section in the config (see ``mas.sinks.create_sink``)
+    every formatted record is also written to a JSON Lines, CSV or binary
+    file. Records are serialized once, by the sink, and written in batches.
+    
+    A RecordBatch in ``data`` is converted back to a list of records,
+    unless ``"columnar": true`` keeps it (a binary sink then stores the
+    columns as they are).
+    """
+    
+    sharing = "shared"
+    
+    def __init__(
+        self,
+        agent_id: str,
+        config: Dict[str, Any],
+        system_config: Optional[Dict[str, Any]] = None,
+        llm_config: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(agent_id, config, system_config, llm_config)
+        self.sink = create_sink(config["sink"]) if config.get("sink") else None
     
     def process_message(self, message: Dict) -> Dict:
         """Format the data according to configuration."""
+        output = self.format(message)
+        if self.sink is not None:
+            self.sink.write(output)
+        return output
+    
+    def format(self, message: Dict) -> Dict:
+        """Build the output record for a message."""
         output_format = self.config.get("output_format", "json")
         include_metadata = self.config.get("include_metadata", True)
-        pretty_print = self.config.get("pretty_print", True)
         
         if output_format != "json":
             raise ValueError(f"Unsupported output format: {output_format}")
         
         # Prepare output
-        output = {}
-        
-        # Add data
-        output.update(message)
+        output = dict(message)
+        if isinstance(output.get("data"), RecordBatch) and not self.config.get("columnar", False):
+            output["data"] = output["data"].to_records()
         
         # Add metadata if requested
         if include_metadata:
@@ -31,8 +58,22 @@ class DataFormatter(Agent):
                 "format_version": "1.0"
             }
         
-        # Format as JSON
-        if pretty_print:
-            return json.loads(json.dumps(output, indent=2))
-        else:
-            return output
+        return output
+    
+    def write_stream(self, messages: Iterable[Dict]) -> int:
+        """Format messages lazily straight into the sink.
+        
+        Only one batch of records is in memory at a time, however long
+        ``messages`` is. Returns the number of records written.
+        
+        Raises:
+            ValueError: If the agent has no sink configured
+        """
+        if self.sink is None:
+            raise ValueError(f"Agent {self.agent_id} has no sink configured")
+        return self.sink.write_many(self.format(message) for message in messages)
+    
+    def close(self):
+        """Flush and close the sink."""
+        if self.sink is not None:
+            self.sink.close()
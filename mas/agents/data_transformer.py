@@ -3,10 +3,13 @@
 from typing import Dict, List
 import numpy as np
 from ..agent import Agent
+from ..record_batch import RecordBatch
 
 class DataTransformer(Agent):
     """Agent that performs data transformations."""
     
+    sharing = "shared"
+    
     def process_message(self, message: Dict) -> Dict:
         """Transform the data according to configuration."""
         transformation_type = self.config.get("transformation_type")
@@ -17,46 +20,84 @@ class DataTransformer(Agent):
             raise ValueError(f"Unknown transformation type: {transformation_type}")
     
     def _normalize_data(self, message: Dict) -> Dict:
-        """Normalize numeric data using the specified method."""
+        """Normalize numeric data using the specified method.
+        
+        Values are extracted into a contiguous float64 array and normalized
+        with array operations. With ``output: "records"`` (the default) the
+        results are written back as ``normalized_value`` on each item; with
+        ``output: "column"`` they are returned as a single array in
+        ``normalized_values`` and the items are left untouched.
+        
+        A RecordBatch in ``data`` is normalized from its ``value`` column;
+        records output adds a ``normalized_value`` column to a new batch.
+        """
         normalization_config = self.config.get("normalization", {})
         method = normalization_config.get("method", "min_max")
         target_range = normalization_config.get("target_range", [0, 1])
+        output = normalization_config.get("output", "records")
         
         data = message.get("data", [])
         if not data:
             return message
         
         # Extract values
-        values = [item["value"] for item in data]
+        if isinstance(data, RecordBatch):
+            if data.missing("value"):
+                raise KeyError("value")
+            values = data.column("value").astype(np.float64, copy=False)
+        else:
+            values = np.fromiter((item["value"] for item in data), dtype=np.float64, count=len(data))
+        normalized = self._normalize_values(values, method, target_range)
+        
+        if output == "records":
+            if isinstance(data, RecordBatch):
+                data = data.with_column("normalized_value", normalized)
+            else:
+                for item, norm_value in zip(data, normalized.tolist()):
+                    item["normalized_value"] = norm_value
+        elif output == "column":
+            message["normalized_values"] = normalized
+        else:
+            raise ValueError(f"Unknown normalization output: {output}")
+        
+        message["data"] = data
+        return message
+    
+    def _normalize_values(self, values: np.ndarray, method: str, target_range: List[float]) -> np.ndarray:
+        """Normalize an array of values with the given method."""
+        low, high = target_range
         
         if method == "min_max":
-            min_val = min(values)
-            max_val = max(values)
-            range_val = max_val - min_val
-            
+            min_val = values.min()
+            range_val = values.max() - min_val
             if range_val == 0:
-                normalized = [target_range[0]] * len(values)
-            else:
-                normalized = [
-                    target_range[0] + (target_range[1] - target_range[0]) * 
-                    (v - min_val) / range_val
-                    for v in values
-                ]
+                return np.full_like(values, low)
+            normalized = values - min_val
+            normalized *= (high - low) / range_val
+            normalized += low
+            return normalized
         
         elif method == "z_score":
-            mean = np.mean(values)
-            std = np.std(values)
+            std = values.std()
             if std == 0:
-                normalized = [0] * len(values)
-            else:
-                normalized = [(v - mean) / std for v in values]
+                return np.zeros_like(values)
+            return (values - values.mean()) / std
         
-        else:
-            raise ValueError(f"Unknown normalization method: {method}")
+        elif method == "robust":
+            # Scale by the interquartile range around the median
+            q1, median, q3 = np.percentile(values, [25, 50, 75])
+            iqr = q3 - q1
+            if iqr == 0:
+                return np.zeros_like(values)
+            return (values - median) / iqr
         
-        # Update data with normalized values
-        for item, norm_value in zip(data, normalized):
-            item["normalized_value"] = norm_value
+        elif method == "log":
+            if (values <= -1).any():
+                raise ValueError("Log normalization requires values greater than -1")
+            return np.log1p(values)
         
-        message["data"] = data
-        return message
+        elif method == "clip":
+            return np.clip(values, low, high)
+        
+        else:
+            raise ValueError(f"Unknown normalization method: {method}")
@@ -1,27 +1,47 @@
 """Document Processor Agent for text transformations."""
 
-from typing import Dict
+from typing import Dict, Iterable, Iterator
 from ..agent import Agent
 
+def _reverse_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """Reverse a chunked text: the chunks back to front, each reversed."""
+    for chunk in reversed(list(chunks)):
+        yield chunk[::-1]
+
 class DocumentProcessor(Agent):
-    """Agent that performs text transformations."""
+    """Agent that performs text transformations.
+    
+    A streamed document (``chunks`` from DocumentReader) is transformed
+    lazily, one chunk at a time as the next stage consumes it. ``reverse``
+    reverses the whole text, so it reads all the chunks before yielding
+    the last one reversed.
+    """
+    
+    sharing = "shared"
     
     def process_message(self, message: Dict) -> Dict:
         """Transform the document text based on configuration."""
         transformation_type = self.config.get("transformation_type", "uppercase")
         
-        if "text" not in message:
-            raise ValueError("Message must contain 'text' field")
-        
-        text = message["text"]
-        
         if transformation_type == "uppercase":
-            message["text"] = text.upper()
+            transform = str.upper
         elif transformation_type == "lowercase":
-            message["text"] = text.lower()
+            transform = str.lower
         elif transformation_type == "reverse":
-            message["text"] = text[::-1]
+            transform = lambda text: text[::-1]
         else:
             raise ValueError(f"Unknown transformation type: {transformation_type}")
         
+        if "chunks" in message:
+            if transformation_type == "reverse":
+                message["chunks"] = _reverse_chunks(message["chunks"])
+            else:
+                message["chunks"] = map(transform, message["chunks"])
+            return message
+        
+        if "text" not in message:
+            raise ValueError("Message must contain 'text' field")
+        
+        message["text"] = transform(message["text"])
+        
         return message
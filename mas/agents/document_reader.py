@@ -1,20 +1,101 @@
 """Document Reader Agent for validating input documents."""
 
-from typing import Dict
+from typing import Dict, Iterator
+import codecs
+import mmap
+import os
 from ..agent import Agent
 
+# Default size of a streamed chunk, in bytes
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+def _map_file(path: str):
+    """Open and memory-map a file read-only; None for an empty file."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def iter_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                encoding: str = "utf-8", errors: str = "strict") -> Iterator[str]:
+    """Lazily decode a file in chunks of about ``chunk_size`` bytes.
+
+    The file is memory-mapped, so only the pages being decoded are
+    resident. Multi-byte characters split by a chunk boundary are carried
+    over to the next chunk.
+    """
+    mapped = _map_file(path)
+    if mapped is None:
+        return
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    try:
+        for start in range(0, len(mapped), chunk_size):
+            text = decoder.decode(mapped[start:start + chunk_size])
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+    finally:
+        mapped.close()
+
+def iter_lines(path: str, encoding: str = "utf-8", errors: str = "strict") -> Iterator[str]:
+    """Lazily decode a memory-mapped file line by line, keeping line endings."""
+    mapped = _map_file(path)
+    if mapped is None:
+        return
+    try:
+        start, size = 0, len(mapped)
+        while start < size:
+            end = mapped.find(b"\n", start)
+            end = size if end < 0 else end + 1
+            yield mapped[start:end].decode(encoding, errors)
+            start = end
+    finally:
+        mapped.close()
+
 class DocumentReader(Agent):
-    """Agent that validates input documents."""
+    """Agent that validates input documents.
+    
+    A message with a ``path`` instead of ``text`` is read as a stream: the
+    file is memory-mapped and ``chunks`` is set to a lazy iterator of text
+    chunks (``"chunk_mode": "chunks"``, ``chunk_size`` bytes each) or lines
+    (``"chunk_mode": "lines"``). Nothing is read until a later stage
+    consumes the iterator, so memory stays flat for any document size.
+    """
+    
+    sharing = "shared"
     
     def process_message(self, message: Dict) -> Dict:
         """Validate and process the input document."""
         # Get required fields from config
         required_fields = self.config.get("input_validation", {}).get("required_fields", [])
+        streamed = "text" not in message and "path" in message
         
-        # Validate required fields
+        # Validate required fields; a path stands in for the text
         for field in required_fields:
-            if field not in message:
+            if field not in message and not (streamed and field == "text"):
                 raise ValueError(f"Missing required field: {field}")
         
+        if streamed:
+            message["chunks"] = self._open_stream(message["path"])
+        
         # Return validated document
         return message
+    
+    def _open_stream(self, path: str) -> Iterator[str]:
+        """Build the chunk iterator for a document path."""
+        if not os.path.isfile(path):
+            raise ValueError(f"Document not found: {path}")
+        mode = self.config.get("chunk_mode", "chunks")
+        encoding = self.config.get("encoding", "utf-8")
+        errors = self.config.get("errors", "strict")
+        
+        if mode == "lines":
+            return iter_lines(path, encoding, errors)
+        if mode == "chunks":
+            chunk_size = self.config.get("chunk_size", DEFAULT_CHUNK_SIZE)
+            if not isinstance(chunk_size, int) or chunk_size < 1:
+                raise ValueError(f"chunk_size must be a positive integer, got {chunk_size}")
+            return iter_chunks(path, chunk_size, encoding, errors)
+        raise ValueError(f"Unknown chunk mode: {mode}")
@@ -1,18 +1,74 @@
 """Document Writer Agent for formatting output."""
 
-from typing import Dict
+from typing import Any, Dict, Optional
 import json
+import os
 from ..agent import Agent
+from ..sinks import create_sink
 
 class DocumentWriter(Agent):
-    """Agent that formats and writes documents."""
+    """Agent that formats and writes documents.
+    
+    With an ``output_path`` (in the config or the message) the document is
+    written to that file. A streamed document (``chunks``) is written chunk
+    by chunk as it is consumed, and the message then carries the
+    ``output_path``, ``chunks_written`` and ``bytes_written`` instead of
+    the chunks.
+    
+    With a ``"sink"`` section (see ``mas.sinks.create_sink``) each message
+    is also appended as a record to a JSON Lines, CSV or binary file.
+    """
+    
+    sharing = "shared"
+    
+    def __init__(
+        self,
+        agent_id: str,
+        config: Dict[str, Any],
+        system_config: Optional[Dict[str, Any]] = None,
+        llm_config: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(agent_id, config, system_config, llm_config)
+        self.sink = create_sink(config["sink"]) if config.get("sink") else None
     
     def process_message(self, message: Dict) -> Dict:
         """Format the document according to configuration."""
         output_format = self.config.get("output_format", "json")
         
-        if output_format == "json":
-            # Already in JSON format, just pass through
-            return message
-        else:
+        if output_format != "json":
             raise ValueError(f"Unknown output format: {output_format}")
+        
+        output_path = message.get("output_path", self.config.get("output_path"))
+        if "chunks" in message:
+            if output_path is None:
+                raise ValueError("A streamed document needs an output_path")
+            chunks = message["chunks"]
+        elif output_path is not None and "text" in message:
+            chunks = (message["text"],)
+        else:
+            chunks = None
+        
+        if chunks is not None:
+            message["chunks_written"] = self._write(output_path, chunks)
+            # Kept until written, so a retry can write the whole document again
+            message.pop("chunks", None)
+            message["output_path"] = output_path
+            message["bytes_written"] = os.path.getsize(output_path)
+        if self.sink is not None:
+            self.sink.write(message)
+        return message
+    
+    def close(self):
+        """Flush and close the sink."""
+        if self.sink is not None:
+            self.sink.close()
+    
+    def _write(self, path: str, chunks) -> int:
+        """Write chunks to a file as they arrive, returning how many were written."""
+        count = 0
+        with open(path, "w", encoding=self.config.get("encoding", "utf-8"), newline="",
+                  buffering=self.config.get("buffer_size", 1 << 20)) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                count += 1
+        return count
@@ -1,5 +1,5 @@
 from ..agent import Agent, AgentType
-from typing import Dict
+from typing import Dict, Optional
 import logging
 from datetime import datetime
 
@@ -8,7 +8,9 @@ logger = logging.getLogger(__name__)
 class EndAgent(Agent):
     """Agent responsible for finalizing workflow execution and preparing final output."""
     
-    def __init__(self, agent_id: str, config: Dict, system_config: Dict, llm_config: Dict = None):
+    sharing = "shared"
+    
+    def __init__(self, agent_id: str, config: Dict, system_config: Optional[Dict] = None, llm_config: Optional[Dict] = None):
         super().__init__(agent_id, config, system_config, llm_config)
 
     def process_message(self, message: Dict) -> Dict:
@@ -22,7 +24,8 @@ class EndAgent(Agent):
         """
         logger.info(f"Finalizing workflow execution")
         
-        payload = message.get("payload", {})
+        # A workflow stage receives the previous stage's output without an envelope
+        payload = message.get("payload", message)
         data = payload.get("data", {})
         workflow_context = payload.get("workflow_context", {})
         
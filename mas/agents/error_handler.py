@@ -1,18 +1,27 @@
 from ..agent import Agent, AgentType
-from typing import Dict
+from ..retry import RetryPolicy
+from typing import Dict, Optional
 import logging
-import time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 class ErrorHandlerAgent(Agent):
-    """Agent responsible for handling errors and implementing recovery strategies."""
+    """Agent responsible for handling errors and implementing recovery strategies.
     
-    def __init__(self, agent_id: str, config: Dict, system_config: Dict, llm_config: Dict = None):
+    The handler never waits itself: a retry decision carries a
+    ``retry_after`` delay (seconds, exponential backoff with jitter) for the
+    caller to schedule. Stage-level retries are configured on the workflow
+    stage with ``max_retries`` and ``retry_delay``.
+    """
+    
+    sharing = "shared"
+    
+    def __init__(self, agent_id: str, config: Dict, system_config: Optional[Dict] = None, llm_config: Optional[Dict] = None):
         super().__init__(agent_id, config, system_config, llm_config)
-        self.max_retries = config.get("config", {}).get("max_retries", 3)
-        self.retry_delay = config.get("config", {}).get("retry_delay", 1000)  # milliseconds
+        self.max_retries = config.get("max_retries", 3)
+        self.retry_delay = config.get("retry_delay", 1000)  # milliseconds
+        self._retry_policy = RetryPolicy(self.max_retries, self.retry_delay)
 
     def process_message(self, message: Dict) -> Dict:
         """Handle errors in the workflow.
@@ -23,7 +32,12 @@ class ErrorHandlerAgent(Agent):
         Returns:
             Dict containing error handling result and metadata
         """
-        payload = message.get("payload", {})
+        return self._handle_error(message)
+
+    def _handle_error(self, message: Dict) -> Dict:
+        """Build the error handling response for a message."""
+        # A workflow stage receives the previous stage's output without an envelope
+        payload = message.get("payload", message)
         error_info = payload.get("error", "Unknown error")
         original_message = payload.get("original_message", {})
         workflow_context = payload.get("workflow_context", {})
@@ -36,7 +50,6 @@ class ErrorHandlerAgent(Agent):
         
         if retry_count < self.max_retries:
             # Implement retry logic
-            time.sleep(self.retry_delay / 1000)  # Convert to seconds
             retry_count += 1
             
             error_response = {
@@ -47,6 +60,7 @@ class ErrorHandlerAgent(Agent):
                         "handled_by": self.agent_id,
                         "retry_count": retry_count,
                         "recovery_action": "retry",
+                        "retry_after": self._retry_policy.delay(retry_count),
                         "handling_time": datetime.utcnow().isoformat()
                     }
                 },
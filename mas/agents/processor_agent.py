@@ -1,22 +1,147 @@
 from ..agent import Agent, AgentType
-from typing import Dict, Any, Union
+from ..payload import PAYLOAD_VIEWS
+from typing import Dict, Any, Callable, List, Optional, Sequence, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# String transformations by name; "default" leaves data untouched
+TRANSFORMATIONS: Dict[str, Optional[Callable[[str], str]]] = {
+    "uppercase": str.upper,
+    "lowercase": str.lower,
+    "reverse": lambda text: text[::-1],
+    "default": None
+}
+
+def _assign(frame: List[Any], key: Any, value: Any, in_place: bool):
+    """Store a changed child in a traversal frame, copying the container on first write."""
+    if in_place:
+        frame[0][key] = value
+        return
+    if frame[2] is None:
+        frame[2] = dict(frame[0]) if isinstance(frame[0], dict) else list(frame[0])
+    frame[2][key] = value
+
+def transform_strings(data: Any, transform: Callable[[str], str], in_place: bool = False) -> Any:
+    """Apply a string transformation to every string in a nested structure.
+    
+    The traversal is iterative, so nesting depth is not limited by the
+    recursion limit. Without ``in_place`` only containers on the path to a
+    changed string are copied; subtrees without changes are shared with the
+    input. With ``in_place`` the input containers are updated directly.
+    
+    Args:
+        data: Nested dicts, lists and scalars
+        transform: Function applied to each string
+        in_place: Mutate the input instead of copying changed containers
+        
+    Returns:
+        The transformed data
+    """
+    if isinstance(data, str):
+        return transform(data)
+    if not isinstance(data, (dict, list)):
+        return data
+    
+    # Frame: [container, item iterator, copy (or None), key in parent]
+    stack = [[data, iter(data.items()) if isinstance(data, dict) else enumerate(data), None, None]]
+    while stack:
+        frame = stack[-1]
+        for key, value in frame[1]:
+            if isinstance(value, str):
+                new_value = transform(value)
+                if new_value != value:
+                    _assign(frame, key, new_value, in_place)
+            elif isinstance(value, (dict, list)) and value:
+                stack.append([value, iter(value.items()) if isinstance(value, dict) else enumerate(value), None, key])
+                break
+        else:
+            stack.pop()
+            result = frame[2] if frame[2] is not None else frame[0]
+            if not stack:
+                return result
+            if result is not frame[0]:
+                _assign(stack[-1], frame[3], result, in_place)
+    return data
+
+def transform_path(data: Any, path: Sequence[str], transform: Callable[[str], str], in_place: bool = False) -> Any:
+    """Apply a string transformation to the subtree at a key path.
+    
+    Path segments select dict keys. At a list, a numeric segment selects one
+    element; any other segment is applied to every element. Regions off the
+    path are never visited, and without ``in_place`` only the containers
+    along the path are copied.
+    
+    Args:
+        data: Nested dicts, lists and scalars
+        path: Key path segments
+        transform: Function applied to each string
+        in_place: Mutate the input instead of copying changed containers
+        
+    Returns:
+        The transformed data
+    """
+    if not path:
+        return transform_strings(data, transform, in_place)
+    
+    segment, rest = path[0], path[1:]
+    if isinstance(data, dict):
+        if segment not in data:
+            return data
+        child = data[segment]
+        new_child = transform_path(child, rest, transform, in_place)
+        if new_child is child:
+            return data
+        result = data if in_place else dict(data)
+        result[segment] = new_child
+        return result
+    
+    if isinstance(data, list):
+        if segment.isdigit():
+            indices = [int(segment)] if int(segment) < len(data) else []
+            remaining = rest
+        else:
+            indices = range(len(data))
+            remaining = path
+        result = data if in_place else None
+        for index in indices:
+            item = data[index]
+            new_item = transform_path(item, remaining, transform, in_place)
+            if new_item is not item:
+                if result is None:
+                    result = list(data)
+                result[index] = new_item
+        return result if result is not None else data
+    
+    return data
+
 class ProcessorAgent(Agent):
     """Agent responsible for processing data according to configured transformations."""
     
-    def __init__(self, agent_id: str, config: Dict, system_config: Dict, llm_config: Dict = None):
+    sharing = "shared"
+    
+    def __init__(self, agent_id: str, config: Dict, system_config: Optional[Dict] = None, llm_config: Optional[Dict] = None):
         super().__init__(agent_id, config, system_config, llm_config)
-        self.transformation_type = config.get("config", {}).get("transformation_type", "default")
-        self.max_retries = config.get("config", {}).get("max_retries", 3)
-        self.retry_delay = config.get("config", {}).get("retry_delay", 1000)
+        self.transformation_type = config.get("transformation_type", "default")
+        self.max_retries = config.get("max_retries", 3)
+        self.retry_delay = config.get("retry_delay", 1000)
+        self.transform_in_place = config.get("transform_in_place", False)
         
         # Validate transformation type
-        self.valid_transformations = ["uppercase", "lowercase", "reverse", "default"]
+        self.valid_transformations = list(TRANSFORMATIONS)
         if self.transformation_type not in self.valid_transformations:
             raise ValueError(f"Invalid transformation type: {self.transformation_type}. Must be one of {self.valid_transformations}")
+        self._transform = TRANSFORMATIONS[self.transformation_type]
+        
+        # Key paths to restrict the transform to; a path covered by a shorter
+        # one is dropped so no subtree is transformed twice
+        paths = sorted(
+            tuple(path.split(".")) for path in config.get("transform_paths", [])
+        )
+        self.transform_paths: List[tuple] = []
+        for path in paths:
+            if not any(path[:len(kept)] == kept for kept in self.transform_paths):
+                self.transform_paths.append(path)
 
     def process_message(self, message: Dict) -> Dict:
         """Process data according to agent configuration.
@@ -29,7 +154,8 @@ class ProcessorAgent(Agent):
         """
         logger.info(f"Processing data with transformation: {self.transformation_type}")
         
-        payload = message.get("payload", {})
+        # A workflow stage receives the previous stage's output without an envelope
+        payload = message.get("payload", message)
         data = payload.get("data", {})
         workflow_context = payload.get("workflow_context", {})
         
@@ -56,23 +182,29 @@ class ProcessorAgent(Agent):
     def _transform_data(self, data: Any) -> Any:
         """Transform data according to the configured transformation type.
         
+        Only containers holding changed strings are copied (or, with
+        ``transform_in_place``, the input is updated directly). With
+        ``transform_paths`` only the configured key paths are visited.
+        
         Args:
             data: Data to transform
             
         Returns:
             Transformed data
         """
-        if isinstance(data, dict):
-            return {
-                key: self._transform_data(value)
-                for key, value in data.items()
-            }
-        elif isinstance(data, list):
-            return [self._transform_data(item) for item in data]
-        elif isinstance(data, str):
-            return self._apply_transformation(data)
-        else:
+        if self._transform is None:
             return data
+        in_place = self.transform_in_place
+        if isinstance(data, PAYLOAD_VIEWS):
+            # A copy-on-write view shares its data with the workflow input,
+            # so it is transformed by copying even with transform_in_place
+            data = data.thaw()
+            in_place = False
+        if not self.transform_paths:
+            return transform_strings(data, self._transform, in_place)
+        for path in self.transform_paths:
+            data = transform_path(data, path, self._transform, in_place)
+        return data
     
     def _apply_transformation(self, text: str) -> str:
         """Apply the specified transformation to a string.
@@ -83,11 +215,4 @@ class ProcessorAgent(Agent):
         Returns:
             Transformed string
         """
-        if self.transformation_type == "uppercase":
-            return text.upper()
-        elif self.transformation_type == "lowercase":
-            return text.lower()
-        elif self.transformation_type == "reverse":
-            return text[::-1]
-        else:  # default
-            return text
+        return self._transform(text) if self._transform is not None else text
@@ -1,5 +1,5 @@
 from ..agent import Agent, AgentType
-from typing import Dict
+from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,9 +7,11 @@ logger = logging.getLogger(__name__)
 class StarterAgent(Agent):
     """Agent responsible for initializing workflows."""
     
-    def __init__(self, agent_id: str, config: Dict, system_config: Dict, llm_config: Dict = None):
+    sharing = "shared"
+    
+    def __init__(self, agent_id: str, config: Dict, system_config: Optional[Dict] = None, llm_config: Optional[Dict] = None):
         super().__init__(agent_id, config, system_config, llm_config)
-        self.initialization_type = config.get("config", {}).get("initialization_type", "standard")
+        self.initialization_type = config.get("initialization_type", "standard")
 
     def process_message(self, message: Dict) -> Dict:
         """Initialize workflow with starting data.
@@ -22,8 +24,13 @@ class StarterAgent(Agent):
         """
         logger.info(f"Initializing workflow with type: {self.initialization_type}")
         
-        payload = message.get("payload", {})
-        data = payload.get("data", {})
+        if "payload" in message:
+            payload = message["payload"]
+            data = payload.get("data", {})
+        else:
+            # Run as a workflow stage: the message is the initial data itself
+            payload = {}
+            data = message
         workflow_context = payload.get("workflow_context", {})
         
         # Add initialization metadata
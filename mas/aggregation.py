@@ -0,0 +1,385 @@
+"""Vectorized group-by aggregation over NumPy arrays."""
+
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+import math
+import re
+import numpy as np
+
+# Aggregations besides percentiles, which are written as "p<q>" (e.g. "p95")
+AGGREGATION_METHODS = ("count", "sum", "mean", "median", "min", "max", "std", "var", "first", "last")
+
+# Aggregations that can be answered from mergeable streaming state
+STREAMING_METHODS = ("count", "sum", "mean", "median", "min", "max", "std", "var")
+
+_PERCENTILE_PATTERN = re.compile(r"^p(\d+(?:\.\d+)?)$")
+
+def parse_percentile(method: str) -> Optional[float]:
+    """Return q for a "p<q>" method name, or None if it is not a percentile."""
+    match = _PERCENTILE_PATTERN.match(method)
+    if match is None:
+        return None
+    q = float(match.group(1))
+    if q > 100:
+        raise ValueError(f"Percentile out of range: {method}")
+    return q
+
+def check_methods(methods: Iterable[str], streaming: bool = False):
+    """Raise ValueError for any unknown aggregation method."""
+    known = STREAMING_METHODS if streaming else AGGREGATION_METHODS
+    for method in methods:
+        if method not in known and parse_percentile(method) is None:
+            mode = "streaming aggregation" if streaming else "aggregation"
+            raise ValueError(f"Unknown {mode} method: {method}")
+
+def factorize(keys: Iterable[Hashable], count: int = -1) -> Tuple[List[Hashable], np.ndarray]:
+    """Encode keys as integer codes in order of first appearance.
+
+    Args:
+        keys: Group keys, one per record
+        count: Number of keys if known, to preallocate the code array
+
+    Returns:
+        Tuple of (unique keys, integer code per record)
+    """
+    index: Dict[Hashable, int] = {}
+    codes = np.fromiter(
+        (index.setdefault(key, len(index)) for key in keys),
+        dtype=np.intp,
+        count=count
+    )
+    return list(index), codes
+
+class GroupBy:
+    """Grouped reductions over a single value array.
+
+    Counts and sums come from ``np.bincount``; order statistics share one
+    sort by (group, value). Intermediate results are computed once and
+    reused across methods.
+    """
+
+    def __init__(self, codes: np.ndarray, values: np.ndarray, n_groups: int):
+        self.codes = codes
+        self.values = values
+        self.n_groups = n_groups
+        self._cache: Dict[str, Any] = {}
+
+    def _get(self, name: str, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._get("counts", lambda: np.bincount(self.codes, minlength=self.n_groups))
+
+    @property
+    def starts(self) -> np.ndarray:
+        """Offset of each group in group-sorted order."""
+        def compute():
+            starts = np.zeros(self.n_groups, dtype=np.intp)
+            np.cumsum(self.counts[:-1], out=starts[1:])
+            return starts
+        return self._get("starts", compute)
+
+    @property
+    def sorted_values(self) -> np.ndarray:
+        """Values sorted by group, then by value."""
+        return self._get("sorted_values", lambda: self.values[np.lexsort((self.values, self.codes))])
+
+    @property
+    def arrival_order(self) -> np.ndarray:
+        """Record indices sorted by group, keeping arrival order within a group."""
+        return self._get("arrival_order", lambda: np.argsort(self.codes, kind="stable"))
+
+    def sum(self) -> np.ndarray:
+        return self._get("sum", lambda: np.bincount(self.codes, weights=self.values, minlength=self.n_groups))
+
+    def mean(self) -> np.ndarray:
+        return self._get("mean", lambda: self.sum() / self.counts)
+
+    def var(self) -> np.ndarray:
+        def compute():
+            deviations = self.values - self.mean()[self.codes]
+            return np.bincount(self.codes, weights=deviations * deviations, minlength=self.n_groups) / self.counts
+        return self._get("var", compute)
+
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var())
+
+    def min(self) -> np.ndarray:
+        return self.sorted_values[self.starts]
+
+    def max(self) -> np.ndarray:
+        return self.sorted_values[self.starts + self.counts - 1]
+
+    def first(self) -> np.ndarray:
+        return self.values[self.arrival_order[self.starts]]
+
+    def last(self) -> np.ndarray:
+        return self.values[self.arrival_order[self.starts + self.counts - 1]]
+
+    def percentile(self, q: float) -> np.ndarray:
+        """Per-group percentile with linear interpolation, as np.percentile."""
+        position = (self.counts - 1) * (q / 100.0)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, self.counts - 1)
+        fraction = position - lower
+        low_values = self.sorted_values[self.starts + lower]
+        high_values = self.sorted_values[self.starts + upper]
+        return low_values + (high_values - low_values) * fraction
+
+    def median(self) -> np.ndarray:
+        return self.percentile(50)
+
+    def aggregate(self, method: str) -> np.ndarray:
+        """Compute one aggregation method for every group."""
+        if method == "count":
+            return self.counts
+        if method in AGGREGATION_METHODS:
+            return getattr(self, method)()
+
+        q = parse_percentile(method)
+        if q is None:
+            raise ValueError(f"Unknown aggregation method: {method}")
+        return self.percentile(q)
+
+def bucket_keys(values: np.ndarray, log_gamma: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (sign, logarithmic bucket) arrays for the given values."""
+    signs = np.sign(values).astype(np.int64)
+    buckets = np.zeros(len(values), dtype=np.int64)
+    nonzero = signs != 0
+    buckets[nonzero] = np.ceil(np.log(np.abs(values[nonzero])) / log_gamma)
+    return signs, buckets
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error.
+
+    Values are counted in logarithmic buckets (as in DDSketch), so any
+    quantile is answered within ``relative_accuracy`` of a true value and
+    two sketches merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add_bucket(self, sign: int, bucket: int, count: int):
+        """Add ``count`` values to one bucket."""
+        if sign > 0:
+            self.positive[bucket] = self.positive.get(bucket, 0) + count
+        elif sign < 0:
+            self.negative[bucket] = self.negative.get(bucket, 0) + count
+        else:
+            self.zero_count += count
+        self.count += count
+
+    def add(self, values: np.ndarray):
+        """Add an array of values to the sketch."""
+        signs, buckets = bucket_keys(np.asarray(values, dtype=np.float64), self.log_gamma)
+        if not len(signs):
+            return
+        keys, counts = np.unique(np.stack([signs, buckets]), axis=1, return_counts=True)
+        for sign, bucket, count in zip(*keys.tolist(), counts.tolist()):
+            self.add_bucket(sign, bucket, count)
+
+    def merge(self, other: "QuantileSketch"):
+        """Fold another sketch into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for bucket, count in other.positive.items():
+            self.positive[bucket] = self.positive.get(bucket, 0) + count
+        for bucket, count in other.negative.items():
+            self.negative[bucket] = self.negative.get(bucket, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _bucket_value(self, bucket: int) -> float:
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile, 0 <= q <= 1 (NaN if the sketch is empty)."""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -self._bucket_value(bucket)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return self._bucket_value(bucket)
+        return self._bucket_value(max(self.positive))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the sketch to a JSON-compatible dict."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zero_count": self.zero_count
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        """Rebuild a sketch serialized with to_dict."""
+        sketch = cls(data["relative_accuracy"])
+        sketch.positive = {int(k): v for k, v in data["positive"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = sketch.zero_count + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+class StreamingAggregate:
+    """Running per-group aggregation state that can be merged across shards.
+
+    Keeps count, sum, sum of squared deviations, min and max per group plus
+    a QuantileSketch for median and percentiles, so results can be emitted
+    at any time without holding raw records. States built by different
+    workers combine with merge().
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.log_gamma = QuantileSketch(relative_accuracy).log_gamma
+        self.keys: List[Hashable] = []
+        self.index: Dict[Hashable, int] = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.sum = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+        self.sketches: List[QuantileSketch] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _group_indices(self, keys: List[Hashable]) -> np.ndarray:
+        """Map keys to state slots, growing the state for new groups."""
+        new_keys = [key for key in keys if key not in self.index]
+        if new_keys:
+            for key in new_keys:
+                self.index[key] = len(self.keys)
+                self.keys.append(key)
+                self.sketches.append(QuantileSketch(self.relative_accuracy))
+            grow = len(new_keys)
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+            self.sum = np.concatenate([self.sum, np.zeros(grow)])
+            self.m2 = np.concatenate([self.m2, np.zeros(grow)])
+            self.min = np.concatenate([self.min, np.full(grow, np.inf)])
+            self.max = np.concatenate([self.max, np.full(grow, -np.inf)])
+        return np.fromiter((self.index[key] for key in keys), dtype=np.intp, count=len(keys))
+
+    def _combine(self, slots: np.ndarray, count: np.ndarray, total: np.ndarray, m2: np.ndarray,
+                 minimum: np.ndarray, maximum: np.ndarray):
+        """Merge per-group partial moments into the given slots (Chan et al.)."""
+        count_a = self.count[slots]
+        combined = count_a + count
+        mean_a = np.divide(self.sum[slots], count_a, out=np.zeros(len(slots)), where=count_a > 0)
+        mean_b = np.divide(total, count, out=np.zeros(len(slots)), where=count > 0)
+        delta = mean_b - mean_a
+        correction = np.divide(delta * delta * count_a * count, combined,
+                               out=np.zeros(len(slots)), where=combined > 0)
+        self.m2[slots] += m2 + correction
+        self.count[slots] = combined
+        self.sum[slots] += total
+        self.min[slots] = np.minimum(self.min[slots], minimum)
+        self.max[slots] = np.maximum(self.max[slots], maximum)
+
+    def update(self, keys: List[Hashable], values: np.ndarray):
+        """Fold a batch of (group key, value) records into the state."""
+        if not len(keys):
+            return
+        groups, codes = factorize(keys, count=len(keys))
+        self.update_groups(groups, codes, values)
+
+    def update_groups(self, groups: List[Hashable], codes: np.ndarray, values: np.ndarray):
+        """Fold a batch of already factorized records into the state.
+
+        Args:
+            groups: Distinct group keys
+            codes: Index into ``groups`` per record
+            values: Value per record
+        """
+        if not len(codes):
+            return
+        grouped = GroupBy(codes, values, len(groups))
+        slots = self._group_indices(groups)
+        self._combine(slots, grouped.counts, grouped.sum(), grouped.var() * grouped.counts,
+                      grouped.min(), grouped.max())
+
+        # One sketch update per distinct (group, sign, bucket)
+        signs, buckets = bucket_keys(values, self.log_gamma)
+        triples, counts = np.unique(np.stack([slots[codes], signs, buckets]), axis=1, return_counts=True)
+        for slot, sign, bucket, count in zip(*triples.tolist(), counts.tolist()):
+            self.sketches[slot].add_bucket(sign, bucket, count)
+
+    def merge(self, other: "StreamingAggregate"):
+        """Fold another partial state into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge states with different relative accuracy")
+        if not len(other):
+            return
+        slots = self._group_indices(other.keys)
+        self._combine(slots, other.count, other.sum, other.m2, other.min, other.max)
+        for slot, sketch in zip(slots.tolist(), other.sketches):
+            self.sketches[slot].merge(sketch)
+
+    def aggregate(self, method: str) -> List[Any]:
+        """Compute one streaming aggregation method for every group."""
+        if method == "count":
+            return self.count.tolist()
+        if method == "sum":
+            return self.sum.tolist()
+        if method == "mean":
+            return (self.sum / self.count).tolist()
+        if method == "var":
+            return (self.m2 / self.count).tolist()
+        if method == "std":
+            return np.sqrt(self.m2 / self.count).tolist()
+        if method == "min":
+            return self.min.tolist()
+        if method == "max":
+            return self.max.tolist()
+        q = 50.0 if method == "median" else parse_percentile(method)
+        if q is None:
+            raise ValueError(f"Unknown streaming aggregation method: {method}")
+        return [sketch.quantile(q / 100.0) for sketch in self.sketches]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the state to a JSON-compatible dict."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "keys": list(self.keys),
+            "count": self.count.tolist(),
+            "sum": self.sum.tolist(),
+            "m2": self.m2.tolist(),
+            "min": self.min.tolist(),
+            "max": self.max.tolist(),
+            "sketches": [sketch.to_dict() for sketch in self.sketches]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingAggregate":
+        """Rebuild a state serialized with to_dict."""
+        state = cls(data["relative_accuracy"])
+        state.keys = list(data["keys"])
+        state.index = {key: i for i, key in enumerate(state.keys)}
+        state.count = np.array(data["count"], dtype=np.int64)
+        state.sum = np.array(data["sum"], dtype=np.float64)
+        state.m2 = np.array(data["m2"], dtype=np.float64)
+        state.min = np.array(data["min"], dtype=np.float64)
+        state.max = np.array(data["max"], dtype=np.float64)
+        state.sketches = [QuantileSketch.from_dict(sketch) for sketch in data["sketches"]]
+        return state
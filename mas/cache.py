@@ -0,0 +1,190 @@
+"""Result memoization for deterministic agents."""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import pickle
+import threading
+import time
+from .payload import PAYLOAD_VIEWS
+
+def _keeps_structure(value: Any) -> bool:
+    """Whether JSON tells ``value`` apart from similar data.
+
+    JSON turns tuples into lists and dict keys into strings, so
+    ``{1: x}`` and ``{"1": x}`` (or a tuple and a list) would encode alike.
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if type(key) is not str or not _keeps_structure(item):
+                return False
+        return True
+    if isinstance(value, list):
+        return all(_keeps_structure(item) for item in value if isinstance(item, (dict, list, tuple)))
+    return not isinstance(value, tuple)
+
+def _encode_default(obj: Any) -> Any:
+    """JSON fallback for payload hashing: payload views, mappings and NumPy arrays."""
+    if isinstance(obj, (Mapping, *PAYLOAD_VIEWS)):
+        data = obj.thaw() if isinstance(obj, PAYLOAD_VIEWS) else dict(obj)
+        if not _keeps_structure(data):
+            raise TypeError("Payload has non-string keys or tuples")
+        return data
+    if hasattr(obj, "tobytes") and hasattr(obj, "dtype") and hasattr(obj, "shape"):
+        digest = hashlib.blake2b(obj.tobytes(), digest_size=16).hexdigest()
+        return {"__ndarray__": [obj.dtype.str, list(obj.shape), digest]}
+    raise TypeError(f"Cannot hash payload value of type {type(obj).__name__}")
+
+def payload_key(payload: Any) -> Optional[str]:
+    """Return a stable content hash for a payload.
+
+    The payload is serialized as canonical JSON (sorted keys, compact
+    separators) and hashed with BLAKE2b, so equal payloads get equal keys
+    across processes and runs. Returns None for payloads that cannot be
+    serialized canonically, including those with non-string dict keys or
+    tuples, which callers treat as uncacheable.
+    """
+    if not _keeps_structure(payload):
+        return None
+    try:
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=_encode_default)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+class ResultCache:
+    """Bounded LRU cache of agent results with optional TTL.
+
+    Results are stored pickled, which both measures their size for the
+    ``max_bytes`` budget and means every hit returns a fresh copy that
+    callers can mutate freely.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+            ttl: Seconds a result stays valid (None = no expiry)
+            max_bytes: Budget for the pickled size of all results (None = unbounded)
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.uncacheable = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["ResultCache"]:
+        """Build a cache from an agent's ``cache`` config, or None if disabled."""
+        if not config or not config.get("enabled", True):
+            return None
+        return cls(
+            max_entries=config.get("max_entries", 1024),
+            ttl=config.get("ttl"),
+            max_bytes=config.get("max_bytes")
+        )
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a result.
+
+        Returns:
+            Tuple of (hit, copy of the cached result or None)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            blob = entry[0]
+        return True, pickle.loads(blob)
+
+    def put(self, key: str, value: Any):
+        """Store a copy of a result, evicting least recently used entries."""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.record_uncacheable()
+            return
+        if self.max_bytes is not None and len(blob) > self.max_bytes:
+            self.record_uncacheable()
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (blob, expires)
+            self._bytes += len(blob)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record_uncacheable(self):
+        """Count a payload or result that could not be cached."""
+        with self._lock:
+            self.uncacheable += 1
+
+    def _remove(self, key: str):
+        blob, _ = self._entries.pop(key)
+        self._bytes -= len(blob)
+
+    def clear(self):
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "uncacheable": self.uncacheable,
+                "entries": len(self._entries),
+                "bytes": self._bytes
+            }
+
+def memoize(process: Callable[[Any], Any], cache: ResultCache) -> Callable[[Any], Any]:
+    """Wrap a message handler so results are served from the cache.
+
+    The key is computed before the handler runs, since handlers may mutate
+    their input.
+    """
+    def cached(message: Any) -> Any:
+        key = payload_key(message)
+        if key is None:
+            cache.record_uncacheable()
+            return process(message)
+        hit, result = cache.get(key)
+        if hit:
+            return result
+        result = process(message)
+        cache.put(key, result)
+        return result
+
+    cached.__wrapped__ = process
+    return cached
@@ -0,0 +1,214 @@
+"""Dependency-driven (DAG) execution of workflow plans."""
+
+from collections import deque
+from collections.abc import Mapping, MutableMapping
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Sequence, Tuple
+import asyncio
+import copy
+from .payload import CowDict, materialize
+
+def _merge_update(names: Sequence[str], outputs: Sequence[Any]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for output in outputs:
+        merged.update(output)
+    return merged
+
+def _deep_update(target: Dict[str, Any], source: Mapping):
+    for key, value in source.items():
+        current = target.get(key)
+        if isinstance(current, MutableMapping) and isinstance(value, Mapping):
+            _deep_update(current, value)
+        else:
+            target[key] = copy.deepcopy(value) if isinstance(value, (dict, CowDict)) else value
+
+def _merge_deep(names: Sequence[str], outputs: Sequence[Any]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for output in outputs:
+        _deep_update(merged, output)
+    return merged
+
+def _merge_keyed(names: Sequence[str], outputs: Sequence[Any]) -> Dict[str, Any]:
+    return dict(zip(names, outputs))
+
+def _merge_list(names: Sequence[str], outputs: Sequence[Any]) -> List[Any]:
+    return list(outputs)
+
+# Join strategies: (dependency names, their outputs) -> join stage input
+MERGE_STRATEGIES: Dict[str, Callable[[Sequence[str], Sequence[Any]], Any]] = {
+    "update": _merge_update,
+    "deep": _merge_deep,
+    "keyed": _merge_keyed,
+    "list": _merge_list
+}
+
+def merge_outputs(strategy: str, names: Sequence[str], outputs: Sequence[Any]) -> Any:
+    """Combine the outputs of several stages for a join.
+
+    Strategies are "update" (shallow dict merge, later dependencies win),
+    "deep" (recursive dict merge), "keyed" (``{stage name: output}``) and
+    "list" (outputs in dependency order).
+    """
+    if len(outputs) == 1 and strategy in ("update", "deep"):
+        return outputs[0]
+    return MERGE_STRATEGIES[strategy](names, outputs)
+
+def topological_order(dependencies: Dict[str, Tuple[str, ...]]) -> List[str]:
+    """Order stages so each comes after its dependencies.
+
+    Stages keep their definition order where dependencies allow it.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    remaining = {name: len(deps) for name, deps in dependencies.items()}
+    dependents: Dict[str, List[str]] = {name: [] for name in dependencies}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(name)
+
+    position = {name: i for i, name in enumerate(dependencies)}
+    ready = [name for name, count in remaining.items() if count == 0]
+    order = []
+    while ready:
+        ready.sort(key=position.__getitem__, reverse=True)
+        name = ready.pop()
+        order.append(name)
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(dependencies):
+        cycle = sorted(name for name, count in remaining.items() if count)
+        raise ValueError(f"Stage dependencies contain a cycle: {', '.join(cycle)}")
+    return order
+
+class _DagRun:
+    """Bookkeeping shared by the sync and async DAG executors.
+
+    Each stage output is handed to every dependent (and kept if the stage
+    is a sink); all consumers but the last get a deep copy, so branches can
+    modify their input without affecting each other. Copy-on-write views
+    (``mas.payload``) are copied without copying the data they wrap, and
+    streamed values are read into lists before they are copied.
+    """
+
+    def __init__(self, plan: Any, payload: Any, join: Callable[[Any, Sequence[str], Sequence[Any]], Any]):
+        self.plan = plan
+        self.join = join
+        self.waiting = {stage.name: len(stage.depends_on) for stage in plan.stages}
+        self.outputs: Dict[str, Any] = {}
+        self.uses = {
+            stage.name: len(plan.dependents[stage.name]) + (stage.name in plan.sinks)
+            for stage in plan.stages
+        }
+        roots = [stage for stage in plan.stages if not stage.depends_on]
+        if len(roots) > 1:
+            materialize(payload)
+        copies = [payload] + [copy.deepcopy(payload) for _ in roots[1:]]
+        self.ready: Deque[Tuple[Any, Any]] = deque(zip(roots, copies))
+
+    def _take(self, name: str) -> Any:
+        self.uses[name] -= 1
+        output = self.outputs[name]
+        if self.uses[name] == 0:
+            del self.outputs[name]
+            return output
+        return copy.deepcopy(output)
+
+    def complete(self, name: str, output: Any):
+        """Store a stage output and queue the dependents it unblocks."""
+        if self.uses[name] > 1:
+            materialize(output)
+        self.outputs[name] = output
+        for dependent in self.plan.dependents[name]:
+            self.waiting[dependent] -= 1
+            if self.waiting[dependent] == 0:
+                stage = self.plan.stage_index[dependent]
+                inputs = [self._take(dep) for dep in stage.depends_on]
+                self.ready.append((stage, self.join(stage.merge, stage.depends_on, inputs)))
+
+    def result(self) -> Any:
+        sinks = self.plan.sinks
+        if len(sinks) == 1:
+            return self._take(sinks[0])
+        return self.join(self.plan.merge, sinks, [self._take(name) for name in sinks])
+
+def run_dag(
+    plan: Any,
+    payload: Any,
+    execute: Callable[[Any, Any], Any],
+    submit: Callable[[Any, Any], Future],
+    join: Callable[[str, Sequence[str], Sequence[Any]], Any] = merge_outputs
+) -> Any:
+    """Run a DAG plan, executing independent stages concurrently.
+
+    Ready stages are handed to ``submit`` as soon as their dependencies
+    finish, so latency follows the critical
+    path. When a single stage is ready and nothing else is running, the
+    calling thread runs it itself, so a chain of dependent stages never
+    leaves the caller's thread.
+
+    Args:
+        plan: A WorkflowPlan with ``dag`` set
+        payload: Input for the root stages
+        execute: Runs one stage: (StagePlan, input) -> output
+        submit: Starts a stage like ``execute`` on another thread,
+            returning a Future of its output
+        join: Merges dependency outputs: (strategy, names, outputs) -> input
+
+    Returns:
+        The sink output, or the sinks' outputs merged with ``plan.merge``
+    """
+    run = _DagRun(plan, payload, join)
+    running: Dict[Future, str] = {}
+
+    while run.ready or running:
+        if len(run.ready) == 1 and not running:
+            stage, message = run.ready.popleft()
+            run.complete(stage.name, execute(stage, message))
+            continue
+
+        while run.ready:
+            stage, message = run.ready.popleft()
+            running[submit(stage, message)] = stage.name
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            run.complete(running.pop(future), future.result())
+
+    return run.result()
+
+async def arun_dag(
+    plan: Any,
+    payload: Any,
+    execute: Callable[[Any, Any], Awaitable[Any]],
+    join: Callable[[str, Sequence[str], Sequence[Any]], Any] = merge_outputs
+) -> Any:
+    """Run a DAG plan on the running event loop, stages as concurrent tasks.
+
+    Args:
+        plan: A WorkflowPlan with ``dag`` set
+        payload: Input for the root stages
+        execute: Coroutine function running one stage
+        join: Merges dependency outputs: (strategy, names, outputs) -> input
+
+    Returns:
+        The sink output, or the sinks' outputs merged with ``plan.merge``
+    """
+    run = _DagRun(plan, payload, join)
+    running: Dict[asyncio.Task, str] = {}
+
+    try:
+        while run.ready or running:
+            while run.ready:
+                stage, message = run.ready.popleft()
+                running[asyncio.ensure_future(execute(stage, message))] = stage.name
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                run.complete(running.pop(task), task.result())
+    finally:
+        for task in running:
+            task.cancel()
+
+    return run.result()
@@ -0,0 +1,226 @@
+"""Stage executors: run agents inline, on a thread pool or on a process pool."""
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import multiprocessing
+import multiprocessing.util
+import os
+import pickle
+import threading
+from .agent import Agent
+from .agent_registry import create_agent
+from .payload import materialize
+
+EXECUTOR_TYPES = ("inline", "thread", "process")
+
+# Agents built once per process-pool worker, keyed by agent config key
+_worker_agents: Dict[str, Agent] = {}
+
+def _init_worker(
+    agent_configs: Dict[str, Dict[str, Any]],
+    system_config: Optional[Dict[str, Any]] = None,
+    llm_configs: Optional[Dict[str, Any]] = None
+):
+    """Process-pool initializer: build the worker's agents from config.
+
+    The agents are closed when the worker exits at pool shutdown, so
+    agents that write to sinks flush them.
+    """
+    for agent_key, agent_config in agent_configs.items():
+        _worker_agents[agent_key] = create_agent(agent_config, system_config, llm_configs)
+    multiprocessing.util.Finalize(None, _close_worker_agents, exitpriority=10)
+
+def _close_worker_agents():
+    while _worker_agents:
+        _, agent = _worker_agents.popitem()
+        agent.close()
+
+def _dumps(obj: Any) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _process_in_worker(agent_key: str, data: bytes) -> bytes:
+    return _dumps(materialize(_worker_agents[agent_key].process_message(pickle.loads(data))))
+
+def _process_batch_in_worker(agent_key: str, data: bytes) -> bytes:
+    results = _worker_agents[agent_key].process_batch(pickle.loads(data))
+    return _dumps([materialize(result) for result in results])
+
+def _split(items: List[Any], parts: int) -> List[List[Any]]:
+    """Split items into at most ``parts`` contiguous chunks."""
+    size = max(1, -(-len(items) // max(1, parts)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+class InlineRunner:
+    """Runs a stage's agent in the calling thread."""
+
+    executor = "inline"
+
+    def __init__(self, agent: Agent):
+        self.agent = agent
+        self.run: Callable[[Dict], Dict] = agent.process_message
+
+    def run_batch(self, messages: List[Dict]) -> List[Any]:
+        return self.agent.process_batch(messages)
+
+    async def arun(self, message: Dict) -> Dict:
+        return await self.agent.aprocess_message(message)
+
+class ThreadRunner:
+    """Runs a stage's agent on the shared thread pool."""
+
+    executor = "thread"
+
+    def __init__(self, agent: Agent, executors: "StageExecutors"):
+        self.agent = agent
+        self._executors = executors
+
+    def run(self, message: Dict) -> Dict:
+        return self._executors.thread_pool().submit(self.agent.process_message, message).result()
+
+    def run_batch(self, messages: List[Dict]) -> List[Any]:
+        pool = self._executors.thread_pool()
+        chunks = _split(messages, self._executors.thread_workers)
+        futures = [pool.submit(self.agent.process_batch, chunk) for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+
+    async def arun(self, message: Dict) -> Dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executors.thread_pool(), self.agent.process_message, message)
+
+class ProcessRunner:
+    """Runs a stage on the process pool, against a per-worker agent instance.
+
+    Payloads and results cross the process boundary as pickles at the
+    highest protocol. Worker agents are separate instances built from the
+    same configuration, so agent state is per worker.
+    """
+
+    executor = "process"
+
+    def __init__(self, agent_key: str, agent: Agent, executors: "StageExecutors"):
+        self.agent_key = agent_key
+        self.agent = agent
+        self._executors = executors
+
+    def _submit(self, message: Dict) -> Future:
+        return self._executors.process_pool().submit(
+            _process_in_worker, self.agent_key, _dumps(materialize(message))
+        )
+
+    def run(self, message: Dict) -> Dict:
+        return pickle.loads(self._submit(message).result())
+
+    def run_batch(self, messages: List[Dict]) -> List[Any]:
+        pool = self._executors.process_pool()
+        chunks = _split([materialize(message) for message in messages], self._executors.process_workers)
+        futures = [pool.submit(_process_batch_in_worker, self.agent_key, _dumps(chunk)) for chunk in chunks]
+        return [result for future in futures for result in pickle.loads(future.result())]
+
+    async def arun(self, message: Dict) -> Dict:
+        return pickle.loads(await asyncio.wrap_future(self._submit(message)))
+
+class StageExecutors:
+    """Thread and process pools shared by the stages of a WorkflowManager.
+
+    Pools are created on first use and sized from the ``executors`` section
+    of ``system_config``, e.g.
+    ``{"thread": {"max_workers": 8}, "process": {"max_workers": 4}}``.
+    DAG workflows run parallel branches on a separate ``"branch"`` pool.
+    """
+
+    def __init__(
+        self,
+        agent_configs: Dict[str, Dict[str, Any]],
+        executor_config: Optional[Dict[str, Any]] = None,
+        system_config: Optional[Dict[str, Any]] = None,
+        llm_configs: Optional[Dict[str, Any]] = None
+    ):
+        self.agent_configs = agent_configs
+        self.system_config = system_config
+        self.llm_configs = llm_configs
+        executor_config = executor_config or {}
+        self._thread_config = executor_config.get("thread", {})
+        self._process_config = executor_config.get("process", {})
+        self._branch_config = executor_config.get("branch", {})
+        self.thread_workers = self._thread_config.get("max_workers") or min(32, (os.cpu_count() or 1) + 4)
+        self.process_workers = self._process_config.get("max_workers") or (os.cpu_count() or 1)
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._branch_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_agents: Set[str] = set()
+        self._pool_agents: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def runner(self, executor: str, agent_key: str, agent: Agent):
+        """Return the runner for a stage using the given executor type."""
+        if executor == "inline":
+            return InlineRunner(agent)
+        if executor == "thread":
+            return ThreadRunner(agent, self)
+        if executor == "process":
+            if agent_key not in self.agent_configs:
+                raise ValueError(f"Agent {agent_key} has no configuration to build it in a worker process")
+            self._process_agents.add(agent_key)
+            return ProcessRunner(agent_key, agent, self)
+        raise ValueError(f"Unknown executor: {executor}")
+
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            with self._lock:
+                if self._thread_pool is None:
+                    self._thread_pool = ThreadPoolExecutor(
+                        max_workers=self.thread_workers,
+                        thread_name_prefix="mas-stage"
+                    )
+        return self._thread_pool
+
+    def branch_pool(self) -> ThreadPoolExecutor:
+        """Pool running the parallel branches of DAG workflows.
+
+        Kept apart from the stage thread pool, since a branch may itself
+        wait on a thread-executor stage.
+        """
+        if self._branch_pool is None:
+            with self._lock:
+                if self._branch_pool is None:
+                    self._branch_pool = ThreadPoolExecutor(
+                        max_workers=self._branch_config.get("max_workers") or self.thread_workers,
+                        thread_name_prefix="mas-branch"
+                    )
+        return self._branch_pool
+
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None or self._pool_agents != self._process_agents:
+            with self._lock:
+                if self._process_pool is not None and self._pool_agents != self._process_agents:
+                    # Stages were recompiled with new process agents
+                    self._process_pool.shutdown(wait=False)
+                    self._process_pool = None
+                if self._process_pool is None:
+                    start_method = self._process_config.get("start_method")
+                    self._pool_agents = set(self._process_agents)
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context(start_method) if start_method else None,
+                        initializer=_init_worker,
+                        initargs=(
+                            {key: self.agent_configs[key] for key in self._pool_agents},
+                            self.system_config,
+                            self.llm_configs
+                        )
+                    )
+        return self._process_pool
+
+    def shutdown(self, wait: bool = True):
+        """Shut down any pools that were started."""
+        with self._lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=wait)
+                self._thread_pool = None
+            if self._branch_pool is not None:
+                self._branch_pool.shutdown(wait=wait)
+                self._branch_pool = None
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=wait)
+                self._process_pool = None
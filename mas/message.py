@@ -0,0 +1,173 @@
+"""Compact message envelope for agent communication."""
+
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+import copy
+import time
+import uuid
+
+# Envelope fields in their serialized order
+ENVELOPE_FIELDS = ("request_id", "timestamp", "source_agent", "message_type", "status", "payload")
+_ENVELOPE_FIELD_SET = frozenset(ENVELOPE_FIELDS)
+
+# Stand-ins of the generated form for an id or timestamp not produced yet
+_PLACEHOLDER_REQUEST_ID = "00000000-0000-4000-8000-000000000000"
+_PLACEHOLDER_TIMESTAMP = datetime(2000, 1, 1, microsecond=1).isoformat()
+
+class Message(MutableMapping):
+    """A message envelope with dict-style access.
+
+    The request id and ISO timestamp are only produced when first read: the
+    envelope records the creation time as a float and generates the uuid on
+    demand, so messages whose id or timestamp is never looked at (or is
+    supplied by the caller) never pay for them. Keys other than the envelope
+    fields are stored in a side dict created on first use.
+
+    Copies and pickles produce the id and timestamp first, so a copy
+    always carries the same ones as the original.
+    """
+
+    __slots__ = ("_request_id", "_timestamp", "_created", "source_agent", "message_type",
+                 "status", "payload", "_extra")
+
+    def __init__(
+        self,
+        payload: Any,
+        source_agent: str,
+        message_type: str = "agent_request",
+        status: str = "pending",
+        request_id: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ):
+        self._request_id = request_id
+        self._timestamp = timestamp
+        self._created = time.time()
+        self.source_agent = source_agent
+        self.message_type = message_type
+        self.status = status
+        self.payload = payload
+        self._extra: Optional[Dict[str, Any]] = None
+
+    @property
+    def request_id(self) -> str:
+        if self._request_id is None:
+            self._request_id = str(uuid.uuid4())
+        return self._request_id
+
+    @request_id.setter
+    def request_id(self, value: str):
+        self._request_id = value
+
+    @property
+    def timestamp(self) -> str:
+        if self._timestamp is None:
+            created = datetime.fromtimestamp(self._created, timezone.utc)
+            self._timestamp = created.replace(tzinfo=None).isoformat()
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: str):
+        self._timestamp = value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _ENVELOPE_FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _ENVELOPE_FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in _ENVELOPE_FIELD_SET:
+            raise TypeError(f"Envelope field cannot be deleted: {key}")
+        if self._extra is None:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in _ENVELOPE_FIELD_SET or (self._extra is not None and key in self._extra)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from ENVELOPE_FIELDS
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(ENVELOPE_FIELDS) + (len(self._extra) if self._extra is not None else 0)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _ENVELOPE_FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the envelope as a plain dict."""
+        message = {
+            "request_id": self.request_id,
+            "timestamp": self.timestamp,
+            "source_agent": self.source_agent,
+            "message_type": self.message_type,
+            "status": self.status,
+            "payload": self.payload
+        }
+        if self._extra is not None:
+            message.update(self._extra)
+        return message
+
+    def validation_dict(self) -> Dict[str, Any]:
+        """Return the envelope as a plain dict for schema validation.
+
+        Unlike ``to_dict`` this does not produce the request id or
+        timestamp: one not produced yet is given as a placeholder of the
+        same form.
+        """
+        message = {
+            "request_id": self._request_id if self._request_id is not None else _PLACEHOLDER_REQUEST_ID,
+            "timestamp": self._timestamp if self._timestamp is not None else _PLACEHOLDER_TIMESTAMP,
+            "source_agent": self.source_agent,
+            "message_type": self.message_type,
+            "status": self.status,
+            "payload": self.payload
+        }
+        if self._extra is not None:
+            message.update(self._extra)
+        return message
+
+    def __reduce__(self):
+        return (_rebuild, (self.payload, self.source_agent, self.message_type, self.status,
+                           self.request_id, self.timestamp, self._extra))
+
+    def __copy__(self) -> "Message":
+        func, args = self.__reduce__()
+        return func(*args)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Message":
+        func, args = self.__reduce__()
+        return func(*copy.deepcopy(args, memo))
+
+    def __repr__(self) -> str:
+        return f"Message({self.to_dict()!r})"
+
+def _rebuild(
+    payload: Any,
+    source_agent: str,
+    message_type: str,
+    status: str,
+    request_id: str,
+    timestamp: str,
+    extra: Optional[Dict[str, Any]]
+) -> Message:
+    message = Message(payload, source_agent, message_type, status, request_id, timestamp)
+    if extra is not None:
+        message._extra = dict(extra)
+    return message
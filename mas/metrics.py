@@ -0,0 +1,219 @@
+"""Per-stage and per-agent timing and throughput instrumentation."""
+
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import threading
+import time
+from .payload import json_default
+
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    """Histogram with power-of-two buckets.
+
+    Bucket ``b`` counts observations in ``[2**(b-1), 2**b)``, so recording is
+    a ``bit_length`` call and percentiles are accurate to a factor of two
+    (reported as the bucket's upper bound, capped at the observed max).
+    """
+
+    def __init__(self):
+        self.buckets = [0] * 65
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, value: int, count: int = 1):
+        self.buckets[min(value.bit_length(), 64)] += count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> Optional[int]:
+        """Upper bound of the bucket holding the q-th percentile (0-100)."""
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bucket, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99)
+        }
+
+class CallStats:
+    """Call, error, latency and payload size statistics for one stage or agent."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency_ns = Histogram()
+        self.payload_bytes = Histogram()
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_ns": self.latency_ns.snapshot()
+        }
+        if self.payload_bytes.count:
+            snapshot["payload_bytes"] = self.payload_bytes.snapshot()
+        return snapshot
+
+def payload_size(payload: Any) -> int:
+    """Approximate payload size as the length of its compact JSON encoding."""
+    try:
+        return len(json.dumps(payload, separators=(",", ":"), default=json_default))
+    except (TypeError, ValueError):
+        return 0
+
+class WorkflowMetrics:
+    """Collects stage executions for WorkflowManager.metrics().
+
+    Timings use ``time.perf_counter_ns``. Payload sizes are only measured
+    when ``payload_sizes`` is set, since that serializes every stage input.
+    Hooks are called synchronously with one event dict per stage execution,
+    after its duration is taken; a hook that raises is logged and does not
+    affect the stage.
+    """
+
+    def __init__(self, payload_sizes: bool = False):
+        self.payload_sizes = payload_sizes
+        self.hooks: List[Callable[[Dict[str, Any]], None]] = []
+        self._stages: Dict[tuple, CallStats] = {}
+        self._agents: Dict[str, CallStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        workflow: str,
+        stage: str,
+        agent_id: str,
+        duration_ns: int,
+        calls: int = 1,
+        errors: int = 0,
+        payload_bytes: Optional[int] = None
+    ):
+        """Record ``calls`` executions of a stage taking ``duration_ns`` in total."""
+        per_call = duration_ns // calls if calls else duration_ns
+        with self._lock:
+            stage_stats = self._stages.get((workflow, stage, agent_id))
+            if stage_stats is None:
+                stage_stats = self._stages[(workflow, stage, agent_id)] = CallStats()
+            agent_stats = self._agents.get(agent_id)
+            if agent_stats is None:
+                agent_stats = self._agents[agent_id] = CallStats()
+            for stats in (stage_stats, agent_stats):
+                stats.calls += calls
+                stats.errors += errors
+                stats.latency_ns.record(per_call, calls)
+                if payload_bytes is not None:
+                    stats.payload_bytes.record(payload_bytes // calls if calls else payload_bytes, calls)
+
+        if self.hooks:
+            event = {
+                "workflow": workflow,
+                "stage": stage,
+                "agent_id": agent_id,
+                "duration_ns": duration_ns,
+                "calls": calls,
+                "errors": errors,
+                "payload_bytes": payload_bytes
+            }
+            for hook in self.hooks:
+                try:
+                    hook(event)
+                except Exception:
+                    logger.exception("Metrics hook failed for %s.%s", workflow, stage)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-compatible copy of all statistics."""
+        with self._lock:
+            return {
+                "enabled": True,
+                "stages": {
+                    f"{workflow}.{stage}": {
+                        "workflow": workflow,
+                        "stage": stage,
+                        "agent_id": agent_id,
+                        **stats.snapshot()
+                    }
+                    for (workflow, stage, agent_id), stats in self._stages.items()
+                },
+                "agents": {agent_id: stats.snapshot() for agent_id, stats in self._agents.items()}
+            }
+
+    def reset(self):
+        """Clear all statistics (hooks are kept)."""
+        with self._lock:
+            self._stages.clear()
+            self._agents.clear()
+
+class TimedRunner:
+    """Wraps a stage runner to record every execution in WorkflowMetrics.
+
+    The clock stops before the execution is recorded, so metrics hooks are
+    not part of the measured time.
+    """
+
+    def __init__(self, runner: Any, metrics: WorkflowMetrics, workflow: str, stage: str, agent_id: str):
+        self.runner = runner
+        self.executor = runner.executor
+        self.agent = runner.agent
+        self._metrics = metrics
+        self._labels = (workflow, stage, agent_id)
+
+    def _size(self, payload: Any) -> Optional[int]:
+        return payload_size(payload) if self._metrics.payload_sizes else None
+
+    def run(self, message: Dict) -> Dict:
+        size = self._size(message)
+        start = time.perf_counter_ns()
+        try:
+            result = self.runner.run(message)
+        except Exception:
+            elapsed = time.perf_counter_ns() - start
+            self._metrics.record(*self._labels, elapsed, errors=1, payload_bytes=size)
+            raise
+        elapsed = time.perf_counter_ns() - start
+        self._metrics.record(*self._labels, elapsed, payload_bytes=size)
+        return result
+
+    def run_batch(self, messages: List[Dict]) -> List[Any]:
+        if not messages:
+            return self.runner.run_batch(messages)
+        size = sum(payload_size(message) for message in messages) if self._metrics.payload_sizes else None
+        start = time.perf_counter_ns()
+        results = self.runner.run_batch(messages)
+        elapsed = time.perf_counter_ns() - start
+        errors = sum(1 for result in results if isinstance(result, Exception))
+        self._metrics.record(*self._labels, elapsed, calls=len(messages), errors=errors, payload_bytes=size)
+        return results
+
+    async def arun(self, message: Dict) -> Dict:
+        size = self._size(message)
+        start = time.perf_counter_ns()
+        try:
+            result = await self.runner.arun(message)
+        except Exception:
+            elapsed = time.perf_counter_ns() - start
+            self._metrics.record(*self._labels, elapsed, errors=1, payload_bytes=size)
+            raise
+        elapsed = time.perf_counter_ns() - start
+        self._metrics.record(*self._labels, elapsed, payload_bytes=size)
+        return result
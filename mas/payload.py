@@ -0,0 +1,296 @@
+"""Copy-on-write views for sharing payloads between stages without copying."""
+
+from collections.abc import Iterator, MutableMapping, MutableSequence
+from typing import Any, Dict, List, Optional
+import sys
+
+class CowDict(MutableMapping):
+    """A dict view that copies itself only when written.
+
+    Reads go straight to the wrapped dict; nested dicts and lists are
+    returned as views of their own, created once and cached, so reading a
+    payload copies nothing. The first write to a view makes a shallow copy
+    of that one container, so a change deep in a payload copies only the
+    containers on its path. The wrapped data is never modified and can be
+    shared by any number of views, which must not be mutated directly
+    while they are in use.
+
+    ``thaw()`` returns plain data: the wrapped dict itself when nothing
+    changed, otherwise new containers for the changed subtrees sharing
+    everything else. Pickling and ``copy``/``deepcopy`` go through
+    ``thaw()``; a copy is a fresh view over the same data, so it costs
+    nothing until written.
+    """
+
+    __slots__ = ("_base", "_data", "_views")
+
+    def __init__(self, data: Optional[Dict[Any, Any]] = None):
+        self._base = data if data is not None else {}
+        # Same object as _base until the first write, then a private copy
+        self._data = self._base
+        # Views of nested containers read while _data is still _base
+        self._views: Dict[Any, Any] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self._data[key]
+        view_type = _VIEW_TYPES.get(type(value))
+        if view_type is None:
+            return value
+        if self._data is self._base:
+            view = self._views.get(key)
+            if view is None:
+                view = self._views[key] = view_type(value)
+            return view
+        # Owned: keep the view in place of the container it wraps
+        view = self._data[key] = view_type(value)
+        return view
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _own(self):
+        if self._data is self._base:
+            data = dict(self._base)
+            data.update(self._views)
+            self._data = data
+            self._views = {}
+
+    def __setitem__(self, key: Any, value: Any):
+        self._own()
+        self._data[key] = value
+
+    def __delitem__(self, key: Any):
+        self._own()
+        del self._data[key]
+
+    def changed(self) -> bool:
+        """Whether this view or a view read through it was written."""
+        return self._data is not self._base or any(view.changed() for view in self._views.values())
+
+    def thaw(self) -> Dict[Any, Any]:
+        """Return the current contents as plain data, copying only changed subtrees."""
+        base = self._base
+        if self._data is base:
+            result = None
+            for key, view in self._views.items():
+                if view.changed():
+                    if result is None:
+                        result = dict(base)
+                    result[key] = view.thaw()
+            return base if result is None else result
+
+        result = {}
+        for key, value in self._data.items():
+            if type(value) in PAYLOAD_VIEWS:
+                value = value.thaw()
+            elif key not in base or base[key] is not value:
+                # Assigned by the writer, which may have nested views in it
+                value = _thaw_plain(value)
+            result[key] = value
+        return result
+
+    def copy(self) -> "CowDict":
+        """An independent view of the current contents."""
+        return CowDict(self.thaw())
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "CowDict":
+        return self.copy()
+
+    def __reduce__(self):
+        return (_identity, (self.thaw(),))
+
+    def __repr__(self) -> str:
+        return f"CowDict({self.thaw()!r})"
+
+class CowList(MutableSequence):
+    """A list view that copies itself only when written.
+
+    The list counterpart of CowDict: elements that are dicts or lists are
+    read as views, and the first write (including ``append``, ``insert``
+    and ``sort``) makes a shallow copy of this list only. Slices are plain
+    lists holding the same element views.
+    """
+
+    __slots__ = ("_base", "_data", "_views")
+
+    def __init__(self, data: Optional[List[Any]] = None):
+        self._base = data if data is not None else []
+        self._data = self._base
+        self._views: Dict[int, Any] = {}
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._data)))]
+        value = self._data[index]
+        view_type = _VIEW_TYPES.get(type(value))
+        if view_type is None:
+            return value
+        if index < 0:
+            index += len(self._data)
+        if self._data is self._base:
+            view = self._views.get(index)
+            if view is None:
+                view = self._views[index] = view_type(value)
+            return view
+        view = self._data[index] = view_type(value)
+        return view
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self._data)):
+            yield self[index]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _own(self):
+        if self._data is self._base:
+            data = list(self._base)
+            for index, view in self._views.items():
+                data[index] = view
+            self._data = data
+            self._views = {}
+
+    def __setitem__(self, index: Any, value: Any):
+        self._own()
+        self._data[index] = value
+
+    def __delitem__(self, index: Any):
+        self._own()
+        del self._data[index]
+
+    def insert(self, index: int, value: Any):
+        self._own()
+        self._data.insert(index, value)
+
+    def sort(self, *, key: Any = None, reverse: bool = False):
+        self._own()
+        self._data.sort(key=key, reverse=reverse)
+
+    def changed(self) -> bool:
+        """Whether this view or a view read through it was written."""
+        return self._data is not self._base or any(view.changed() for view in self._views.values())
+
+    def thaw(self) -> List[Any]:
+        """Return the current contents as plain data, copying only changed subtrees."""
+        base = self._base
+        if self._data is base:
+            result = None
+            for index, view in self._views.items():
+                if view.changed():
+                    if result is None:
+                        result = list(base)
+                    result[index] = view.thaw()
+            return base if result is None else result
+
+        # Containers of the wrapped list that were never read need no thawing
+        unread = {id(value) for value in base if type(value) in _VIEW_TYPES}
+        result = []
+        for value in self._data:
+            if type(value) in PAYLOAD_VIEWS:
+                value = value.thaw()
+            elif id(value) not in unread:
+                value = _thaw_plain(value)
+            result.append(value)
+        return result
+
+    def copy(self) -> "CowList":
+        """An independent view of the current contents."""
+        return CowList(self.thaw())
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "CowList":
+        return self.copy()
+
+    def __reduce__(self):
+        return (_identity, (self.thaw(),))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, CowList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"CowList({self.thaw()!r})"
+
+# View class for each plain container type
+_VIEW_TYPES = {dict: CowDict, list: CowList}
+PAYLOAD_VIEWS = (CowDict, CowList)
+
+def _identity(value: Any) -> Any:
+    return value
+
+def _thaw_plain(value: Any) -> Any:
+    """Thaw views nested in plain containers, copying only the containers holding them."""
+    value_type = type(value)
+    if value_type in PAYLOAD_VIEWS:
+        return value.thaw()
+    if value_type is dict:
+        result = None
+        for key, item in value.items():
+            new_item = _thaw_plain(item)
+            if new_item is not item:
+                if result is None:
+                    result = dict(value)
+                result[key] = new_item
+        return value if result is None else result
+    if value_type is list:
+        result = None
+        for index, item in enumerate(value):
+            new_item = _thaw_plain(item)
+            if new_item is not item:
+                if result is None:
+                    result = list(value)
+                result[index] = new_item
+        return value if result is None else result
+    return value
+
+def cow(value: Any) -> Any:
+    """Wrap a dict or list in a copy-on-write view; other values are returned as is."""
+    view_type = _VIEW_TYPES.get(type(value))
+    return view_type(value) if view_type is not None else value
+
+def json_default(value: Any) -> Any:
+    """``default`` hook for ``json.dumps``.
+
+    Views become plain data, record batches lists of records, and anything
+    else a string.
+    """
+    if isinstance(value, PAYLOAD_VIEWS):
+        return value.thaw()
+    # Only loaded once a batch may exist, as it imports NumPy
+    record_batch = sys.modules.get("mas.record_batch")
+    if record_batch is not None and isinstance(value, record_batch.RecordBatch):
+        return value.to_records()
+    return str(value)
+
+def materialize(payload: Any) -> Any:
+    """Read the lazy iterators among a payload's values into lists, in place.
+
+    A streamed value (e.g. a document's ``chunks``) can be consumed only
+    once and cannot be copied or pickled, so a payload is materialized
+    before a stage that may run it twice, in another process or for
+    several dependents.
+    """
+    if isinstance(payload, MutableMapping):
+        lazy = [key for key, value in payload.items() if isinstance(value, Iterator)]
+        for key in lazy:
+            payload[key] = list(payload[key])
+    return payload
+
+def thaw(value: Any) -> Any:
+    """Return plain data for a view, or for plain containers that may hold views.
+
+    Unchanged data is returned as is, shared with the data the views wrap.
+    """
+    return _thaw_plain(value)
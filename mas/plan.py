@@ -0,0 +1,253 @@
+"""Compiled execution plans for workflow definitions."""
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Any, Callable, Mapping, Optional, Tuple
+from .agent import Agent
+from .dag import MERGE_STRATEGIES, topological_order
+from .executors import EXECUTOR_TYPES, InlineRunner
+from .retry import RetryPolicy
+from .routing import Route, compile_route
+
+@dataclass(frozen=True)
+class StagePlan:
+    """A workflow stage with its agents resolved."""
+
+    name: str
+    agent_id: str
+    agent: Agent
+    runner: Any
+    next_stage: Any = None
+    error_stage: Optional[str] = None
+    error_agent: Optional[Agent] = None
+    error_runner: Any = None
+    workers: int = 1
+    retry: Optional[RetryPolicy] = None
+    depends_on: Tuple[str, ...] = ()
+    merge: str = "update"
+    route: Optional[Route] = None
+    error_index: Optional[int] = None
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+    """An immutable, validated execution plan for one workflow.
+
+    For DAG workflows (``dag`` set) ``stages`` is in dependency order,
+    ``dependents`` maps each stage to the stages that consume its output
+    and ``sinks`` are the stages whose outputs form the result, merged with
+    ``merge`` when there are several.
+
+    Otherwise each stage's ``route`` gives the position of the stage to
+    run next, and ``error_index`` the position of its error stage when
+    failures are routed to one. ``cyclic`` is set when some transition
+    leads back to an earlier stage.
+    """
+
+    name: str
+    stages: Tuple[StagePlan, ...]
+    stage_index: Mapping[str, StagePlan]
+    dag: bool = False
+    dependents: Mapping[str, Tuple[str, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    sinks: Tuple[str, ...] = ()
+    merge: str = "keyed"
+    routed: bool = False
+    cyclic: bool = False
+    max_hops: int = 100
+
+def compile_workflow(
+    workflow_name: str,
+    definition: Dict[str, Any],
+    agents: Dict[str, Agent],
+    runner_factory: Optional[Callable[[str, str, Agent, str, str], Any]] = None
+) -> WorkflowPlan:
+    """Resolve a workflow definition into an execution plan.
+
+    The whole definition is checked up front: every stage must name a known
+    agent, stage names must be unique and every ``next_stage`` must point at
+    a stage of the same workflow. An ``error_stage`` must name either a
+    stage or an agent.
+
+    Stages run in list order unless some stage declares ``next_stage``. The
+    workflow is then routed: it starts at the first stage, follows each
+    stage's ``next_stage`` (a stage name, or a list of conditional edges,
+    see ``mas.routing.compile_route``) and ends at a stage without one;
+    a failing stage moves to its ``error_stage`` when that names a stage.
+    Stages that are not reached do not run. A run may execute at most
+    ``max_hops`` stages (default 100), which bounds loops. A stage's
+    ``executor`` must be one of "inline" (the default), "thread" or
+    "process", and its ``workers`` (parallel workers when streaming) a
+    positive integer. ``max_retries`` and ``retry_delay`` (milliseconds),
+    with optional ``retry_backoff``, ``retry_max_delay`` and
+    ``retry_jitter``, make a failing stage re-run with exponential backoff
+    before its error stage takes over.
+
+    If any stage declares ``depends_on`` (a stage name or list of names) the
+    workflow is a DAG: stages without dependencies receive the initial
+    payload, a stage with several dependencies receives their outputs
+    combined by its ``merge`` strategy ("update", "deep", "keyed" or
+    "list"), and stages nothing depends on produce the result (combined by
+    the workflow's ``merge``, default "keyed", if there are several). DAG
+    stages may not use ``next_stage`` and must not form a cycle.
+
+    Args:
+        workflow_name: Name of the workflow
+        definition: The workflow definition from the configuration
+        agents: Initialized agents keyed by agent id
+        runner_factory: Builds a stage runner from (executor, agent id,
+            agent, workflow name, stage name), and an inline runner for each
+            error agent labelled with its ``error_stage``; stages run inline
+            when omitted
+
+    Returns:
+        The compiled WorkflowPlan
+
+    Raises:
+        ValueError: If the definition is invalid
+    """
+    stage_defs = definition.get("stages", [])
+    if not stage_defs:
+        raise ValueError(f"Workflow {workflow_name} has no stages")
+
+    dag = any("depends_on" in stage for stage in stage_defs)
+
+    stage_agents = {}
+    for stage in stage_defs:
+        name = stage.get("name")
+        agent_id = stage.get("agent")
+        if not name or not agent_id:
+            raise ValueError(f"Workflow {workflow_name} has a stage without a name or agent: {stage}")
+        if name in stage_agents:
+            raise ValueError(f"Workflow {workflow_name} has duplicate stage: {name}")
+        if agent_id not in agents:
+            raise ValueError(f"Unknown agent: {agent_id} (workflow {workflow_name}, stage {name})")
+        if stage.get("executor", "inline") not in EXECUTOR_TYPES:
+            raise ValueError(f"Workflow {workflow_name} stage {name} has unknown executor: {stage['executor']}")
+        workers = stage.get("workers", 1)
+        if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+            raise ValueError(f"Workflow {workflow_name} stage {name} has invalid workers: {workers}")
+        try:
+            RetryPolicy.from_stage(stage)
+        except ValueError as e:
+            raise ValueError(f"Workflow {workflow_name} stage {name}: {e}") from None
+        stage_agents[name] = agent_id
+
+    dependencies = {stage["name"]: _dependencies(workflow_name, stage, stage_agents) for stage in stage_defs}
+    if dag:
+        try:
+            order = topological_order(dependencies)
+        except ValueError as e:
+            raise ValueError(f"Workflow {workflow_name}: {e}") from None
+        definitions = {stage["name"]: stage for stage in stage_defs}
+        stage_defs = [definitions[name] for name in order]
+    merge = definition.get("merge", "keyed")
+    if merge not in MERGE_STRATEGIES:
+        raise ValueError(f"Workflow {workflow_name} has unknown merge strategy: {merge}")
+    max_hops = definition.get("max_hops", 100)
+    if not isinstance(max_hops, int) or isinstance(max_hops, bool) or max_hops < 1:
+        raise ValueError(f"Workflow {workflow_name} has invalid max_hops: {max_hops}")
+
+    positions = {stage["name"]: i for i, stage in enumerate(stage_defs)}
+    routed = not dag and any(stage.get("next_stage") is not None for stage in stage_defs)
+    cyclic = False
+
+    stages = []
+    for position, stage in enumerate(stage_defs):
+        name = stage["name"]
+        next_stage = stage.get("next_stage")
+        if next_stage is not None and dag:
+            raise ValueError(
+                f"Workflow {workflow_name} stage {name} uses next_stage in a workflow with depends_on"
+            )
+        route = None
+        if routed:
+            try:
+                route = compile_route(next_stage, positions)
+            except ValueError as e:
+                raise ValueError(f"Workflow {workflow_name} stage {name}: {e}") from None
+        elif not dag:
+            route = Route.to(position + 1 if position + 1 < len(stage_defs) else None)
+        stage_merge = stage.get("merge", "update")
+        if stage_merge not in MERGE_STRATEGIES:
+            raise ValueError(f"Workflow {workflow_name} stage {name} has unknown merge strategy: {stage_merge}")
+
+        error_stage = stage.get("error_stage")
+        error_agent = None
+        if error_stage:
+            if error_stage in stage_agents:
+                error_agent = agents[stage_agents[error_stage]]
+            elif error_stage in agents:
+                error_agent = agents[error_stage]
+            else:
+                raise ValueError(f"Workflow {workflow_name} stage {name} has unknown error_stage: {error_stage}")
+
+        error_index = positions.get(error_stage) if routed else None
+        if route is not None:
+            targets = route.targets + ((error_index,) if error_index is not None else ())
+            cyclic = cyclic or any(target <= position for target in targets)
+
+        agent = agents[stage["agent"]]
+        executor = stage.get("executor", "inline")
+        if runner_factory is not None:
+            runner = runner_factory(executor, stage["agent"], agent, workflow_name, name)
+        else:
+            runner = InlineRunner(agent)
+
+        # Error agents run inline, labelled with the error stage
+        error_runner = None
+        if error_agent is not None:
+            if runner_factory is not None:
+                error_agent_id = stage_agents.get(error_stage, error_stage)
+                error_runner = runner_factory("inline", error_agent_id, error_agent, workflow_name, error_stage)
+            else:
+                error_runner = InlineRunner(error_agent)
+
+        stages.append(StagePlan(
+            name=name,
+            agent_id=stage["agent"],
+            agent=agent,
+            runner=runner,
+            next_stage=next_stage,
+            error_stage=error_stage,
+            error_agent=error_agent,
+            error_runner=error_runner,
+            workers=stage.get("workers", 1),
+            retry=RetryPolicy.from_stage(stage),
+            depends_on=dependencies[name],
+            merge=stage_merge,
+            route=route,
+            error_index=error_index
+        ))
+
+    dependents = {stage.name: [] for stage in stages}
+    for stage in stages:
+        for dep in stage.depends_on:
+            dependents[dep].append(stage.name)
+
+    return WorkflowPlan(
+        name=workflow_name,
+        stages=tuple(stages),
+        stage_index=MappingProxyType({stage.name: stage for stage in stages}),
+        dag=dag,
+        dependents=MappingProxyType({name: tuple(names) for name, names in dependents.items()}),
+        sinks=tuple(name for name, names in dependents.items() if not names) if dag else (),
+        merge=merge,
+        routed=routed,
+        cyclic=cyclic,
+        max_hops=max_hops
+    )
+
+def _dependencies(workflow_name: str, stage: Dict[str, Any], stage_agents: Dict[str, str]) -> Tuple[str, ...]:
+    """Validate and normalize a stage's ``depends_on`` into a tuple of stage names."""
+    name = stage["name"]
+    depends_on = stage.get("depends_on", ())
+    if isinstance(depends_on, str):
+        depends_on = (depends_on,)
+    depends_on = tuple(depends_on)
+    for dep in depends_on:
+        if dep not in stage_agents:
+            raise ValueError(f"Workflow {workflow_name} stage {name} depends on unknown stage: {dep}")
+        if dep == name:
+            raise ValueError(f"Workflow {workflow_name} stage {name} depends on itself")
+    if len(set(depends_on)) != len(depends_on):
+        raise ValueError(f"Workflow {workflow_name} stage {name} lists a dependency twice")
+    return depends_on
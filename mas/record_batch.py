@@ -0,0 +1,321 @@
+"""Columnar record batches: one NumPy array per field."""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .aggregation import factorize
+from .schema import _TYPE_CHECKS
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "<missing>"
+
+# Placeholder for a field a record does not have
+_MISSING = _Missing()
+
+_INTEGER_TYPES = (int, np.integer)
+_NUMBER_TYPES = (int, float, np.integer, np.floating)
+
+# Column kinds checked natively for each JSON schema type
+_SCHEMA_KINDS = {
+    "string": ("dictionary",),
+    "number": ("int", "float"),
+    "integer": ("int", "float"),
+    "boolean": ("bool",)
+}
+
+def _build_column(values: List[Any]) -> Tuple[np.ndarray, Optional[List[Any]], Optional[np.ndarray]]:
+    """Encode one field's values as (array, dictionary or None, presence mask or None).
+
+    Strings are dictionary-encoded as int32 codes (-1 where missing);
+    booleans, integers and floats become bool, int64 and float64 arrays,
+    with False, 0 or NaN where missing; anything else is kept in an
+    object array.
+    """
+    kinds = set(map(type, values))
+    present = None
+    if _Missing in kinds:
+        kinds.discard(_Missing)
+        present = np.fromiter((value is not _MISSING for value in values), dtype=bool, count=len(values))
+
+    if kinds == {str}:
+        index: Dict[str, int] = {}
+        codes = np.fromiter(
+            (-1 if value is _MISSING else index.setdefault(value, len(index)) for value in values),
+            dtype=np.int32,
+            count=len(values)
+        )
+        return codes, list(index), present
+
+    if kinds and kinds <= {bool, np.bool_}:
+        dtype, fill = np.bool_, False
+    elif kinds and all(issubclass(kind, _INTEGER_TYPES) and kind is not bool for kind in kinds):
+        dtype, fill = np.int64, 0
+    elif kinds and all(issubclass(kind, _NUMBER_TYPES) and kind is not bool for kind in kinds):
+        dtype, fill = np.float64, np.nan
+    else:
+        dtype, fill = object, None
+
+    if present is not None:
+        values = [fill if value is _MISSING else value for value in values]
+    if dtype is not object:
+        try:
+            return np.array(values, dtype=dtype), None, present
+        except OverflowError:
+            pass
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column, None, present
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array = array.view()
+    array.flags.writeable = False
+    return array
+
+class RecordBatch:
+    """A batch of flat records stored column by column.
+
+    Each field is one NumPy array: numbers and booleans as numeric arrays,
+    strings dictionary-encoded as int32 codes into a list of distinct
+    values, anything else as an object array. A million records of
+    ``{"name": ..., "value": ...}`` take about 12 MB instead of over
+    200, and the data agents process the columns with array
+    operations instead of visiting every record.
+
+    Build a batch with ``from_records`` and get the records back with
+    ``to_records``; records may lack fields, which round-trip as absent.
+    Batches are immutable: columns are read-only and ``with_column``
+    returns a new batch sharing the unchanged columns.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        dictionaries: Optional[Dict[str, List[Any]]] = None,
+        present: Optional[Dict[str, np.ndarray]] = None,
+        length: Optional[int] = None
+    ):
+        """Initialize the batch.
+
+        Args:
+            columns: Array per field; dictionary-encoded fields hold codes
+            dictionaries: Distinct values of each dictionary-encoded field
+            present: Per-field masks for fields some records do not have
+            length: Number of records, needed only when there are no columns
+
+        Raises:
+            ValueError: If the columns differ in length
+        """
+        self.columns = {name: _read_only(np.asarray(column)) for name, column in columns.items()}
+        self.dictionaries = dict(dictionaries or {})
+        self.present = {name: _read_only(mask) for name, mask in (present or {}).items()}
+        lengths = {len(column) for column in self.columns.values()}
+        if length is not None:
+            lengths.add(length)
+        if len(lengths) > 1:
+            raise ValueError(f"Columns of a RecordBatch must have the same length, got {sorted(lengths)}")
+        self.length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping], fields: Optional[Sequence[str]] = None) -> "RecordBatch":
+        """Build a batch from a list of dicts.
+
+        Args:
+            records: Flat records
+            fields: Fields to keep, in order; defaults to every field, in
+                order of first appearance
+
+        Returns:
+            The batch
+        """
+        records = list(records)
+        if fields is None:
+            fields = list(dict.fromkeys(field for record in records for field in record))
+        columns = {}
+        dictionaries = {}
+        present = {}
+        for field in fields:
+            column, dictionary, mask = _build_column([record.get(field, _MISSING) for record in records])
+            columns[field] = column
+            if dictionary is not None:
+                dictionaries[field] = dictionary
+            if mask is not None:
+                present[field] = mask
+        return cls(columns, dictionaries, present, length=len(records))
+
+    def _values(self, field: str) -> List[Any]:
+        """One field's values as Python objects."""
+        column = self.columns[field]
+        if field in self.dictionaries:
+            dictionary = self.dictionaries[field]
+            return [dictionary[code] if code >= 0 else None for code in column.tolist()]
+        return column.tolist()
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert back to a list of dicts."""
+        fields = self.fields
+        if not fields:
+            return [{} for _ in range(self.length)]
+        values = [self._values(field) for field in fields]
+        if not self.present:
+            return [dict(zip(fields, row)) for row in zip(*values)]
+
+        masks = [self.present[field].tolist() if field in self.present else None for field in fields]
+        records = []
+        for index, row in enumerate(zip(*values)):
+            records.append({
+                field: value
+                for field, value, mask in zip(fields, row, masks)
+                if mask is None or mask[index]
+            })
+        return records
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __contains__(self, field: object) -> bool:
+        return field in self.columns
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays and presence masks."""
+        return (
+            sum(column.nbytes for column in self.columns.values())
+            + sum(mask.nbytes for mask in self.present.values())
+        )
+
+    def column(self, field: str) -> np.ndarray:
+        """One field as an array, decoding dictionary-encoded strings.
+
+        Raises:
+            KeyError: If no record has the field
+        """
+        column = self.columns[field]
+        if field not in self.dictionaries:
+            return column
+        decoded = np.empty(len(self.dictionaries[field]) + 1, dtype=object)
+        decoded[:-1] = self.dictionaries[field]
+        # Code -1 (missing) picks the trailing None
+        return decoded[column]
+
+    def missing(self, field: str) -> bool:
+        """Whether some records do not have the field."""
+        return field not in self.columns or field in self.present
+
+    def encoded(self, field: str) -> Tuple[List[Any], np.ndarray]:
+        """Distinct values of a field in order of first appearance, and a code per record.
+
+        The same encoding as ``mas.aggregation.factorize``, computed from
+        the column: dictionary codes are only renumbered, never decoded.
+        """
+        column = self.columns[field]
+        if column.dtype == object:
+            return factorize(column.tolist(), count=self.length)
+        uniques, first, inverse = np.unique(column, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[order] = np.arange(len(order))
+        uniques = uniques[order].tolist()
+        if field in self.dictionaries:
+            dictionary = self.dictionaries[field]
+            uniques = [dictionary[code] if code >= 0 else None for code in uniques]
+        return uniques, rank[inverse.reshape(-1)]
+
+    def with_column(self, field: str, values: Any) -> "RecordBatch":
+        """A new batch with a field added or replaced by an array of values."""
+        columns = dict(self.columns)
+        dictionaries = dict(self.dictionaries)
+        present = dict(self.present)
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            columns[field] = values
+            dictionaries.pop(field, None)
+        else:
+            columns[field], dictionary, _ = _build_column(list(values))
+            if dictionary is None:
+                dictionaries.pop(field, None)
+            else:
+                dictionaries[field] = dictionary
+        present.pop(field, None)
+        return RecordBatch(columns, dictionaries, present, length=self.length)
+
+    def validate(self, schema: Dict[str, Any]) -> bool:
+        """Check the batch against a JSON schema for its list of records.
+
+        Array schemas whose ``items`` are flat object schemas (``type``,
+        ``properties`` and ``required``, with one ``type`` and optionally a
+        string ``enum`` per property) are checked column by column. Any
+        other schema is not checked and False is returned, so the caller
+        can validate ``to_records()`` instead.
+
+        Returns:
+            True if the schema was checked
+
+        Raises:
+            ValueError: If a record does not match the schema
+        """
+        if set(schema) - {"type", "items"} or schema.get("type", "array") != "array":
+            return False
+        items = schema.get("items", {})
+        if set(items) - {"type", "properties", "required"} or items.get("type", "object") != "object":
+            return False
+        checks = []
+        for field, subschema in items.get("properties", {}).items():
+            if set(subschema) - {"type", "enum", "format"}:
+                return False
+            if "type" in subschema and (not isinstance(subschema["type"], str)
+                                        or subschema["type"] not in _TYPE_CHECKS):
+                return False
+            if "enum" in subschema and not all(isinstance(option, str) for option in subschema["enum"]):
+                return False
+            checks.append((field, subschema))
+
+        for field in items.get("required", ()):
+            if self.length and self.missing(field):
+                raise ValueError(f"{field!r} is a required property")
+        for field, subschema in checks:
+            if field in self.columns and self.length:
+                self._check_column(field, subschema)
+        return True
+
+    def _check_column(self, field: str, subschema: Dict[str, Any]):
+        column = self.columns[field]
+        mask = self.present.get(field)
+        type_name = subschema.get("type")
+        if field in self.dictionaries:
+            kind = "dictionary"
+        else:
+            kind = {"b": "bool", "i": "int", "u": "int", "f": "float"}.get(column.dtype.kind, "object")
+
+        if type_name is not None:
+            if kind == "object":
+                check = _TYPE_CHECKS[type_name]
+                values = column.tolist()
+                for index, value in enumerate(values):
+                    if (mask is None or mask[index]) and not check(value):
+                        raise ValueError(f"{value!r} is not of type {type_name!r}")
+            elif kind not in _SCHEMA_KINDS.get(type_name, ()):
+                first = int(np.argmax(mask)) if mask is not None else 0
+                raise ValueError(f"{self._values(field)[first]!r} is not of type {type_name!r}")
+            elif type_name == "integer" and kind == "float":
+                bad = column != np.floor(column)
+                if mask is not None:
+                    bad &= mask
+                if bad.any():
+                    raise ValueError(f"{column[int(np.argmax(bad))].item()!r} is not of type 'integer'")
+
+        if "enum" in subschema:
+            allowed = set(subschema["enum"])
+            if kind != "dictionary":
+                first = int(np.argmax(mask)) if mask is not None else 0
+                raise ValueError(f"{self._values(field)[first]!r} is not one of {sorted(allowed)!r}")
+            used = np.bincount(column[column >= 0], minlength=len(self.dictionaries[field]))
+            for value, count in zip(self.dictionaries[field], used.tolist()):
+                if count and value not in allowed:
+                    raise ValueError(f"{value!r} is not one of {sorted(allowed)!r}")
+
+    def __repr__(self) -> str:
+        return f"RecordBatch({self.length} records, fields={self.fields})"
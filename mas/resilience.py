@@ -0,0 +1,264 @@
+"""Circuit breakers and admission control for workflow execution."""
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an agent whose circuit breaker is open."""
+
+    # Retrying while the breaker is open only adds load
+    retryable = False
+
+class OverloadedError(RuntimeError):
+    """Raised when a workflow run is shed by admission control."""
+
+    retryable = False
+
+class CircuitBreaker:
+    """Per-agent circuit breaker over a sliding window of recent calls.
+
+    While closed, calls go through and their outcomes are kept in a window
+    of the last ``window_size`` calls. Once ``minimum_calls`` are recorded,
+    the breaker opens if the share of failures reaches
+    ``failure_rate_threshold`` or the share of calls slower than
+    ``slow_call_duration`` (ms) reaches ``slow_call_rate_threshold``. While
+    open, calls are rejected without reaching the agent. After
+    ``open_duration`` ms the breaker lets ``half_open_calls`` trial calls
+    through: if all succeed in time it closes, otherwise it opens again.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_duration: Optional[float] = None,
+        slow_call_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30000,
+        half_open_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if window_size < 1 or minimum_calls < 1 or half_open_calls < 1:
+            raise ValueError("window_size, minimum_calls and half_open_calls must be positive")
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_ns = int(slow_call_duration * 1e6) if slow_call_duration is not None else None
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = min(minimum_calls, window_size)
+        self.open_duration = open_duration / 1000
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._failures = 0
+        self._slow = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["CircuitBreaker"]:
+        """Build a breaker from an agent's ``circuit_breaker`` entry, or None if disabled."""
+        if not config or not config.get("enabled", True):
+            return None
+        settings = {key: value for key, value in config.items() if key != "enabled"}
+        return cls(**settings)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._check_open_timeout()
+            return self._state
+
+    def _check_open_timeout(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_duration:
+            self._state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._window.clear()
+        self._failures = 0
+        self._slow = 0
+        self.opened += 1
+
+    def allow(self) -> bool:
+        """Whether a call may go through; counts a rejection if not."""
+        with self._lock:
+            self._check_open_timeout()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def cancel(self):
+        """Give back a permit for a call that was abandoned without an outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > self._trial_successes:
+                self._trials -= 1
+
+    def record(self, duration_ns: int, failures: int = 0, calls: int = 1):
+        """Record the outcome of ``calls`` calls taking ``duration_ns`` each."""
+        slow = self.slow_call_ns is not None and duration_ns >= self.slow_call_ns
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failures or slow:
+                    self._open()
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self._state = CLOSED
+                return
+            if self._state != CLOSED:
+                return
+
+            # A batch larger than the window keeps its failure share
+            count = min(calls, self._window.maxlen)
+            failures = failures if count == calls else round(failures * count / calls)
+            for i in range(count):
+                failed = i < failures
+                if len(self._window) == self._window.maxlen:
+                    old_failed, old_slow = self._window[0]
+                    self._failures -= old_failed
+                    self._slow -= old_slow
+                self._window.append((failed, slow))
+                self._failures += failed
+                self._slow += slow
+
+            count = len(self._window)
+            if count >= self.minimum_calls and (
+                self._failures / count >= self.failure_rate_threshold
+                or (self.slow_call_ns is not None and self._slow / count >= self.slow_call_rate_threshold)
+            ):
+                self._open()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._check_open_timeout()
+            count = len(self._window)
+            return {
+                "state": self._state,
+                "calls": count,
+                "failure_rate": self._failures / count if count else 0.0,
+                "slow_call_rate": self._slow / count if count else 0.0,
+                "rejected": self.rejected,
+                "opened": self.opened
+            }
+
+class GuardedRunner:
+    """Wraps a stage runner so calls go through the agent's circuit breaker."""
+
+    def __init__(self, runner: Any, breaker: CircuitBreaker, agent_id: str):
+        self.runner = runner
+        self.executor = runner.executor
+        self.agent = runner.agent
+        self.breaker = breaker
+        self.agent_id = agent_id
+
+    def _reject(self) -> CircuitOpenError:
+        return CircuitOpenError(f"Circuit breaker open for agent {self.agent_id}")
+
+    def run(self, message: Dict) -> Dict:
+        if not self.breaker.allow():
+            raise self._reject()
+        start = time.perf_counter_ns()
+        try:
+            result = self.runner.run(message)
+        except Exception:
+            self.breaker.record(time.perf_counter_ns() - start, failures=1)
+            raise
+        except BaseException:
+            self.breaker.cancel()
+            raise
+        self.breaker.record(time.perf_counter_ns() - start)
+        return result
+
+    def run_batch(self, messages: List[Dict]) -> List[Any]:
+        if not messages:
+            return self.runner.run_batch(messages)
+        if not self.breaker.allow():
+            return [self._reject() for _ in messages]
+        start = time.perf_counter_ns()
+        try:
+            results = self.runner.run_batch(messages)
+        except BaseException:
+            self.breaker.cancel()
+            raise
+        failures = sum(1 for result in results if isinstance(result, Exception))
+        self.breaker.record((time.perf_counter_ns() - start) // len(messages), failures, len(messages))
+        return results
+
+    async def arun(self, message: Dict) -> Dict:
+        if not self.breaker.allow():
+            raise self._reject()
+        start = time.perf_counter_ns()
+        try:
+            result = await self.runner.arun(message)
+        except Exception:
+            self.breaker.record(time.perf_counter_ns() - start, failures=1)
+            raise
+        except BaseException:
+            self.breaker.cancel()
+            raise
+        self.breaker.record(time.perf_counter_ns() - start)
+        return result
+
+class AdmissionController:
+    """Caps the number of workflow runs in flight, shedding the excess.
+
+    Admission never waits: a run that would exceed ``max_in_flight`` is
+    rejected with OverloadedError straight away, so queues (and latency)
+    stay bounded when the system is saturated.
+    """
+
+    def __init__(self, max_in_flight: int):
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, count: int = 1) -> int:
+        """Admit up to ``count`` runs; returns how many were admitted."""
+        with self._lock:
+            admitted = min(count, self.max_in_flight - self.in_flight)
+            self.in_flight += admitted
+            self.shed += count - admitted
+            return admitted
+
+    def release(self, count: int = 1):
+        with self._lock:
+            self.in_flight -= count
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one slot for the duration of a run.
+
+        Raises:
+            OverloadedError: If no slot is free
+        """
+        if not self.acquire():
+            raise OverloadedError(f"Too many workflows in flight (limit {self.max_in_flight})")
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"max_in_flight": self.max_in_flight, "in_flight": self.in_flight, "shed": self.shed}
@@ -0,0 +1,165 @@
+"""Retry policies and a non-blocking delay queue for failed stage executions."""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how long to wait before re-running a failed stage.
+
+    The n-th retry waits ``retry_delay * retry_backoff ** (n - 1)``
+    milliseconds, capped at ``retry_max_delay``, and shortened by a random
+    fraction of up to ``retry_jitter`` so that items failing together do
+    not retry in lockstep.
+    """
+
+    max_retries: int = 0
+    retry_delay: float = 1000
+    retry_backoff: float = 2.0
+    retry_max_delay: Optional[float] = None
+    retry_jitter: float = 0.5
+
+    @classmethod
+    def from_stage(cls, stage: Dict[str, Any]) -> Optional["RetryPolicy"]:
+        """Build the policy for a stage definition, or None if it does not retry.
+
+        Raises:
+            ValueError: If a retry setting is out of range
+        """
+        max_retries = stage.get("max_retries", 0)
+        if not isinstance(max_retries, int) or isinstance(max_retries, bool) or max_retries < 0:
+            raise ValueError(f"max_retries must be a non-negative integer, got {max_retries}")
+        if max_retries == 0:
+            return None
+
+        policy = cls(
+            max_retries=max_retries,
+            retry_delay=stage.get("retry_delay", cls.retry_delay),
+            retry_backoff=stage.get("retry_backoff", cls.retry_backoff),
+            retry_max_delay=stage.get("retry_max_delay"),
+            retry_jitter=stage.get("retry_jitter", cls.retry_jitter)
+        )
+        if policy.retry_delay < 0:
+            raise ValueError(f"retry_delay must be non-negative, got {policy.retry_delay}")
+        if policy.retry_backoff < 1:
+            raise ValueError(f"retry_backoff must be at least 1, got {policy.retry_backoff}")
+        if not 0 <= policy.retry_jitter <= 1:
+            raise ValueError(f"retry_jitter must be between 0 and 1, got {policy.retry_jitter}")
+        return policy
+
+    def should_retry(self, attempt: int, error: BaseException) -> bool:
+        """Whether to retry after ``attempt`` retries have failed with ``error``.
+
+        Errors with a false ``retryable`` attribute (such as an open
+        circuit breaker) are never retried.
+        """
+        return attempt < self.max_retries and getattr(error, "retryable", True)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number ``attempt`` (starting at 1)."""
+        delay = self.retry_delay * self.retry_backoff ** (attempt - 1)
+        if self.retry_max_delay is not None:
+            delay = min(delay, self.retry_max_delay)
+        if self.retry_jitter:
+            delay *= 1 - self.retry_jitter * random.random()
+        return delay / 1000
+
+class DelayQueue:
+    """Items ordered by the time they become due.
+
+    Not thread-safe; used by a single caller that takes the due items
+    between other work and waits (``wait_time``) only when it has nothing
+    else to do.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, delay: float, item: Any):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), item))
+
+    def wait_time(self) -> Optional[float]:
+        """Seconds until the next item is due (0 if one is), or None if empty."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def pop_due(self) -> List[Any]:
+        """Remove and return the items that are due, without waiting."""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+class RetryScheduler:
+    """Runs callbacks after a delay on a single timer thread.
+
+    Workers hand a failed item to schedule() and move on; when the delay
+    expires the callback re-queues it. Callbacks run on the timer thread
+    and should only enqueue work. The thread starts on first use.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Callable[[], None]]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def schedule(self, delay: float, callback: Callable[[], None]):
+        """Run ``callback`` after ``delay`` seconds."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("RetryScheduler is shut down")
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="mas-retry", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def pending(self) -> int:
+        """Number of callbacks waiting to run."""
+        with self._condition:
+            return len(self._heap)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+                _, _, callback = heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception:
+                logger.exception("Retry callback failed")
+
+    def shutdown(self):
+        """Stop the timer thread, dropping callbacks that have not run."""
+        with self._condition:
+            self._closed = True
+            self._heap.clear()
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
@@ -0,0 +1,153 @@
+"""Stage transitions: unconditional and payload-conditional next-stage routing."""
+
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import operator
+
+# Marks a field path that does not resolve in the payload
+_MISSING = object()
+
+def _contains(value: Any, options: Any) -> bool:
+    return value in options
+
+def _not_contains(value: Any, options: Any) -> bool:
+    return value not in options
+
+# Comparison operators usable in a condition, applied as op(field value, operand)
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "equals": operator.eq,
+    "not_equals": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": _contains,
+    "not_in": _not_contains
+}
+
+def field_getter(path: str) -> Callable[[Any], Any]:
+    """Return a function reading a dotted field path from a payload.
+
+    Path segments index into mappings, and into sequences when they are
+    integers. A path that does not resolve yields a sentinel that fails
+    every comparison.
+    """
+    keys = [(part, int(part) if part.lstrip("-").isdigit() else None) for part in path.split(".")]
+
+    def get(payload: Any) -> Any:
+        value = payload
+        for key, position in keys:
+            if isinstance(value, Mapping):
+                value = value.get(key, _MISSING)
+                if value is _MISSING:
+                    return _MISSING
+            elif position is not None and isinstance(value, Sequence) and not isinstance(value, str):
+                try:
+                    value = value[position]
+                except IndexError:
+                    return _MISSING
+            else:
+                return _MISSING
+        return value
+
+    return get
+
+def compile_condition(when: Any) -> Callable[[Any], bool]:
+    """Compile a condition into a predicate over payloads.
+
+    A condition is ``{"field": "a.b", <operator>: operand, ...}`` with any
+    of the OPERATORS plus ``"exists": bool``; all operators given must
+    hold. A list of conditions holds when every condition does.
+
+    Raises:
+        ValueError: If the condition is malformed
+    """
+    if isinstance(when, list):
+        predicates = [compile_condition(condition) for condition in when]
+        return lambda payload: all(predicate(payload) for predicate in predicates)
+    if not isinstance(when, Mapping) or "field" not in when:
+        raise ValueError(f"Condition must be an object with a field: {when}")
+
+    get = field_getter(when["field"])
+    checks: List[Tuple[Callable[[Any, Any], bool], Any]] = []
+    exists: Optional[bool] = None
+    for key, operand in when.items():
+        if key == "field":
+            continue
+        if key == "exists":
+            exists = bool(operand)
+        elif key in OPERATORS:
+            checks.append((OPERATORS[key], operand))
+        else:
+            raise ValueError(f"Unknown condition operator: {key}")
+
+    def predicate(payload: Any) -> bool:
+        value = get(payload)
+        if value is _MISSING:
+            return exists is False
+        if exists is False:
+            return False
+        for compare, operand in checks:
+            try:
+                if not compare(value, operand):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    return predicate
+
+class Route:
+    """Transitions out of one stage, resolved to stage positions at compile time.
+
+    Edges are tried in order; the first whose predicate holds (or that has
+    none) gives the next stage. No matching edge ends the workflow.
+    """
+
+    __slots__ = ("edges",)
+
+    def __init__(self, edges: Tuple[Tuple[Optional[Callable[[Any], bool]], int], ...] = ()):
+        self.edges = edges
+
+    @classmethod
+    def to(cls, target: Optional[int]) -> "Route":
+        """Unconditional route to ``target``, or a terminal route for None."""
+        return cls(((None, target),) if target is not None else ())
+
+    def next(self, payload: Any) -> Optional[int]:
+        """Position of the next stage for a stage output, or None to finish."""
+        for predicate, target in self.edges:
+            if predicate is None or predicate(payload):
+                return target
+        return None
+
+    @property
+    def targets(self) -> Tuple[int, ...]:
+        return tuple(target for _, target in self.edges)
+
+def compile_route(next_stage: Any, positions: Dict[str, int]) -> Route:
+    """Compile a stage's ``next_stage`` into a Route.
+
+    ``next_stage`` is a stage name, None (the workflow ends here) or a list
+    of edges ``{"stage": name, "when": condition}``; an edge without
+    ``when`` always matches, so it serves as the default when listed last.
+
+    Raises:
+        ValueError: If an edge is malformed or names an unknown stage
+    """
+    if next_stage is None:
+        return Route()
+    if isinstance(next_stage, str):
+        next_stage = [{"stage": next_stage}]
+    if not isinstance(next_stage, list):
+        raise ValueError(f"next_stage must be a stage name or a list of edges, got {next_stage!r}")
+
+    edges = []
+    for edge in next_stage:
+        if not isinstance(edge, Mapping) or "stage" not in edge:
+            raise ValueError(f"A next_stage edge must name a stage: {edge}")
+        if edge["stage"] not in positions:
+            raise ValueError(f"Unknown next_stage: {edge['stage']}")
+        predicate = compile_condition(edge["when"]) if "when" in edge else None
+        edges.append((predicate, positions[edge["stage"]]))
+    return Route(tuple(edges))
@@ -0,0 +1,166 @@
+"""Compiled JSON schema validators shared across agents.
+
+jsonschema is imported when the first validator is built, so agents
+without schemas do not pay for importing it.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+
+# Most validators kept; the least recently used is dropped beyond this
+MAX_CACHED_VALIDATORS = 256
+
+# Compiled validators keyed by schema identity, in LRU order. The schema
+# object is kept alongside its validator so the id cannot be reused by
+# another object while the entry exists.
+_validators: "OrderedDict[int, Tuple[Dict, Any]]" = OrderedDict()
+_validators_lock = threading.Lock()
+
+def get_validator(schema: Dict) -> Any:
+    """Return a compiled validator for a schema.
+
+    The schema is checked and the validator built once per schema object;
+    later calls with the same object reuse it. Schemas are treated as
+    immutable once they have been used for validation. Validators for the
+    ``MAX_CACHED_VALIDATORS`` most recently used schemas are kept, so
+    schemas built per call do not accumulate.
+
+    Args:
+        schema: The JSON schema
+
+    Returns:
+        A jsonschema validator instance
+    """
+    with _validators_lock:
+        entry = _validators.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            _validators.move_to_end(id(schema))
+            return entry[1]
+
+    import jsonschema
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema)
+
+    with _validators_lock:
+        _validators[id(schema)] = (schema, validator)
+        _validators.move_to_end(id(schema))
+        while len(_validators) > MAX_CACHED_VALIDATORS:
+            _validators.popitem(last=False)
+    return validator
+
+def validate(instance: Any, schema: Dict):
+    """Validate an instance with a cached validator.
+
+    Behaves like ``jsonschema.validate``: the best matching error is raised.
+
+    Raises:
+        jsonschema.exceptions.ValidationError: If the instance is invalid
+    """
+    validator = get_validator(schema)
+    from jsonschema.exceptions import best_match
+    error = best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
+
+def _validation_error(message: str) -> Exception:
+    from jsonschema.exceptions import ValidationError
+    return ValidationError(message)
+
+# Type checks equivalent to jsonschema's default type checker
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "integer": lambda value: (
+        (isinstance(value, int) and not isinstance(value, bool))
+        or (isinstance(value, float) and value.is_integer())
+    ),
+}
+
+_FAST_OBJECT_KEYWORDS = {"type", "properties", "required"}
+_FAST_PROPERTY_KEYWORDS = {"type", "enum", "format"}
+
+def compile_fast_validator(schema: Dict) -> Optional[Callable[[Any], None]]:
+    """Compile a flat object schema into a plain Python check.
+
+    Only schemas of the shape used by the message envelopes are supported:
+    an object with ``required`` keys and ``properties`` that use a single
+    ``type``, a string ``enum`` or ``format``. ``format`` is not asserted,
+    as with jsonschema's default validators. Returns None for any other
+    schema so callers can fall back to full validation.
+
+    Args:
+        schema: The JSON schema
+
+    Returns:
+        A callable raising ValidationError for invalid instances, or None
+    """
+    if set(schema) - _FAST_OBJECT_KEYWORDS or schema.get("type", "object") != "object":
+        return None
+
+    required = tuple(schema.get("required", ()))
+    checks = []
+    for name, subschema in schema.get("properties", {}).items():
+        if not isinstance(subschema, dict) or set(subschema) - _FAST_PROPERTY_KEYWORDS:
+            return None
+        type_check = None
+        if "type" in subschema:
+            type_check = _TYPE_CHECKS.get(subschema["type"]) if isinstance(subschema["type"], str) else None
+            if type_check is None:
+                return None
+        enum = None
+        if "enum" in subschema:
+            if not all(isinstance(option, str) for option in subschema["enum"]):
+                return None
+            enum = frozenset(subschema["enum"])
+        checks.append((name, subschema.get("type"), type_check, enum))
+
+    def check(instance: Any):
+        if not isinstance(instance, dict):
+            raise _validation_error(f"{instance!r} is not of type 'object'")
+        for name in required:
+            if name not in instance:
+                raise _validation_error(f"{name!r} is a required property")
+        for name, type_name, type_check, enum in checks:
+            if name not in instance:
+                continue
+            value = instance[name]
+            if type_check is not None and not type_check(value):
+                raise _validation_error(f"{value!r} is not of type {type_name!r}")
+            if enum is not None and (not isinstance(value, str) or value not in enum):
+                raise _validation_error(f"{value!r} is not one of {sorted(enum)!r}")
+
+    return check
+
+def compile_validator(schema: Dict, mode: str = "full") -> Callable[[Any], None]:
+    """Return a callable that validates instances against a schema.
+
+    Args:
+        schema: The JSON schema
+        mode: "full" for cached jsonschema validation, or "fast" to use a
+            compiled plain Python check when the schema allows it
+
+    Returns:
+        A callable raising ValidationError for invalid instances
+    """
+    if mode == "fast":
+        fast_check = compile_fast_validator(schema)
+        if fast_check is not None:
+            return fast_check
+    elif mode != "full":
+        raise ValueError(f"Unknown validation mode: {mode}")
+
+    validator = get_validator(schema)
+    from jsonschema.exceptions import best_match
+
+    def check(instance: Any):
+        error = best_match(validator.iter_errors(instance))
+        if error is not None:
+            raise error
+
+    return check
@@ -0,0 +1,262 @@
+"""File sinks writing records as JSON Lines, CSV or length-prefixed binary."""
+
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+import atexit
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import pickle
+import struct
+import threading
+import weakref
+from .payload import PAYLOAD_VIEWS, json_default
+
+# Compressed file openers by name; None writes an uncompressed file
+COMPRESSION: Dict[Optional[str], Optional[Callable[..., BinaryIO]]] = {
+    None: None,
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "lzma": lzma.open
+}
+
+# Frame header of the binary format: record length as unsigned 32-bit big-endian
+_LENGTH = struct.Struct(">I")
+
+# Sinks not closed yet, flushed when the interpreter exits
+_open_sinks: "weakref.WeakSet[Sink]" = weakref.WeakSet()
+
+def _close_open_sinks():
+    for sink in list(_open_sinks):
+        sink.close()
+
+atexit.register(_close_open_sinks)
+
+def _open(path: str, mode: str, compression: Optional[str], buffer_size: int) -> BinaryIO:
+    if compression not in COMPRESSION:
+        raise ValueError(f"Unknown compression: {compression}")
+    opener = COMPRESSION[compression]
+    if opener is None:
+        return open(path, mode, buffering=buffer_size)
+    return opener(path, mode)
+
+class Sink:
+    """Buffers encoded records and writes them to a file in bulk.
+
+    Records are encoded as they arrive and written with a single
+    ``write`` call once ``batch_size`` are pending (and on flush/close).
+    The file is opened on the first flush, so a sink that never receives
+    a record creates no file. ``path`` may contain ``{pid}``, which gives
+    each process its own file when an agent runs on a process executor.
+    Pending records are also flushed when the sink is garbage collected
+    or the interpreter exits without it being closed. Sinks are
+    thread-safe.
+    """
+
+    format = ""
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 1000,
+        compression: Optional[str] = None,
+        append: bool = False,
+        buffer_size: int = 1 << 20
+    ):
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        if compression not in COMPRESSION:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.path = path
+        self.batch_size = batch_size
+        self.compression = compression
+        self.append = append
+        self.buffer_size = buffer_size
+        self.records_written = 0
+        self._pending: List[Any] = []
+        self._file: Optional[BinaryIO] = None
+        # Whether the open file was empty or did not exist
+        self.new_file = True
+        self._closed = False
+        self._lock = threading.Lock()
+        _open_sinks.add(self)
+
+    def encode(self, record: Dict[str, Any]) -> Any:
+        """Encode one record into the pending batch representation."""
+        raise NotImplementedError
+
+    def _encode_batch(self, pending: List[Any]) -> bytes:
+        """Join pending records into the bytes written by one flush."""
+        return b"".join(pending)
+
+    def write(self, record: Dict[str, Any]):
+        """Add a record, flushing if the batch is full."""
+        encoded = self.encode(record)
+        with self._lock:
+            self._pending.append(encoded)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add records from an iterable, flushing every ``batch_size``.
+
+        The iterable is consumed lazily, so at most one batch of encoded
+        records is held in memory. Returns the number of records added.
+        """
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def flush(self):
+        """Write any pending records."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        if self._closed:
+            raise ValueError(f"Sink {self.path} is closed")
+        if self._file is None:
+            path = self.path.replace("{pid}", str(os.getpid()))
+            self.new_file = not (self.append and os.path.exists(path) and os.path.getsize(path) > 0)
+            self._file = _open(path, "ab" if self.append else "wb", self.compression, self.buffer_size)
+        self._file.write(self._encode_batch(self._pending))
+        self.records_written += len(self._pending)
+        self._pending = []
+
+    def close(self):
+        """Flush pending records and close the file."""
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._flush()
+            finally:
+                self._closed = True
+                _open_sinks.discard(self)
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class JsonLinesSink(Sink):
+    """One compact JSON object per line."""
+
+    format = "jsonl"
+
+    def encode(self, record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, separators=(",", ":"), default=json_default).encode() + b"\n"
+
+class CsvSink(Sink):
+    """CSV with a header row.
+
+    Columns are ``fields`` or the keys of the first record; missing values
+    are empty, keys outside the columns are dropped, and nested values are
+    written as JSON.
+    """
+
+    format = "csv"
+
+    def __init__(self, path: str, fields: Optional[Sequence[str]] = None, **options):
+        super().__init__(path, **options)
+        self.fields = list(fields) if fields else None
+        self._header = True
+
+    def encode(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if self.fields is None:
+            with self._lock:
+                if self.fields is None:
+                    self.fields = list(record)
+        return {
+            field: json.dumps(record[field], default=json_default) if isinstance(record.get(field), (dict, list, *PAYLOAD_VIEWS)) else record.get(field, "")
+            for field in self.fields
+        }
+
+    def _encode_batch(self, pending: List[Any]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fields, lineterminator="\n")
+        if self._header:
+            # Appending to an existing file continues its rows
+            if self.new_file:
+                writer.writeheader()
+            self._header = False
+        writer.writerows(pending)
+        return buffer.getvalue().encode()
+
+class BinarySink(Sink):
+    """Length-prefixed pickles: a 4-byte big-endian length, then the record.
+
+    Compact and fast to decode, but like any pickle only for trusted
+    files; read back with ``read_records``.
+    """
+
+    format = "binary"
+
+    def encode(self, record: Dict[str, Any]) -> bytes:
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        return _LENGTH.pack(len(data)) + data
+
+SINK_TYPES: Dict[str, type] = {
+    "jsonl": JsonLinesSink,
+    "csv": CsvSink,
+    "binary": BinarySink
+}
+
+def create_sink(config: Dict[str, Any]) -> Sink:
+    """Build a sink from a ``"sink"`` configuration section.
+
+    Args:
+        config: ``{"format": "jsonl" | "csv" | "binary", "path": ...}`` plus
+            optional ``batch_size``, ``compression`` ("gzip", "bz2", "lzma"),
+            ``append``, ``buffer_size`` and, for CSV, ``fields``
+
+    Returns:
+        The sink, not yet opened
+
+    Raises:
+        ValueError: If the format or an option is invalid
+    """
+    options = dict(config)
+    sink_format = options.pop("format", "jsonl")
+    if sink_format not in SINK_TYPES:
+        raise ValueError(f"Unknown sink format: {sink_format}")
+    if "path" not in options:
+        raise ValueError("A sink needs a path")
+    try:
+        return SINK_TYPES[sink_format](**options)
+    except TypeError as e:
+        raise ValueError(f"Invalid {sink_format} sink option: {e}") from None
+
+def read_records(path: str, format: str = "jsonl", compression: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Lazily read back the records of a sink file.
+
+    CSV values are returned as strings.
+    """
+    with _open(path, "rb", compression, 1 << 20) as f:
+        if format == "jsonl":
+            for line in f:
+                yield json.loads(line)
+        elif format == "csv":
+            yield from csv.DictReader(io.TextIOWrapper(f, encoding="utf-8", newline=""))
+        elif format == "binary":
+            while header := f.read(_LENGTH.size):
+                yield pickle.loads(f.read(_LENGTH.unpack(header)[0]))
+        else:
+            raise ValueError(f"Unknown sink format: {format}")
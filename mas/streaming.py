@@ -0,0 +1,241 @@
+"""Pipelined, stage-parallel streaming execution of workflow plans."""
+
+from typing import Any, Iterable, Iterator, List, Optional
+import queue
+import threading
+from .plan import WorkflowPlan
+from .retry import RetryScheduler
+
+# Marks the end of the input on stage queues and on the output queue
+_DONE = object()
+
+# Sequence marker for an exception raised by the input iterable
+_INPUT_ERROR = object()
+
+# How often blocked threads re-check for cancellation, in seconds
+_POLL_INTERVAL = 0.1
+
+class StreamPipeline:
+    """Runs a workflow plan over a stream of payloads, one thread group per stage.
+
+    Stages are connected by bounded queues, so stage N works on item k+1
+    while stage N+1 works on item k, and a slow stage blocks the ones
+    before it instead of letting work pile up. The number of items between
+    the input and the consumer is capped at ``max_in_flight``, which bounds
+    memory even when results are reordered.
+
+    Stages run on Python threads (``"workers"`` per stage, default 1), so
+    they overlap when they release the GIL: I/O-bound agents, NumPy work,
+    or stages on a thread or process executor.
+
+    Each result is routed to the queue of the stage its transitions
+    select, which may be an earlier stage; a workflow that can loop back
+    caps ``max_in_flight`` at ``queue_size`` so that a full queue never
+    blocks the stage that would drain it.
+
+    A failed item on a stage with a retry policy is handed to a timer
+    thread and re-queued on the same stage when its backoff expires, so
+    the stage's workers carry on with other items meanwhile. Stages are
+    only closed once the input is exhausted and every item has finished,
+    including those waiting for a retry.
+    """
+
+    def __init__(self, plan: WorkflowPlan, queue_size: int = 64, max_in_flight: Optional[int] = None):
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be positive, got {queue_size}")
+        self.plan = plan
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight or queue_size * (len(plan.stages) + 1)
+        if plan.cyclic:
+            # Items routed back to an earlier stage must always find room
+            self.max_in_flight = min(self.max_in_flight, queue_size)
+
+    def run(self, items: Iterable[Any], ordered: bool = True) -> Iterator[Any]:
+        """Yield one result per input item.
+
+        Items that fail at a stage without an error agent yield the raised
+        exception instead of a result, as in ``start_workflow_batch``. An
+        exception raised by ``items`` itself is re-raised to the consumer.
+
+        Args:
+            items: Initial payloads
+            ordered: Yield results in input order, or as they finish
+
+        Returns:
+            Iterator over results
+        """
+        stages = self.plan.stages
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        self._output: queue.Queue = queue.Queue()
+        self._in_flight = threading.Semaphore(self.max_in_flight)
+        self._stop = threading.Event()
+        self._remaining = sum(stage.workers for stage in stages)
+        self._lock = threading.Lock()
+        # Items fed in and not yet passed to the consumer, including retries
+        self._live = 0
+        self._input_done = False
+        self._closed = False
+        self._scheduler = RetryScheduler() if any(stage.retry for stage in stages) else None
+
+        threads = [threading.Thread(target=self._feed, args=(items,), daemon=True)]
+        for index, stage in enumerate(stages):
+            threads.extend(
+                threading.Thread(target=self._work, args=(index,), daemon=True,
+                                 name=f"mas-stream-{stage.name}-{worker}")
+                for worker in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            pending = {}
+            next_seq = 0
+            while True:
+                item = self._output.get()
+                if item is _DONE:
+                    break
+                seq, result = item
+                if seq is _INPUT_ERROR:
+                    raise result
+                if not ordered:
+                    self._in_flight.release()
+                    yield result
+                    continue
+                pending[seq] = result
+                while next_seq in pending:
+                    result = pending.pop(next_seq)
+                    next_seq += 1
+                    self._in_flight.release()
+                    yield result
+        finally:
+            self._stop.set()
+            if self._scheduler is not None:
+                self._scheduler.shutdown()
+            for thread in threads:
+                thread.join()
+
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        """Put with backpressure; False if the stream was cancelled."""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        """Get the next item; None if the stream was cancelled."""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return None
+
+    def _enqueue(self, index: int, seq: int, payload: Any, hops: int = 0) -> bool:
+        """Hand an item to a stage; False if the stream was cancelled."""
+        return self._put(self._queues[index], (seq, payload, 0, hops))
+
+    def _emit(self, seq: int, result: Any):
+        """Pass a finished item to the consumer, closing the stages after the last one."""
+        self._output.put((seq, result))
+        with self._lock:
+            self._live -= 1
+        self._close_if_drained()
+
+    def _close_if_drained(self):
+        """Send end markers to every stage once all input items have finished.
+
+        Items can move to any stage (or back to an earlier one), so no stage
+        can close before the whole stream is done.
+        """
+        with self._lock:
+            if self._closed or not self._input_done or self._live:
+                return
+            self._closed = True
+        for index, stage in enumerate(self.plan.stages):
+            for _ in range(stage.workers):
+                if not self._put(self._queues[index], _DONE):
+                    return
+
+    def _retry(self, index: int, item: tuple):
+        """Timer callback: put a failed item back on its stage's queue."""
+        self._put(self._queues[index], item)
+
+    def _feed(self, items: Iterable[Any]):
+        """Push input items into the first stage."""
+        try:
+            for seq, payload in enumerate(items):
+                while not self._in_flight.acquire(timeout=_POLL_INTERVAL):
+                    if self._stop.is_set():
+                        return
+                with self._lock:
+                    self._live += 1
+                if not self._enqueue(0, seq, payload or {}):
+                    return
+        except Exception as e:
+            self._output.put((_INPUT_ERROR, e))
+            return
+        with self._lock:
+            self._input_done = True
+        self._close_if_drained()
+
+    def _work(self, index: int):
+        """Process items for one stage until the stream is drained."""
+        plan = self.plan
+        stage = plan.stages[index]
+        inbox = self._queues[index]
+
+        while True:
+            item = self._get(inbox)
+            if item is None:
+                return
+
+            if item is _DONE:
+                # The last worker to finish ends the output
+                with self._lock:
+                    self._remaining -= 1
+                    last = self._remaining == 0
+                if last:
+                    self._output.put(_DONE)
+                return
+
+            seq, payload, attempt, hops = item
+            if hops >= plan.max_hops:
+                self._emit(seq, RuntimeError(f"Workflow {plan.name} exceeded max_hops ({plan.max_hops})"))
+                continue
+            try:
+                result = stage.runner.run(payload)
+            except Exception as e:
+                if stage.retry is not None and stage.retry.should_retry(attempt, e):
+                    try:
+                        self._scheduler.schedule(
+                            stage.retry.delay(attempt + 1),
+                            lambda item=(seq, payload, attempt + 1, hops): self._retry(index, item)
+                        )
+                    except RuntimeError:
+                        return  # The stream was cancelled
+                    continue
+                if stage.error_index is not None:
+                    if not self._enqueue(stage.error_index, seq, payload, hops + 1):
+                        return
+                    continue
+                result = e
+                if stage.error_agent is not None:
+                    try:
+                        result = stage.error_runner.run(payload)
+                    except Exception as error:
+                        result = error
+
+            target = None
+            if not isinstance(result, Exception):
+                try:
+                    target = stage.route.next(result)
+                except Exception as e:
+                    # A failing condition ends this item, not the worker
+                    result = e
+            if target is None:
+                self._emit(seq, result)
+            elif not self._enqueue(target, seq, result, hops + 1):
+                return
@@ -1,86 +1,306 @@
 """Workflow management for the Multi-Agent System."""
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Set
+import asyncio
+import threading
+import time
 import uuid
+import weakref
+from concurrent.futures import Future
+from contextlib import nullcontext
 from datetime import datetime
 from .agent import Agent
-from .agent_registry import AGENT_REGISTRY
+from .agent_pool import AgentPool, default_pool
+from .agent_registry import create_agent
+from .dag import arun_dag, merge_outputs, run_dag
+from .executors import StageExecutors
+from .metrics import TimedRunner, WorkflowMetrics
+from .payload import cow, materialize, thaw
+from .plan import StagePlan, WorkflowPlan, compile_workflow
+from .resilience import AdmissionController, CircuitBreaker, GuardedRunner, OverloadedError
+from .retry import DelayQueue, RetryScheduler
+from .streaming import StreamPipeline
 
 class WorkflowManager:
-    """Manages workflows in the Multi-Agent System."""
+    """Manages workflows in the Multi-Agent System.
     
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize the workflow manager with configuration."""
+    Stages run inline by default. A stage with ``"executor": "thread"`` or
+    ``"executor": "process"`` runs on a shared thread or process pool, sized
+    from ``system_config.executors``; call shutdown() (or use the manager as
+    a context manager) to release the pools.
+    
+    Stages run in list order, or follow ``next_stage``/``error_stage``
+    transitions (including conditional edges) when the workflow declares
+    them; see ``mas.plan.compile_workflow``.
+    
+    Workflows whose stages declare ``depends_on`` run as DAGs: independent
+    stages run concurrently (on the ``executors.branch`` pool, or as tasks
+    under asyncio) and join stages merge their inputs, so latency follows
+    the critical path rather than the sum of the stages.
+    
+    Stages with ``max_retries`` are re-run with exponential backoff before
+    their error stage is used. No thread sleeps through a backoff: retries
+    of single runs are started by a timer thread on the branch pool, and
+    batches and streams keep processing other items while failed ones wait
+    for their retry.
+    
+    An agent entry with a ``circuit_breaker`` section gets a breaker shared
+    by every stage using it; while it is open, calls fail fast with
+    CircuitOpenError and go to the stage's error stage. Runs beyond
+    ``system_config.max_in_flight`` are shed with OverloadedError.
+    
+    Stage executions are timed unless ``system_config.metrics.enabled`` is
+    false, in which case stages run unwrapped and pay nothing for it.
+    
+    Given an AgentPool, or with ``system_config.agent_pool`` true (the
+    process-wide pool), managers built from the same agent entries share
+    thread-safe instances and check out per-call instances of stateless
+    agents that are not thread-safe (see ``mas.agent_pool``). Otherwise
+    each manager builds its own agents.
+    
+    With ``system_config.copy_on_write`` agents receive copy-on-write views
+    of the input payloads (see ``mas.payload``) instead of the payloads
+    themselves: reads copy nothing, writes copy only the containers they
+    change, and results are returned as plain data sharing the unchanged
+    parts of the input. Inputs are never modified, so concurrent runs can
+    share them; they must not be modified by the caller while a run is
+    in progress.
+    """
+    
+    def __init__(self, config: Dict[str, Any], agent_pool: Optional[AgentPool] = None):
+        """Initialize the workflow manager with configuration.
+        
+        Args:
+            config: System configuration
+            agent_pool: Pool to take agents from; defaults to the process-wide
+                pool when ``system_config.agent_pool`` is true, else none
+        """
         self.config = config
         self.agents = {}
+        if agent_pool is None and config.get("system_config", {}).get("agent_pool", False):
+            agent_pool = default_pool
+        self._agent_pool = agent_pool
+        self._pooled: Dict[str, Any] = {}
+        self._agents_closed = False
         self.workflow_definitions = config.get("workflow_definitions", {})
         
+        # Hand agents copy-on-write views of the input payloads
+        self.copy_on_write = config.get("system_config", {}).get("copy_on_write", False)
+        
+        # Limit on concurrently running astart_workflow calls (None = unlimited)
+        self.max_concurrent_workflows = config.get("system_config", {}).get("max_concurrent_workflows")
+        self._semaphores = weakref.WeakKeyDictionary()
+        
+        self._executors = StageExecutors(
+            config.get("agents", {}),
+            config.get("system_config", {}).get("executors", {}),
+            config.get("system_config", {}),
+            config.get("llm_configs", {})
+        )
+        
+        # Load shedding beyond this many in-flight runs (None = unlimited)
+        max_in_flight = config.get("system_config", {}).get("max_in_flight")
+        self._admission = AdmissionController(max_in_flight) if max_in_flight else None
+        
+        # One circuit breaker per agent that configures one
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        for agent_id, agent_config in config.get("agents", {}).items():
+            breaker = CircuitBreaker.from_config(agent_config.get("circuit_breaker"))
+            if breaker is not None:
+                self._breakers[agent_id] = breaker
+        
+        metrics_config = config.get("system_config", {}).get("metrics", {})
+        self._metrics: Optional[WorkflowMetrics] = None
+        if metrics_config.get("enabled", True):
+            self._metrics = WorkflowMetrics(payload_sizes=metrics_config.get("payload_sizes", False))
+        
+        # Execution plans by workflow name, filled by compile_workflows()
+        self.plans: Dict[str, WorkflowPlan] = {}
+        
+        # Timer starting the retries of single runs, and the runs waiting for one
+        self._retries: Optional[RetryScheduler] = None
+        self._retrying: Set[Future] = set()
+        self._retry_lock = threading.Lock()
+        
         # Initialize agents from config
         self._initialize_agents()
+        
+        # Resolve workflows into execution plans so config errors surface here
+        self.compile_workflows()
     
     def _initialize_agents(self):
         """Initialize agents based on configuration."""
         agent_configs = self.config.get("agents", {})
+        system_config = self.config.get("system_config", {})
+        llm_configs = self.config.get("llm_configs", {})
         
         for agent_id, agent_config in agent_configs.items():
-            agent_type = agent_config.get("type")
-            if agent_type not in AGENT_REGISTRY:
-                raise ValueError(f"Unknown agent type: {agent_type}")
-            
-            # Create agent instance
-            agent_class = AGENT_REGISTRY[agent_type]
-            agent = agent_class(
-                agent_id=agent_config.get("id", str(uuid.uuid4())),
-                config=agent_config.get("config", {})
-            )
-            
-            self.agents[agent_id] = agent
+            if self._agent_pool is None:
+                self.agents[agent_id] = create_agent(agent_config, system_config, llm_configs)
+            else:
+                self.agents[agent_id] = self._pooled[agent_id] = self._agent_pool.acquire(
+                    agent_id, agent_config, system_config, llm_configs
+                )
+    
+    def compile_workflows(self):
+        """Compile every workflow definition into an execution plan.
+        
+        Called at construction; call it again after changing
+        ``workflow_definitions`` or ``agents``.
+        """
+        self.plans = {
+            name: compile_workflow(name, definition, self.agents, self._build_runner)
+            for name, definition in self.workflow_definitions.items()
+        }
+    
+    def _build_runner(self, executor: str, agent_id: str, agent: Agent, workflow_name: str, stage_name: str):
+        """Create the runner for a stage, timed when metrics are enabled."""
+        runner = self._executors.runner(executor, agent_id, agent)
+        if self._metrics is not None:
+            runner = TimedRunner(runner, self._metrics, workflow_name, stage_name, agent_id)
+        breaker = self._breakers.get(agent_id)
+        if breaker is not None:
+            runner = GuardedRunner(runner, breaker, agent_id)
+        return runner
+    
+    def health(self) -> Dict[str, Any]:
+        """Return admission control counters and the state of each circuit breaker."""
+        return {
+            "admission": self._admission.snapshot() if self._admission is not None else None,
+            "circuit_breakers": {agent_id: breaker.snapshot() for agent_id, breaker in self._breakers.items()}
+        }
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of per-stage and per-agent statistics.
+        
+        Each entry has call and error counts and a latency histogram summary
+        in nanoseconds (plus payload sizes in bytes when
+        ``system_config.metrics.payload_sizes`` is set).
+        """
+        if self._metrics is None:
+            return {"enabled": False}
+        return self._metrics.snapshot()
+    
+    def reset_metrics(self):
+        """Clear collected statistics."""
+        if self._metrics is not None:
+            self._metrics.reset()
+    
+    def add_metrics_hook(self, hook: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked with an event dict after each stage execution.
+        
+        Raises:
+            RuntimeError: If metrics are disabled
+        """
+        if self._metrics is None:
+            raise RuntimeError("Metrics are disabled for this WorkflowManager")
+        self._metrics.hooks.append(hook)
+    
+    def shutdown(self, wait: bool = True):
+        """Release the thread and process pools used by stage executors and the agents.
+        
+        Runs waiting for a retry fail with RuntimeError.
+        """
+        with self._retry_lock:
+            retries, self._retries = self._retries, None
+        if retries is not None:
+            retries.shutdown()
+        with self._retry_lock:
+            waiting, self._retrying = self._retrying, set()
+        for future in waiting:
+            future.set_exception(RuntimeError("WorkflowManager was shut down before a retry ran"))
+        self._executors.shutdown(wait=wait)
+        if self._agents_closed:
+            return
+        self._agents_closed = True
+        pooled, self._pooled = self._pooled, {}
+        for agent in pooled.values():
+            self._agent_pool.release(agent)
+        for agent in self.agents.values():
+            if not any(agent is pooled_agent for pooled_agent in pooled.values()):
+                agent.close()
+    
+    def __enter__(self) -> "WorkflowManager":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+    
+    def get_plan(self, workflow_name: str) -> WorkflowPlan:
+        """Return the compiled plan for a workflow."""
+        try:
+            return self.plans[workflow_name]
+        except KeyError:
+            raise ValueError(f"Unknown workflow: {workflow_name}") from None
+    
+    def _admit(self):
+        """Context manager holding an admission slot for one workflow run."""
+        if self._admission is None:
+            return nullcontext()
+        return self._admission.slot()
     
     def start_workflow(self, workflow_name: str, initial_payload: Optional[Dict] = None) -> Dict:
-        """Start a workflow with the given name and initial payload."""
-        if workflow_name not in self.workflow_definitions:
-            raise ValueError(f"Unknown workflow: {workflow_name}")
+        """Start a workflow with the given name and initial payload.
         
-        workflow = self.workflow_definitions[workflow_name]
-        stages = workflow.get("stages", [])
+        Raises:
+            OverloadedError: If ``system_config.max_in_flight`` runs are already in flight
+        """
+        plan = self.get_plan(workflow_name)
+        with self._admit():
+            return self._unshare(self._run_plan(plan, self._share(initial_payload)))
+    
+    def _share(self, payload: Optional[Dict]) -> Any:
+        """The payload handed to the first stage: a view of it under copy_on_write."""
+        if payload is None:
+            return {}
+        return cow(payload) if self.copy_on_write else payload
+    
+    def _unshare(self, result: Any) -> Any:
+        """A workflow result as plain data."""
+        return thaw(result) if self.copy_on_write else result
+    
+    def _run_plan(self, plan: WorkflowPlan, current_payload: Dict) -> Dict:
+        """Execute a compiled plan in the calling thread."""
+        if plan.dag:
+            return run_dag(plan, current_payload, self._execute_stage, self._submit_stage)
         
-        if not stages:
-            raise ValueError(f"Workflow {workflow_name} has no stages")
+        stages = plan.stages
         
         # Initialize workflow context
         context = {
             "workflow_id": str(uuid.uuid4()),
-            "workflow_name": workflow_name,
+            "workflow_name": plan.name,
             "start_time": datetime.utcnow().isoformat(),
-            "current_stage": stages[0]["name"]
+            "current_stage": stages[0].name
         }
         
-        # Process each stage
-        current_payload = initial_payload or {}
-        
-        for stage in stages:
-            agent_id = stage["agent"]
-            if agent_id not in self.agents:
-                raise ValueError(f"Unknown agent: {agent_id}")
-            
-            agent = self.agents[agent_id]
+        # Follow the stage transitions from the first stage
+        index = 0
+        executed = 0
+        while index is not None:
+            stage = stages[index]
+            executed = self._count_hop(plan, executed)
             try:
                 # Update context
-                context["current_stage"] = stage["name"]
-                context["current_agent"] = agent_id
+                context["current_stage"] = stage.name
+                context["current_agent"] = stage.agent_id
                 
                 # Process message
-                current_payload = agent.process_message(current_payload)
+                current_payload = self._run_stage(stage, current_payload)
                 
             except Exception as e:
-                # Handle error stage if defined
-                error_stage = stage.get("error_stage")
-                if error_stage and error_stage in self.agents:
-                    error_agent = self.agents[error_stage]
+                # Route to the error stage, or handle with the error agent
+                if stage.error_index is not None:
+                    context["error"] = str(e)
+                    index = stage.error_index
+                    continue
+                if stage.error_agent is not None:
                     context["error"] = str(e)
-                    current_payload = error_agent.process_message(current_payload)
+                    current_payload = stage.error_runner.run(current_payload)
                 else:
                     raise
+            
+            index = stage.route.next(current_payload)
         
         # Update completion status
         context["end_time"] = datetime.utcnow().isoformat()
@@ -88,3 +308,455 @@ class WorkflowManager:
         
         # Return the processed payload directly
         return current_payload
+    
+    @staticmethod
+    def _count_hop(plan: WorkflowPlan, executed: int) -> int:
+        """Count one more stage execution for a run, enforcing ``max_hops``."""
+        if executed >= plan.max_hops:
+            raise RuntimeError(f"Workflow {plan.name} exceeded max_hops ({plan.max_hops})")
+        return executed + 1
+    
+    def _run_stage(self, stage: StagePlan, payload: Dict) -> Dict:
+        """Run one stage for one payload, retrying per the stage's policy.
+        
+        The first attempt runs in the calling thread, which then waits for
+        the outcome of any retries.
+        """
+        future = Future()
+        self._stage_attempt(stage, payload, 0, future, False)
+        return future.result()
+    
+    def _execute_stage(self, stage: StagePlan, payload: Dict) -> Dict:
+        """Run a stage, falling back to its error agent if it fails."""
+        future = Future()
+        self._stage_attempt(stage, payload, 0, future, True)
+        return future.result()
+    
+    def _submit_stage(self, stage: StagePlan, payload: Dict) -> Future:
+        """Start a DAG branch stage on the branch pool, like _execute_stage."""
+        future = Future()
+        self._executors.branch_pool().submit(self._stage_attempt, stage, payload, 0, future, True)
+        return future
+    
+    def _stage_attempt(self, stage: StagePlan, payload: Dict, attempt: int, future: Future, fallback: bool):
+        """Run one attempt of a stage and settle ``future``, or schedule the next attempt.
+        
+        With ``fallback`` the stage's error agent handles the final failure.
+        """
+        try:
+            if stage.retry is not None or stage.error_agent is not None:
+                materialize(payload)
+            try:
+                output = stage.runner.run(payload)
+            except Exception as e:
+                if stage.retry is not None and stage.retry.should_retry(attempt, e):
+                    self._retry_later(
+                        stage.retry.delay(attempt + 1), future,
+                        self._stage_attempt, stage, payload, attempt + 1, future, fallback
+                    )
+                    return
+                if not fallback or stage.error_agent is None:
+                    raise
+                output = stage.error_runner.run(payload)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(output)
+    
+    def _retry_later(self, delay: float, future: Future, attempt: Callable, *args: Any):
+        """Start ``attempt(*args)`` on the branch pool after ``delay`` seconds.
+        
+        ``future`` is the run's outcome; it fails if the attempt cannot be
+        started.
+        """
+        def start():
+            with self._retry_lock:
+                self._retrying.discard(future)
+            try:
+                self._executors.branch_pool().submit(attempt, *args)
+            except Exception as e:
+                future.set_exception(e)
+        
+        with self._retry_lock:
+            if self._retries is None:
+                self._retries = RetryScheduler()
+            self._retrying.add(future)
+            self._retries.schedule(delay, start)
+    
+    def start_workflow_batch(self, workflow_name: str, payloads: List[Optional[Dict]]) -> List[Any]:
+        """Run a workflow over a batch of payloads.
+        
+        Each stage processes the whole batch before the next stage starts, so
+        workflow setup and stage lookups are paid once per batch instead of
+        once per payload. Items beyond the ``system_config.max_in_flight``
+        limit are shed with OverloadedError. Failures are isolated per item: an item whose stage
+        raises is retried if the stage has a retry policy (failed items are
+        held in a delay queue and re-run together as their backoff expires),
+        then handed to the stage's error agent when one is defined; otherwise
+        its result slot holds the raised exception and it skips the remaining
+        stages.
+        
+        Args:
+            workflow_name: Name of the workflow to run
+            payloads: Initial payloads, one per workflow run
+            
+        Returns:
+            List with one result (or raised exception) per payload, in order
+        """
+        plan = self.get_plan(workflow_name)
+        stages = plan.stages
+        
+        # One context for the whole batch
+        context = {
+            "workflow_id": str(uuid.uuid4()),
+            "workflow_name": workflow_name,
+            "start_time": datetime.utcnow().isoformat(),
+            "current_stage": stages[0].name,
+            "batch_size": len(payloads)
+        }
+        
+        results: List[Any] = [self._share(payload) for payload in payloads]
+        
+        # Shed the items that do not fit under the in-flight limit
+        admitted = len(results)
+        if self._admission is not None:
+            admitted = self._admission.acquire(len(results))
+            for index in range(admitted, len(results)):
+                results[index] = OverloadedError(
+                    f"Too many workflows in flight (limit {self._admission.max_in_flight})"
+                )
+        active = list(range(admitted))
+        
+        try:
+            if plan.dag:
+                self._run_dag_batch(plan, results, active)
+            else:
+                self._run_routed_batch(plan, results, active, context)
+        
+        finally:
+            if self._admission is not None:
+                self._admission.release(admitted)
+        
+        context["end_time"] = datetime.utcnow().isoformat()
+        context["status"] = "completed"
+        
+        if self.copy_on_write:
+            results = [thaw(result) for result in results]
+        return results
+    
+    def _run_routed_batch(self, plan: WorkflowPlan, results: List[Any], active: List[int], context: Dict):
+        """Run a linear or routed plan over a batch, storing results in ``results``.
+        
+        Items waiting at the same stage are processed together; the stage
+        earliest in the plan goes first, so items moving forward in step
+        stay batched. Failed items wait for their retry in a delay queue
+        while the others move on; the batch only waits for the queue when
+        no item can make progress.
+        """
+        stages = plan.stages
+        frontier: Dict[int, List[int]] = {0: active} if active else {}
+        executed = [0] * len(results)
+        # Retries so far of items that failed at their current stage
+        attempts: Dict[int, int] = {}
+        retries = DelayQueue()
+        
+        while frontier or retries:
+            if not frontier:
+                time.sleep(retries.wait_time())
+            for stage_index, index in retries.pop_due():
+                frontier.setdefault(stage_index, []).append(index)
+            if not frontier:
+                continue
+            
+            stage_index = min(frontier)
+            indices = frontier.pop(stage_index)
+            stage = stages[stage_index]
+            error_runner = stage.error_runner
+            
+            context["current_stage"] = stage.name
+            context["current_agent"] = stage.agent_id
+            
+            inputs = {}
+            for index in indices:
+                try:
+                    if index not in attempts:
+                        executed[index] = self._count_hop(plan, executed[index])
+                    inputs[index] = results[index]
+                except RuntimeError as e:
+                    results[index] = e
+            outputs = self._run_batch(stage, inputs)
+            
+            for index in inputs:
+                output = outputs[index]
+                if isinstance(output, Exception):
+                    attempt = attempts.get(index, 0)
+                    if stage.retry is not None and stage.retry.should_retry(attempt, output):
+                        attempts[index] = attempt + 1
+                        retries.push(stage.retry.delay(attempt + 1), (stage_index, index))
+                        continue
+                attempts.pop(index, None)
+                if isinstance(output, Exception):
+                    if stage.error_index is not None:
+                        frontier.setdefault(stage.error_index, []).append(index)
+                        continue
+                    if error_runner is not None:
+                        try:
+                            output = error_runner.run(inputs[index])
+                        except Exception as e:
+                            output = e
+                
+                results[index] = output
+                if not isinstance(output, Exception):
+                    try:
+                        target = stage.route.next(output)
+                    except Exception as e:
+                        results[index] = e
+                        continue
+                    if target is not None:
+                        frontier.setdefault(target, []).append(index)
+    
+    def _run_dag_batch(self, plan: WorkflowPlan, results: List[Any], active: List[int]):
+        """Run a DAG plan over a batch, storing each item's result or exception in ``results``.
+        
+        Every stage processes all the items that reached it as one batch;
+        an item failing in any branch is dropped from the joins below it.
+        Failed items are retried together, started by the retry timer.
+        """
+        def settle(stage: StagePlan, inputs: Dict[int, Dict], outputs: Dict[int, Any]) -> Dict[int, Any]:
+            succeeded = {}
+            for index, output in outputs.items():
+                if isinstance(output, Exception) and stage.error_agent is not None:
+                    try:
+                        output = stage.error_runner.run(inputs[index])
+                    except Exception as e:
+                        output = e
+                if isinstance(output, Exception):
+                    results[index] = output
+                else:
+                    succeeded[index] = output
+            return succeeded
+        
+        def attempt(stage: StagePlan, inputs: Dict[int, Dict], future: Future):
+            self._batch_attempt(stage, inputs, 0, {}, future, lambda outputs: settle(stage, inputs, outputs))
+        
+        def execute(stage: StagePlan, inputs: Dict[int, Dict]) -> Dict[int, Any]:
+            future = Future()
+            attempt(stage, inputs, future)
+            return future.result()
+        
+        def submit(stage: StagePlan, inputs: Dict[int, Dict]) -> Future:
+            future = Future()
+            self._executors.branch_pool().submit(attempt, stage, inputs, future)
+            return future
+        
+        def join(strategy: str, names: List[str], batches: List[Dict[int, Any]]) -> Dict[int, Any]:
+            common = [index for index in batches[0] if all(index in batch for batch in batches[1:])]
+            return {index: merge_outputs(strategy, names, [batch[index] for batch in batches]) for index in common}
+        
+        final = run_dag(plan, {index: results[index] for index in active}, execute, submit, join)
+        for index, output in final.items():
+            results[index] = output
+    
+    @staticmethod
+    def _run_batch(stage: StagePlan, inputs: Dict[int, Dict]) -> Dict[int, Any]:
+        """Run one attempt of a stage over a batch keyed by item index."""
+        if stage.retry is not None or stage.error_agent is not None:
+            for payload in inputs.values():
+                materialize(payload)
+        batch = list(inputs.values())
+        outputs = stage.runner.run_batch(batch)
+        if len(outputs) != len(batch):
+            raise ValueError(
+                f"Agent {stage.agent_id} returned {len(outputs)} results for a batch of {len(batch)}"
+            )
+        return dict(zip(inputs, outputs))
+    
+    def _batch_attempt(
+        self,
+        stage: StagePlan,
+        inputs: Dict[int, Dict],
+        attempt: int,
+        outputs: Dict[int, Any],
+        future: Future,
+        finish: Callable[[Dict[int, Any]], Any]
+    ):
+        """Run one attempt of a stage over a batch, scheduling a retry of the failed items.
+        
+        Once every item has its final output, ``future`` is settled with
+        ``finish(outputs)``.
+        """
+        try:
+            failed = {}
+            for index, output in self._run_batch(stage, inputs).items():
+                if (isinstance(output, Exception) and stage.retry is not None
+                        and stage.retry.should_retry(attempt, output)):
+                    failed[index] = inputs[index]
+                else:
+                    outputs[index] = output
+            if failed:
+                self._retry_later(
+                    stage.retry.delay(attempt + 1), future,
+                    self._batch_attempt, stage, failed, attempt + 1, outputs, future, finish
+                )
+                return
+            result = finish(outputs)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+    
+    def stream(
+        self,
+        workflow_name: str,
+        payloads: Iterable[Optional[Dict]],
+        ordered: bool = True,
+        queue_size: int = 64
+    ) -> Iterator[Any]:
+        """Run a workflow over a stream of payloads with stages pipelined.
+        
+        Stages are connected by bounded queues and run concurrently, so
+        throughput is set by the slowest stage rather than the sum of all
+        stages, and memory is bounded by the queue sizes. Payloads are pulled
+        from ``payloads`` lazily as capacity frees up.
+        
+        Args:
+            workflow_name: Name of the workflow to run
+            payloads: Iterable of initial payloads
+            ordered: Yield results in input order, or as they finish
+            queue_size: Capacity of each inter-stage queue
+            
+        Returns:
+            Iterator with one result (or raised exception) per payload
+        
+        DAG workflows are not pipelined: payloads run one after another,
+        each with its independent branches in parallel.
+        """
+        plan = self.get_plan(workflow_name)
+        if self.copy_on_write:
+            payloads = map(self._share, payloads)
+        if plan.dag:
+            results = self._stream_dag(plan, payloads)
+        else:
+            results = StreamPipeline(plan, queue_size=queue_size).run(payloads, ordered=ordered)
+        return self._unshare_stream(results) if self.copy_on_write else results
+    
+    @staticmethod
+    def _unshare_stream(results: Iterator[Any]) -> Iterator[Any]:
+        """Yield stream results as plain data, stopping the stream when closed."""
+        try:
+            for result in results:
+                yield thaw(result)
+        finally:
+            results.close()
+    
+    def _stream_dag(self, plan: WorkflowPlan, payloads: Iterable[Optional[Dict]]) -> Iterator[Any]:
+        """Stream a DAG workflow one payload at a time, branches in parallel."""
+        for payload in payloads:
+            try:
+                yield self._run_plan(plan, payload or {})
+            except Exception as e:
+                yield e
+    
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        """Return the concurrency limiter for the running event loop."""
+        if not self.max_concurrent_workflows:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent_workflows)
+            self._semaphores[loop] = semaphore
+        return semaphore
+    
+    async def astart_workflow(self, workflow_name: str, initial_payload: Optional[Dict] = None) -> Dict:
+        """Asynchronously run a workflow with the given name and initial payload.
+        
+        Inline stages are awaited through ``Agent.aprocess_message`` and
+        thread or process stages through their pools, so many workflows can
+        run concurrently on one event loop. At most
+        ``system_config.max_concurrent_workflows`` runs execute at once per
+        loop; further calls wait for a free slot, unless
+        ``system_config.max_in_flight`` runs (waiting or running) are already
+        in flight, in which case OverloadedError is raised at once.
+        
+        Args:
+            workflow_name: Name of the workflow to run
+            initial_payload: Initial payload for the first stage
+            
+        Returns:
+            The processed payload
+        """
+        plan = self.get_plan(workflow_name)
+        
+        with self._admit():
+            semaphore = self._get_semaphore()
+            if semaphore is None:
+                return self._unshare(await self._arun_plan(plan, self._share(initial_payload)))
+            async with semaphore:
+                return self._unshare(await self._arun_plan(plan, self._share(initial_payload)))
+    
+    @staticmethod
+    async def _arun_stage(stage: StagePlan, payload: Dict) -> Dict:
+        """Await one stage, retrying per its policy without blocking the loop."""
+        if stage.retry is not None or stage.error_agent is not None:
+            materialize(payload)
+        attempt = 0
+        while True:
+            try:
+                return await stage.runner.arun(payload)
+            except Exception as e:
+                if stage.retry is None or not stage.retry.should_retry(attempt, e):
+                    raise
+                attempt += 1
+                await asyncio.sleep(stage.retry.delay(attempt))
+    
+    async def _aexecute_stage(self, stage: StagePlan, payload: Dict) -> Dict:
+        """Await a stage, falling back to its error agent if it fails."""
+        try:
+            return await self._arun_stage(stage, payload)
+        except Exception:
+            if stage.error_agent is None:
+                raise
+            return await stage.error_runner.arun(payload)
+    
+    async def _arun_plan(self, plan: WorkflowPlan, payload: Dict) -> Dict:
+        """Execute a compiled plan on the running event loop."""
+        if plan.dag:
+            return await arun_dag(plan, payload, self._aexecute_stage)
+        
+        context = {
+            "workflow_id": str(uuid.uuid4()),
+            "workflow_name": plan.name,
+            "start_time": datetime.utcnow().isoformat(),
+            "current_stage": plan.stages[0].name
+        }
+        
+        index = 0
+        executed = 0
+        while index is not None:
+            stage = plan.stages[index]
+            executed = self._count_hop(plan, executed)
+            try:
+                context["current_stage"] = stage.name
+                context["current_agent"] = stage.agent_id
+                
+                payload = await self._arun_stage(stage, payload)
+                
+            except Exception as e:
+                if stage.error_index is not None:
+                    context["error"] = str(e)
+                    index = stage.error_index
+                    continue
+                if stage.error_agent is not None:
+                    context["error"] = str(e)
+                    payload = await stage.error_runner.arun(payload)
+                else:
+                    raise
+            
+            index = stage.route.next(payload)
+        
+        context["end_time"] = datetime.utcnow().isoformat()
+        context["status"] = "completed"
+        
+        return payload
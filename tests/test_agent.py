@@ -0,0 +1,225 @@
+"""Tests for the Agent base class and message handling."""
+
+import copy
+import json
+import pickle
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+from mas import schema as schema_module
+from mas.agent import Agent, MessageStatus
+from mas.cache import payload_key
+from mas.message import Message
+from mas.schema import compile_fast_validator, compile_validator, get_validator
+
+ROOT = Path(__file__).parent.parent
+
+with open(ROOT / "config.json", "r") as f:
+    MESSAGE_SCHEMAS = json.load(f)["message_schemas"]
+
+
+class EchoAgent(Agent):
+    def process_message(self, message):
+        return message["payload"]
+
+
+ENVELOPES = [
+    {"request_id": "r1", "timestamp": "t", "source_agent": "a", "status": "success", "payload": {}},
+    {"request_id": "r1", "timestamp": "t", "source_agent": "a", "payload": {}},
+    {"request_id": 1, "timestamp": "t", "source_agent": "a", "status": "success", "payload": {}},
+    {"request_id": "r1", "timestamp": "t", "status": "done", "payload": {}},
+    {"request_id": "r1", "timestamp": "t", "status": "error", "payload": []},
+    {"timestamp": "t", "source_agent": "a", "payload": {}},
+    ["not", "an", "object"],
+]
+
+
+@pytest.mark.parametrize("message_type", ["agent_request", "agent_response"])
+@pytest.mark.parametrize("instance", ENVELOPES)
+def test_fast_validation_agrees_with_jsonschema(message_type, instance):
+    schema = MESSAGE_SCHEMAS["standard_formats"][message_type]
+    fast_check = compile_fast_validator(schema)
+    assert fast_check is not None
+
+    expected_valid = jsonschema.Draft7Validator(schema).is_valid(instance)
+    try:
+        fast_check(instance)
+        fast_valid = True
+    except jsonschema.exceptions.ValidationError:
+        fast_valid = False
+
+    assert fast_valid == expected_valid
+
+
+def test_validator_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(schema_module, "MAX_CACHED_VALIDATORS", 2)
+    monkeypatch.setattr(schema_module, "_validators", OrderedDict())
+    first, second, third = ({"type": "object", "title": str(i)} for i in range(3))
+
+    validator = get_validator(first)
+    get_validator(second)
+    assert get_validator(first) is validator
+    get_validator(third)
+
+    assert [entry[0] for entry in schema_module._validators.values()] == [first, third]
+
+
+def test_validators_compiled_once_per_schema():
+    schema = {"type": "object", "properties": {"a": {"type": "array", "items": {"type": "number"}}}}
+
+    assert get_validator(schema) is get_validator(schema)
+    assert compile_fast_validator(schema) is None
+    with pytest.raises(jsonschema.exceptions.ValidationError):
+        compile_validator(schema, "fast")({"a": ["x"]})
+
+
+@pytest.mark.parametrize("mode", ["full", "fast"])
+def test_receive_message_validates_envelope(mode):
+    agent = EchoAgent("echo", {"message_schemas": MESSAGE_SCHEMAS, "message_validation": mode})
+    request = agent.create_message({"value": 1})
+
+    response = agent.receive_message(request)
+    assert response["status"] == MessageStatus.SUCCESS.value
+    assert response["request_id"] == request["request_id"]
+    assert response["payload"] == {"value": 1}
+
+    invalid = agent.receive_message({"payload": {}})
+    assert invalid["status"] == MessageStatus.ERROR.value
+
+
+def test_message_ids_are_lazy(monkeypatch):
+    calls = []
+    real_uuid4 = uuid.uuid4
+    monkeypatch.setattr(uuid, "uuid4", lambda: calls.append(1) or real_uuid4())
+    agent = EchoAgent("echo", {})
+
+    response = agent.receive_message({"request_id": "r1", "payload": {"value": 1}})
+    assert response["request_id"] == "r1"
+    assert calls == []
+
+    message = agent.create_message({"value": 2})
+    assert "request_id" in message and calls == []
+    assert message["request_id"] == message.request_id
+    assert len(calls) == 1
+
+
+def test_validation_keeps_message_ids_lazy(monkeypatch):
+    calls = []
+    real_uuid4 = uuid.uuid4
+    monkeypatch.setattr(uuid, "uuid4", lambda: calls.append(1) or real_uuid4())
+    agent = EchoAgent("echo", {"message_schemas": MESSAGE_SCHEMAS})
+
+    message = agent.create_message({"value": 1})
+
+    assert calls == []
+    assert message._timestamp is None
+
+
+@pytest.mark.parametrize("duplicate", [
+    copy.copy,
+    copy.deepcopy,
+    lambda message: pickle.loads(pickle.dumps(message)),
+])
+def test_message_copies_keep_ids(duplicate):
+    message = Message({"value": [1]}, source_agent="a")
+    message["trace"] = "t1"
+
+    clone = duplicate(message)
+
+    assert clone == message
+    assert clone.request_id == message.request_id
+    assert clone.timestamp == message.timestamp
+    clone["trace"] = "t2"
+    assert message["trace"] == "t1"
+
+
+def test_message_dict_access():
+    message = Message({"value": 1}, source_agent="a", timestamp="2025-01-01T00:00:00")
+    message["trace"] = "t1"
+    message["status"] = MessageStatus.SUCCESS.value
+
+    as_dict = message.to_dict()
+    assert list(as_dict) == list(message) == [
+        "request_id", "timestamp", "source_agent", "message_type", "status", "payload", "trace"
+    ]
+    assert message == as_dict
+    assert message.get("missing") is None
+    assert json.loads(json.dumps(as_dict))["trace"] == "t1"
+    with pytest.raises(TypeError):
+        del message["payload"]
+
+
+class CountingAgent(Agent):
+    calls = 0
+
+    def process_message(self, message):
+        CountingAgent.calls += 1
+        message["text"] = message["text"].upper()
+        return message
+
+
+def test_result_cache_serves_copies():
+    CountingAgent.calls = 0
+    agent = CountingAgent("counter", {"cache": {"max_entries": 8}})
+
+    first = agent.process_message({"text": "hello"})
+    first["text"] = "mutated"
+    second = agent.process_message({"text": "hello"})
+    third = agent.process_message({"text": "hello"})
+
+    assert CountingAgent.calls == 1
+    assert second == third == {"text": "HELLO"}
+    assert second is not third
+    assert agent.result_cache.stats()["hits"] == 2
+    assert agent.result_cache.stats()["misses"] == 1
+
+
+def test_result_cache_evicts_lru_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    CountingAgent.calls = 0
+    agent = CountingAgent("counter", {"cache": {"max_entries": 2, "ttl": 10}})
+
+    for text in ["a", "b", "a", "c"]:
+        agent.process_message({"text": text})
+    assert CountingAgent.calls == 3
+    assert agent.result_cache.stats()["evictions"] == 1
+
+    agent.process_message({"text": "a"})
+    assert CountingAgent.calls == 3
+
+    now[0] += 11
+    agent.process_message({"text": "a"})
+    assert CountingAgent.calls == 4
+    assert agent.result_cache.stats()["expirations"] == 1
+
+
+def test_result_cache_memory_budget_and_uncacheable_payloads():
+    CountingAgent.calls = 0
+    agent = CountingAgent("counter", {"cache": {"max_bytes": 200}})
+
+    agent.process_message({"text": "x" * 500})
+    agent.process_message({"text": "x" * 500})
+    agent.process_message({"text": "y", 1: "mixed key types"})
+
+    assert CountingAgent.calls == 3
+    assert agent.result_cache.stats()["entries"] == 0
+    assert agent.result_cache.stats()["uncacheable"] == 3
+
+
+def test_payload_key_is_stable():
+    assert payload_key({"b": [1, 2.5], "a": {"c": None}}) == payload_key({"a": {"c": None}, "b": [1, 2.5]})
+    assert payload_key({"a": 1}) != payload_key({"a": True})
+
+
+def test_payload_key_keeps_key_types_and_tuples_apart():
+    assert payload_key({1: "x"}) is None
+    assert payload_key({"1": "x"}) is not None
+    assert payload_key({"a": [(1, 2)]}) is None
+    assert payload_key({"a": [[1, 2]]}) is not None
+    assert payload_key({"a": Message({1: "x"}, source_agent="a")}) is None
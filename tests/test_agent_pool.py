@@ -0,0 +1,165 @@
+"""Tests for sharing agent instances across WorkflowManagers."""
+
+import threading
+import time
+
+import pytest
+
+from mas.agent import Agent
+from mas.agent_pool import AgentPool, WorkerAgent
+from mas.agent_registry import AGENT_REGISTRY
+from mas.workflow import WorkflowManager
+
+
+class CountingAgent(Agent):
+    """Counts constructions and closes; slow to build."""
+
+    sharing = "per_worker"
+    built = 0
+    closed = 0
+
+    def __init__(self, agent_id, config):
+        super().__init__(agent_id, config)
+        time.sleep(config.get("build_delay", 0))
+        type(self).built += 1
+
+    def process_message(self, message):
+        time.sleep(self.config.get("delay", 0))
+        return {**message, "instance": id(self)}
+
+    def close(self):
+        type(self).closed += 1
+
+
+@pytest.fixture
+def counting(monkeypatch):
+    monkeypatch.setitem(AGENT_REGISTRY, "counting", CountingAgent)
+    monkeypatch.setattr(CountingAgent, "built", 0)
+    monkeypatch.setattr(CountingAgent, "closed", 0)
+    return CountingAgent
+
+
+def config(agent_config=None, **entry):
+    return {
+        "agents": {
+            "worker": {"id": "worker", "type": "counting", "config": agent_config or {}, **entry},
+            "validator": {"id": "validator", "type": "data_validator", "config": {}},
+            "aggregator": {"id": "aggregator", "type": "data_aggregator", "config": {}}
+        },
+        "workflow_definitions": {"work": {"stages": [{"name": "work", "agent": "worker"}]}}
+    }
+
+
+def test_managers_share_thread_safe_agents(counting):
+    pool = AgentPool()
+    first = WorkflowManager(config(), agent_pool=pool)
+    second = WorkflowManager(config(), agent_pool=pool)
+    other = WorkflowManager(config({"delay": 0}), agent_pool=pool)
+
+    assert first.agents["validator"] is second.agents["validator"]
+    assert first.agents["aggregator"] is not second.agents["aggregator"]  # keeps state between calls
+    assert isinstance(first.agents["worker"], WorkerAgent)
+    assert other.agents["validator"] is first.agents["validator"]
+    assert pool.snapshot()["shared"] == 1
+
+
+def test_entries_must_match_to_share(counting):
+    pool = AgentPool()
+    changed = config()
+    changed["agents"]["validator"]["config"] = {"input_validation": {"required_fields": ["data"]}}
+
+    first = WorkflowManager(config(), agent_pool=pool)
+    second = WorkflowManager(changed, agent_pool=pool)
+
+    assert first.agents["validator"] is not second.agents["validator"]
+
+
+def test_shared_agents_are_built_once(counting):
+    pool = AgentPool()
+    managers = []
+    threads = [
+        threading.Thread(target=lambda: managers.append(
+            WorkflowManager(config({"build_delay": 0.05}, sharing="shared"), agent_pool=pool)
+        ))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counting.built == 1
+    assert len({id(manager.agents["worker"]) for manager in managers}) == 1
+
+
+def test_per_worker_agents_check_out_instances(counting):
+    pool = AgentPool()
+    manager = WorkflowManager(config({"delay": 0.1}), agent_pool=pool)
+    other = WorkflowManager(config({"delay": 0.1}), agent_pool=pool)
+
+    sequential = {manager.start_workflow("work", {})["instance"] for _ in range(3)}
+    sequential.add(other.start_workflow("work", {})["instance"])
+    assert len(sequential) == 1 and counting.built == 1
+
+    concurrent = []
+    threads = [threading.Thread(target=lambda: concurrent.append(manager.start_workflow("work", {})["instance"]))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(concurrent)) == 3
+    assert pool.snapshot()["worker_instances"] == 3
+
+
+def test_release_closes_after_last_manager(counting):
+    pool = AgentPool()
+    first = WorkflowManager(config(sharing="shared"), agent_pool=pool)
+    second = WorkflowManager(config(sharing="shared"), agent_pool=pool)
+
+    first.shutdown()
+    assert counting.closed == 0
+    second.shutdown()
+    assert counting.closed == 1
+    second.shutdown()
+    assert counting.closed == 1
+
+    third = WorkflowManager(config(sharing="shared"), agent_pool=pool)
+    assert third.agents["worker"] is not first.agents["worker"]
+
+
+def test_pool_is_opt_in(counting):
+    first = WorkflowManager(config())
+    second = WorkflowManager(config())
+
+    assert first.agents["validator"] is not second.agents["validator"]
+    assert isinstance(first.agents["worker"], CountingAgent)
+
+    pooled = config()
+    pooled["system_config"] = {"agent_pool": True}
+    with WorkflowManager(pooled) as third, WorkflowManager(pooled) as fourth:
+        assert third.agents["validator"] is fourth.agents["validator"]
+        assert isinstance(third.agents["worker"], WorkerAgent)
+
+
+def test_worker_agent_has_agent_attributes(counting):
+    entry = {"llm_config": "small"}
+    full = {**config(**entry), "system_config": {"name": "mas"}, "llm_configs": {"small": {"model": "m"}}}
+    manager = WorkflowManager(full, agent_pool=AgentPool())
+    worker = manager.agents["worker"]
+
+    assert isinstance(worker, WorkerAgent)
+    assert worker.sharing == "per_worker"
+    assert worker.system_config == {"name": "mas"}
+    assert worker.llm_config == {"model": "m"}
+    assert worker.result_cache is None
+    message = worker.create_message({"x": 1})
+    assert message["source_agent"] == "worker"
+    assert message["payload"] == {"x": 1}
+    manager.shutdown()
+
+
+def test_invalid_sharing_mode(counting):
+    with pytest.raises(ValueError, match="sharing must be one of"):
+        WorkflowManager(config(sharing="global"), agent_pool=AgentPool())
@@ -0,0 +1,73 @@
+"""Tests for the lazy agent registry and plugin discovery."""
+
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+from pathlib import Path
+
+import pytest
+
+from mas import agent_registry
+from mas.agent_registry import AgentRegistry, create_agent
+from mas.agents.document_reader import DocumentReader
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_paths_resolve_on_first_use():
+    registry = AgentRegistry({"reader": "mas.agents.document_reader:DocumentReader"})
+
+    assert registry["reader"] is DocumentReader
+    assert registry._entries["reader"] is DocumentReader
+
+
+def test_bad_import_path():
+    registry = AgentRegistry({"missing": "mas.agents.document_reader:Missing"})
+
+    with pytest.raises(ImportError, match="Cannot load agent type missing"):
+        registry["missing"]
+
+
+def test_entry_points_are_discovered_once(monkeypatch):
+    calls = []
+
+    def entry_points(group):
+        calls.append(group)
+        return [
+            EntryPoint("plugin_reader", "mas.agents.document_reader:DocumentReader", group),
+            EntryPoint("reader", "builtins:object", group),
+        ]
+
+    monkeypatch.setattr(agent_registry, "_entry_points", entry_points)
+    registry = AgentRegistry({"reader": DocumentReader})
+
+    assert "reader" in registry  # known types need no discovery
+    assert not calls
+    assert registry["plugin_reader"] is DocumentReader
+    assert registry["reader"] is DocumentReader  # plugins never replace registered types
+    assert "unknown" not in registry
+    assert calls == ["mas.agents"]
+
+
+def test_create_agent_registered_by_path(monkeypatch):
+    monkeypatch.setitem(agent_registry.AGENT_REGISTRY, "reader_alias", "mas.agents.document_reader:DocumentReader")
+
+    agent = create_agent({"id": "r", "type": "reader_alias", "config": {}})
+
+    assert isinstance(agent, DocumentReader)
+    with pytest.raises(ValueError, match="Unknown agent type: nope"):
+        create_agent({"type": "nope"})
+
+
+def test_document_workflows_do_not_import_numpy_or_jsonschema():
+    script = (
+        "import json, sys\n"
+        "from mas.workflow import WorkflowManager\n"
+        "with open('examples/document_processing/config.json') as f:\n"
+        "    WorkflowManager(json.load(f))\n"
+        "print('numpy' in sys.modules, 'jsonschema' in sys.modules)\n"
+    )
+
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.split() == ["False", "False"]
@@ -0,0 +1,80 @@
+"""Smoke tests for the benchmark suite."""
+
+import json
+
+import benchmarks.run
+from benchmarks.payloads import document_payload, nested_payload, sensor_payload
+from benchmarks.run import compare, main, parse_args, run_suite
+
+
+def test_payloads_are_deterministic():
+    assert sensor_payload(50, 5, seed=1) == sensor_payload(50, 5, seed=1)
+    assert len(sensor_payload(50, 5)["data"]) == 50
+    assert len({r["name"] for r in sensor_payload(500, 5)["data"]}) == 5
+    assert len(document_payload(300)["text"]) == 300
+    assert "child_0" in nested_payload(depth=2)["nested_data"]
+
+
+def test_run_suite_reports_throughput_and_latency():
+    args = parse_args(["--records", "20", "--iterations", "5", "--warmup", "1",
+                       "--only", "agent.", "--only", "workflow.document_processing"])
+
+    report = run_suite(args)
+
+    assert set(report["results"]) == {
+        "agent.data_validator.process_message",
+        "agent.data_transformer.process_message",
+        "agent.data_aggregator.process_message",
+        "agent.data_formatter.process_message",
+        "workflow.document_processing.start_workflow",
+    }
+    result = report["results"]["agent.data_aggregator.process_message"]
+    assert result["calls"] == 5
+    assert result["records"] == 100
+    assert result["records_per_sec"] > 0
+    assert result["latency_us"]["p99"] >= result["latency_us"]["p50"]
+    assert report["meta"]["parameters"]["records"] == 20
+    assert compare(report, report)[0].endswith("throughput x1.00, p99 x1.00")
+
+
+def test_main_writes_json(tmp_path):
+    output = tmp_path / "results.json"
+
+    main(["--iterations", "2", "--warmup", "0", "--only", "schema.", "--output", str(output)])
+
+    results = json.loads(output.read_text())["results"]
+    assert set(results) == {"schema.envelope.full", "schema.envelope.fast", "schema.data_pipeline_input"}
+
+
+def test_startup_benchmarks_run_in_fresh_interpreters():
+    args = parse_args(["--startup-runs", "2", "--only", "startup.import_mas", "--only", "document_processing.workflow"])
+
+    results = run_suite(args)["results"]
+
+    assert set(results) == {"startup.import_mas", "startup.document_processing.workflow_manager"}
+    assert results["startup.import_mas"]["calls"] == 2
+
+
+def test_skipped_agent_benchmarks_do_no_setup(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("set up a skipped benchmark")
+    monkeypatch.setattr(benchmarks.run, "WorkflowManager", fail)
+
+    results = run_suite(parse_args(["--iterations", "2", "--warmup", "0", "--only", "schema.envelope.fast"]))["results"]
+
+    assert set(results) == {"schema.envelope.fast"}
+
+
+def test_formatter_throughput_counts_groups_and_setup_errors_are_recorded(monkeypatch):
+    args = parse_args(["--records", "40", "--groups", "4", "--iterations", "3", "--warmup", "0",
+                       "--only", "agent.data_formatter", "--only", "workflow.data_pipeline"])
+
+    assert run_suite(args)["results"]["agent.data_formatter.process_message"]["records"] == 3 * 4
+
+    def missing_config(name):
+        raise FileNotFoundError(name)
+    monkeypatch.setattr(benchmarks.run, "load_config", missing_config)
+    results = run_suite(args)["results"]
+
+    assert results["agent.data_formatter.process_message"] == {"error": "FileNotFoundError: data_pipeline"}
+    assert "error" in results["workflow.data_pipeline.start_workflow"]
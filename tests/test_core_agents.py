@@ -0,0 +1,162 @@
+"""Tests for the core starter, processor, end and error handler agents."""
+
+import copy
+import inspect
+import json
+from pathlib import Path
+
+import pytest
+
+from mas.agent import Agent
+from mas.agent_registry import AGENT_REGISTRY, create_agent
+from mas.agents.end_agent import EndAgent
+from mas.agents.error_handler import ErrorHandlerAgent
+from mas.agents.processor_agent import ProcessorAgent, transform_path, transform_strings
+from mas.agents.starter_agent import StarterAgent
+from mas.workflow import WorkflowManager
+
+ROOT = Path(__file__).parent.parent
+
+NESTED = {
+    "text_data": "Hello",
+    "numbers": [1, 2, 3],
+    "nested": {"text": "nested text", "number": 42, "list": ["a", "B"]},
+    "mixed": [{"x": "y"}, {"n": 1}],
+}
+
+
+def test_transform_strings_copies_only_changed_containers():
+    data = copy.deepcopy(NESTED)
+    original = copy.deepcopy(data)
+
+    result = transform_strings(data, str.upper)
+
+    assert result == {
+        "text_data": "HELLO",
+        "numbers": [1, 2, 3],
+        "nested": {"text": "NESTED TEXT", "number": 42, "list": ["A", "B"]},
+        "mixed": [{"x": "Y"}, {"n": 1}],
+    }
+    assert data == original
+    assert result["numbers"] is data["numbers"]
+    assert result["mixed"][1] is data["mixed"][1]
+
+
+def test_transform_strings_in_place():
+    data = copy.deepcopy(NESTED)
+
+    result = transform_strings(data, str.lower, in_place=True)
+
+    assert result is data
+    assert data["nested"]["list"] == ["a", "b"]
+
+
+def test_transform_strings_handles_deep_nesting():
+    data = "leaf"
+    for _ in range(5000):
+        data = {"child": [data]}
+
+    result = transform_strings(data, str.upper)
+
+    for _ in range(5000):
+        result = result["child"][0]
+    assert result == "LEAF"
+
+
+def test_transform_path_restricts_traversal():
+    data = copy.deepcopy(NESTED)
+
+    result = transform_path(data, ("nested", "list"), str.upper)
+    result = transform_path(result, ("mixed", "x"), str.upper)
+
+    assert result["nested"]["list"] == ["A", "B"]
+    assert result["nested"]["text"] == "nested text"
+    assert result["mixed"][0] == {"x": "Y"}
+    assert result["text_data"] == "Hello"
+    assert data == NESTED
+
+
+def load_config():
+    with open(ROOT / "config.json", "r") as f:
+        return json.load(f)
+
+
+def test_core_agent_types_are_registered():
+    assert AGENT_REGISTRY["starter"] is StarterAgent
+    assert AGENT_REGISTRY["processor"] is ProcessorAgent
+    assert AGENT_REGISTRY["end"] is EndAgent
+    assert AGENT_REGISTRY["error_handler"] is ErrorHandlerAgent
+
+
+def test_system_and_llm_config_are_injected():
+    config = load_config()
+
+    agent = create_agent(config["agents"]["data_processor_1"], config["system_config"], config["llm_configs"])
+
+    assert agent.config["transformation_type"] == "uppercase"
+    assert agent.transformation_type == "uppercase"
+    assert agent.system_config["environment"] == "development"
+    assert agent.llm_config == config["llm_configs"]["claude_3_large"]
+    assert agent.max_retries == 3
+
+
+def test_unknown_llm_config_fails_at_startup():
+    config = load_config()
+    config["agents"]["workflow_completer"]["llm_config"] = "missing"
+
+    with pytest.raises(ValueError, match="Unknown llm_config for agent completer_001: missing"):
+        WorkflowManager(config, agent_pool=None)
+
+
+def test_two_argument_constructors_still_work(monkeypatch):
+    class PlainAgent(Agent):
+        def __init__(self, agent_id, config):
+            super().__init__(agent_id, config)
+
+        def process_message(self, message):
+            return message
+
+    monkeypatch.setitem(AGENT_REGISTRY, "plain", PlainAgent)
+
+    agent = create_agent({"id": "p", "type": "plain", "llm_config": {"model": "m"}}, {"name": "mas"})
+
+    assert agent.system_config == {"name": "mas"}
+    assert agent.llm_config == {"model": "m"}
+
+
+@pytest.mark.parametrize("agent_type", list(AGENT_REGISTRY))
+def test_builtin_agents_take_system_and_llm_config(agent_type):
+    agent = create_agent(
+        {"id": agent_type, "type": agent_type, "config": {}, "llm_config": {"model": "m"}},
+        {"name": "mas"}
+    )
+
+    assert agent.system_config == {"name": "mas"}
+    assert agent.llm_config == {"model": "m"}
+    assert "llm_config" in inspect.signature(type(agent).__init__).parameters
+
+
+def test_main_workflow_runs():
+    manager = WorkflowManager(load_config())
+
+    result = manager.start_workflow("main_workflow", copy.deepcopy(NESTED))
+
+    assert result["data"]["nested"]["text"] == "NESTED TEXT"
+    assert result["metadata"]["processing_info"]["processed_by"] == "processor_001"
+    assert result["workflow_context"]["status"] == "completed"
+    assert "error_handling" not in result["metadata"]
+
+
+def test_main_workflow_routes_failures_through_error_handler(monkeypatch):
+    manager = WorkflowManager(load_config())
+
+    def fail(message):
+        raise RuntimeError("processing failed")
+
+    monkeypatch.setattr(manager.get_plan("main_workflow").stages[1].runner, "run", fail)
+
+    result = manager.start_workflow("main_workflow", {"text": "x"})
+
+    assert result["workflow_context"]["recovery_status"] == "retrying"
+    assert result["workflow_context"]["retry_count"] == 1
+    assert result["metadata"]["completion_info"]["completed_by"] == "completer_001"
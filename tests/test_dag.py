@@ -0,0 +1,174 @@
+"""Tests for DAG workflows with parallel branches."""
+
+import asyncio
+import time
+
+import pytest
+
+from mas.agent import Agent
+from mas.dag import merge_outputs, topological_order
+from mas.workflow import WorkflowManager
+
+
+class TagAgent(Agent):
+    """Adds ``{tag: True}`` after an optional delay; fails on ``fail_on`` ids."""
+
+    def process_message(self, message):
+        time.sleep(self.config.get("delay", 0))
+        if message.get("id") in self.config.get("fail_on", ()):
+            raise RuntimeError(f"{self.agent_id} failed")
+        message.setdefault("seen", []).append(self.agent_id)
+        return {**message, self.agent_id: True}
+
+
+def dag_manager(stages, agents, merge=None):
+    definition = {"stages": stages}
+    if merge:
+        definition["merge"] = merge
+    config = {
+        "agents": {name: {"id": name, "type": "document_reader", "config": {}} for name in agents},
+        "workflow_definitions": {"dag": definition}
+    }
+    manager = WorkflowManager(config)
+    for name, agent_config in agents.items():
+        manager.agents[name] = TagAgent(name, agent_config)
+    manager.compile_workflows()
+    return manager
+
+
+DIAMOND = [
+    {"name": "join", "agent": "join", "depends_on": ["left", "right"]},
+    {"name": "left", "agent": "left", "depends_on": "split"},
+    {"name": "right", "agent": "right", "depends_on": "split"},
+    {"name": "split", "agent": "split"},
+]
+
+
+def diamond_manager(delay=0.0, fail_on=()):
+    return dag_manager(DIAMOND, {
+        "split": {},
+        "left": {"delay": delay, "fail_on": fail_on},
+        "right": {"delay": delay},
+        "join": {},
+    })
+
+
+def test_topological_order_keeps_definition_order():
+    order = topological_order({"c": ("a",), "b": (), "a": (), "d": ("c", "b")})
+
+    assert order == ["b", "a", "c", "d"]
+
+
+def test_cycles_and_bad_dependencies_fail_at_startup():
+    with pytest.raises(ValueError, match="cycle"):
+        dag_manager([
+            {"name": "a", "agent": "a", "depends_on": "b"},
+            {"name": "b", "agent": "a", "depends_on": "a"},
+        ], {"a": {}})
+    with pytest.raises(ValueError, match="unknown stage"):
+        dag_manager([{"name": "a", "agent": "a", "depends_on": "missing"}], {"a": {}})
+    with pytest.raises(ValueError, match="next_stage"):
+        dag_manager([
+            {"name": "a", "agent": "a"},
+            {"name": "b", "agent": "a", "depends_on": "a", "next_stage": "a"},
+        ], {"a": {}})
+    with pytest.raises(ValueError, match="merge"):
+        dag_manager([{"name": "a", "agent": "a", "depends_on": [], "merge": "zip"}], {"a": {}})
+
+
+def test_merge_strategies():
+    outputs = [{"a": 1, "n": {"x": 1}}, {"b": 2, "n": {"y": 2}}]
+
+    assert merge_outputs("update", ["l", "r"], outputs) == {"a": 1, "b": 2, "n": {"y": 2}}
+    assert merge_outputs("deep", ["l", "r"], outputs) == {"a": 1, "b": 2, "n": {"x": 1, "y": 2}}
+    assert merge_outputs("keyed", ["l", "r"], outputs) == {"l": outputs[0], "r": outputs[1]}
+    assert merge_outputs("list", ["l", "r"], outputs) == outputs
+
+
+def test_plan_orders_stages_by_dependency():
+    plan = diamond_manager().get_plan("dag")
+
+    assert plan.dag
+    assert [stage.name for stage in plan.stages] == ["split", "left", "right", "join"]
+    assert plan.dependents["split"] == ("left", "right")
+    assert plan.sinks == ("join",)
+
+
+def test_branches_run_concurrently_on_isolated_copies():
+    manager = diamond_manager(delay=0.1)
+
+    start = time.perf_counter()
+    result = manager.start_workflow("dag", {"id": 0})
+    elapsed = time.perf_counter() - start
+
+    assert result["split"] and result["left"] and result["right"] and result["join"]
+    # Each branch saw only its own appends; "update" keeps the later branch's list
+    assert result["seen"] == ["split", "right", "join"]
+    assert elapsed < 0.18
+
+
+def test_latency_follows_the_critical_path():
+    # a and b -> c run side by side, so d starts after 0.2s, not 0.4s
+    manager = dag_manager([
+        {"name": "b", "agent": "b"},
+        {"name": "a", "agent": "a"},
+        {"name": "c", "agent": "c", "depends_on": "b"},
+        {"name": "d", "agent": "d", "depends_on": ["a", "c"]},
+    ], {"b": {}, "a": {"delay": 0.2}, "c": {"delay": 0.2}, "d": {}})
+
+    start = time.perf_counter()
+    result = manager.start_workflow("dag", {"id": 0})
+    elapsed = time.perf_counter() - start
+
+    assert result["a"] and result["c"] and result["d"]
+    assert elapsed < 0.35
+
+
+def test_multiple_sinks_are_keyed_by_stage():
+    manager = dag_manager([
+        {"name": "root", "agent": "root"},
+        {"name": "a", "agent": "a", "depends_on": "root"},
+        {"name": "b", "agent": "b", "depends_on": "root"},
+    ], {"root": {}, "a": {}, "b": {}})
+
+    result = manager.start_workflow("dag", {"id": 0})
+
+    assert set(result) == {"a", "b"}
+    assert result["a"]["a"] and not result["a"].get("b")
+
+
+def test_failed_branch_raises():
+    manager = diamond_manager(fail_on=(1,))
+
+    with pytest.raises(RuntimeError, match="left failed"):
+        manager.start_workflow("dag", {"id": 1})
+
+
+def test_batch_matches_single_runs():
+    manager = diamond_manager(fail_on=(1,))
+
+    results = manager.start_workflow_batch("dag", [{"id": i} for i in range(3)])
+
+    assert results[0] == manager.start_workflow("dag", {"id": 0})
+    assert isinstance(results[1], RuntimeError)
+    assert results[2]["join"] and results[2]["id"] == 2
+
+
+def test_async_branches_run_concurrently():
+    manager = diamond_manager(delay=0.1)
+
+    start = time.perf_counter()
+    result = asyncio.run(manager.astart_workflow("dag", {"id": 0}))
+    elapsed = time.perf_counter() - start
+
+    assert result["left"] and result["right"] and result["join"]
+    assert elapsed < 0.18
+
+
+def test_stream_runs_dag_per_payload():
+    manager = diamond_manager(fail_on=(1,))
+
+    results = list(manager.stream("dag", ({"id": i} for i in range(3))))
+
+    assert results[0]["join"] and results[2]["join"]
+    assert isinstance(results[1], RuntimeError)
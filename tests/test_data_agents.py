@@ -0,0 +1,167 @@
+"""Tests for the data pipeline agents."""
+
+import numpy as np
+import pytest
+
+from mas.agents.data_aggregator import DataAggregator
+from mas.agents.data_transformer import DataTransformer
+
+
+def make_transformer(**normalization):
+    return DataTransformer("transformer", {
+        "transformation_type": "normalize",
+        "normalization": normalization
+    })
+
+
+def records(*values):
+    return {"data": [{"name": "x", "value": v} for v in values]}
+
+
+@pytest.mark.parametrize("method, expected", [
+    ("min_max", [0.0, 0.25, 1.0]),
+    ("z_score", list((np.array([1.0, 2.0, 5.0]) - 8 / 3) / np.std([1.0, 2.0, 5.0]))),
+    ("robust", [-0.5, 0.0, 1.5]),
+    ("log", list(np.log1p([1.0, 2.0, 5.0]))),
+])
+def test_normalize_methods(method, expected):
+    result = make_transformer(method=method).process_message(records(1.0, 2.0, 5.0))
+
+    assert [item["normalized_value"] for item in result["data"]] == pytest.approx(expected)
+
+
+def test_normalize_clip_to_target_range():
+    result = make_transformer(method="clip", target_range=[0, 3]).process_message(records(-1.0, 2.0, 5.0))
+
+    assert [item["normalized_value"] for item in result["data"]] == [0.0, 2.0, 3.0]
+
+
+def test_normalize_constant_values():
+    result = make_transformer(method="min_max", target_range=[2, 4]).process_message(records(3.0, 3.0))
+
+    assert [item["normalized_value"] for item in result["data"]] == [2.0, 2.0]
+
+
+def test_normalize_column_output():
+    message = records(0.0, 5.0, 10.0)
+    result = make_transformer(method="min_max", output="column").process_message(message)
+
+    np.testing.assert_allclose(result["normalized_values"], [0.0, 0.5, 1.0])
+    assert "normalized_value" not in result["data"][0]
+
+
+def make_aggregator(method, group_by="name"):
+    return DataAggregator("aggregator", {"aggregation": {"method": method, "group_by": group_by}})
+
+
+def grouped_records(rng, n_groups=7, size=500):
+    names = rng.integers(0, n_groups, size=size)
+    values = rng.normal(size=size)
+    return {"data": [{"name": f"g{n}", "value": float(v)} for n, v in zip(names, values)]}
+
+
+@pytest.mark.parametrize("method, reference", [
+    ("mean", np.mean),
+    ("median", np.median),
+    ("sum", np.sum),
+    ("min", np.min),
+    ("max", np.max),
+    ("std", np.std),
+    ("var", np.var),
+    ("count", len),
+    ("p90", lambda v: np.percentile(v, 90)),
+    ("first", lambda v: v[0]),
+    ("last", lambda v: v[-1]),
+])
+def test_aggregate_matches_numpy(method, reference):
+    message = grouped_records(np.random.default_rng(0))
+    groups = {}
+    for item in message["data"]:
+        groups.setdefault(item["name"], []).append(item["value"])
+
+    result = make_aggregator(method).process_message(message)
+
+    assert list(result["aggregates"]) == list(groups)
+    for name, values in groups.items():
+        assert result["aggregates"][name] == pytest.approx(reference(values))
+
+
+def test_aggregate_several_methods():
+    message = {"data": [
+        {"name": "a", "value": 1.0},
+        {"name": "b", "value": 4.0},
+        {"name": "a", "value": 3.0},
+    ]}
+
+    result = make_aggregator(["count", "mean", "max"]).process_message(message)
+
+    assert result == {"aggregates": {
+        "a": {"count": 2, "mean": 2.0, "max": 3.0},
+        "b": {"count": 1, "mean": 4.0, "max": 4.0},
+    }}
+
+
+def test_aggregate_errors():
+    with pytest.raises(ValueError, match="Unknown aggregation method"):
+        make_aggregator("mode").process_message({"data": [{"name": "a", "value": 1}]})
+    with pytest.raises(ValueError, match="Missing group key"):
+        make_aggregator("mean").process_message({"data": [{"value": 1}]})
+
+
+def make_streaming_aggregator(method, **options):
+    return DataAggregator("aggregator", {"aggregation": {
+        "mode": "streaming", "method": method, "group_by": "name", **options
+    }})
+
+
+def test_streaming_matches_batch():
+    rng = np.random.default_rng(1)
+    messages = [grouped_records(rng, size=200) for _ in range(5)]
+    methods = ["count", "sum", "mean", "min", "max", "std", "median"]
+    agent = make_streaming_aggregator(methods)
+
+    for message in messages:
+        assert agent.process_message(message)["window"]["complete"] is False
+    streamed = agent.flush()["aggregates"]
+
+    combined = {"data": [item for message in messages for item in message["data"]]}
+    expected = make_aggregator(methods).process_message(combined)["aggregates"]
+
+    assert streamed.keys() == expected.keys()
+    for name, stats in expected.items():
+        for method in ["count", "sum", "mean", "min", "max", "std"]:
+            assert streamed[name][method] == pytest.approx(stats[method])
+        assert streamed[name]["median"] == pytest.approx(stats["median"], rel=0.05, abs=0.05)
+
+
+def test_streaming_window_boundary():
+    agent = make_streaming_aggregator("sum", window_messages=2)
+
+    first = agent.process_message({"data": [{"name": "a", "value": 1.0}]})
+    second = agent.process_message({"data": [{"name": "a", "value": 2.0}]})
+    third = agent.process_message({"data": [{"name": "a", "value": 5.0}], "flush": True})
+
+    assert first["aggregates"] == {}
+    assert second["aggregates"] == {"a": 3.0}
+    assert third["aggregates"] == {"a": 5.0}
+
+
+def test_streaming_partial_states_merge():
+    shard_a = make_streaming_aggregator(["count", "mean", "var"], emit_state=True)
+    shard_b = make_streaming_aggregator(["count", "mean", "var"], emit_state=True)
+    shard_a.process_message({"data": [{"name": "a", "value": 1.0}, {"name": "b", "value": 2.0}]})
+    shard_b.process_message({"data": [{"name": "a", "value": 3.0}]})
+
+    combiner = make_streaming_aggregator(["count", "mean", "var"])
+    combiner.merge_state(shard_a.flush()["state"])
+    combiner.merge_state(shard_b.state)
+
+    assert combiner.flush()["aggregates"] == {
+        "a": {"count": 2, "mean": 2.0, "var": 1.0},
+        "b": {"count": 1, "mean": 2.0, "var": 0.0},
+    }
+
+
+def test_streaming_rejects_order_methods():
+    with pytest.raises(ValueError, match="streaming"):
+        make_streaming_aggregator("first").process_message({"data": []})
@@ -0,0 +1,162 @@
+"""Tests for streaming documents through the document agents."""
+
+import pytest
+
+from mas.agents.document_processor import DocumentProcessor
+from mas.agents.document_reader import DocumentReader, iter_chunks, iter_lines
+from mas.agents.document_writer import DocumentWriter
+from mas.workflow import WorkflowManager
+
+TEXT = "first line\nsecond líne ✓\n\nlast line without newline"
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    return path
+
+
+def test_chunks_keep_multibyte_characters_intact(document):
+    chunks = list(iter_chunks(str(document), chunk_size=3))
+
+    assert "".join(chunks) == TEXT
+    assert all(len(chunk.encode()) <= 6 for chunk in chunks)
+
+
+def test_lines_keep_line_endings(document):
+    assert list(iter_lines(str(document))) == [
+        "first line\n", "second líne ✓\n", "\n", "last line without newline"
+    ]
+
+
+def test_empty_document(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+
+    assert list(iter_chunks(str(path))) == []
+    assert list(iter_lines(str(path))) == []
+
+
+def test_reader_streams_lazily_from_path(document):
+    reader = DocumentReader("reader", {
+        "input_validation": {"required_fields": ["text", "metadata"]},
+        "chunk_mode": "lines"
+    })
+
+    message = reader.process_message({"path": str(document), "metadata": {}})
+
+    assert next(message["chunks"]) == "first line\n"
+    with pytest.raises(ValueError, match="Missing required field: metadata"):
+        reader.process_message({"path": str(document)})
+    with pytest.raises(ValueError, match="Document not found"):
+        reader.process_message({"path": str(document) + ".missing", "metadata": {}})
+
+
+def test_processor_transforms_chunks_and_text():
+    processor = DocumentProcessor("processor", {"transformation_type": "uppercase"})
+
+    assert list(processor.process_message({"chunks": iter(["ab", "c"])})["chunks"]) == ["AB", "C"]
+    assert processor.process_message({"text": "ab"})["text"] == "AB"
+
+
+def test_processor_reverses_whole_streamed_text():
+    processor = DocumentProcessor("processor", {"transformation_type": "reverse"})
+
+    assert "".join(processor.process_message({"chunks": iter(["ab", "cd\n", "e"])})["chunks"]) == "e\ndcba"
+
+
+def test_writer_requires_output_path_for_chunks():
+    with pytest.raises(ValueError, match="output_path"):
+        DocumentWriter("writer", {}).process_message({"chunks": iter(["a"])})
+    assert DocumentWriter("writer", {}).process_message({"text": "a"}) == {"text": "a"}
+
+
+def test_workflow_streams_document_to_file(document, tmp_path):
+    output = tmp_path / "output.txt"
+    config = {
+        "agents": {
+            "reader": {"id": "reader", "type": "document_reader", "config": {"chunk_size": 4}},
+            "processor": {"id": "processor", "type": "document_processor",
+                          "config": {"transformation_type": "uppercase"}},
+            "writer": {"id": "writer", "type": "document_writer", "config": {"output_path": str(output)}}
+        },
+        "workflow_definitions": {"documents": {"stages": [
+            {"name": "read", "agent": "reader"},
+            {"name": "process", "agent": "processor"},
+            {"name": "write", "agent": "writer"}
+        ]}}
+    }
+
+    with WorkflowManager(config) as manager:
+        result = manager.start_workflow("documents", {"path": str(document)})
+
+    assert output.read_text(encoding="utf-8") == TEXT.upper()
+    assert "chunks" not in result
+    assert result["output_path"] == str(output)
+    assert result["bytes_written"] == len(TEXT.upper().encode())
+    assert result["chunks_written"] > 1
+
+
+def document_config(stages, agents):
+    return {
+        "system_config": {"executors": {"process": {"max_workers": 1}}},
+        "agents": {name: {"id": name, **agent} for name, agent in agents.items()},
+        "workflow_definitions": {"documents": {"stages": stages}}
+    }
+
+
+class FlakyWriter(DocumentWriter):
+    """Fails once, after writing the first chunk."""
+
+    failed = False
+
+    def _write(self, path, chunks):
+        def fail_once():
+            for count, chunk in enumerate(chunks):
+                if count == 1 and not FlakyWriter.failed:
+                    FlakyWriter.failed = True
+                    raise OSError("disk hiccup")
+                yield chunk
+        return super()._write(path, fail_once())
+
+
+def test_retried_writer_writes_whole_stream(document, tmp_path, monkeypatch):
+    output = tmp_path / "output.txt"
+    monkeypatch.setattr(FlakyWriter, "failed", False)
+    config = document_config([
+        {"name": "read", "agent": "reader"},
+        {"name": "write", "agent": "writer", "max_retries": 1, "retry_delay": 0},
+    ], {
+        "reader": {"type": "document_reader", "config": {"chunk_size": 4}},
+        "writer": {"type": "document_writer", "config": {"output_path": str(output)}},
+    })
+
+    with WorkflowManager(config, agent_pool=None) as manager:
+        manager.agents["writer"] = FlakyWriter("writer", {"output_path": str(output)})
+        manager.compile_workflows()
+        result = manager.start_workflow("documents", {"path": str(document)})
+
+    assert FlakyWriter.failed
+    assert output.read_text(encoding="utf-8") == TEXT
+    assert result["bytes_written"] == len(TEXT.encode())
+
+
+def test_streams_cross_processes_and_fan_out(document, tmp_path):
+    config = document_config([
+        {"name": "read", "agent": "reader"},
+        {"name": "process", "agent": "processor", "executor": "process", "depends_on": "read"},
+        {"name": "write_a", "agent": "writer_a", "depends_on": "process"},
+        {"name": "write_b", "agent": "writer_b", "depends_on": "process"},
+    ], {
+        "reader": {"type": "document_reader", "config": {"chunk_mode": "lines"}},
+        "processor": {"type": "document_processor", "config": {"transformation_type": "uppercase"}},
+        "writer_a": {"type": "document_writer", "config": {"output_path": str(tmp_path / "a.txt")}},
+        "writer_b": {"type": "document_writer", "config": {"output_path": str(tmp_path / "b.txt")}},
+    })
+
+    with WorkflowManager(config, agent_pool=None) as manager:
+        manager.start_workflow("documents", {"path": str(document)})
+
+    assert (tmp_path / "a.txt").read_text(encoding="utf-8") == TEXT.upper()
+    assert (tmp_path / "b.txt").read_text(encoding="utf-8") == TEXT.upper()
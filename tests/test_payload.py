@@ -0,0 +1,175 @@
+"""Tests for copy-on-write payload views."""
+
+import copy
+import json
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from mas.agent import Agent
+from mas.agent_registry import AGENT_REGISTRY
+from mas.payload import CowDict, CowList, cow, thaw
+from mas.sinks import create_sink, read_records
+from mas.workflow import WorkflowManager
+
+ROOT = Path(__file__).parent.parent
+
+
+def nested_payload():
+    return {
+        "data": [{"name": "a", "value": 1}, {"name": "b", "value": 2}],
+        "meta": {"source": {"id": 7}, "tags": ["x", "y"]},
+    }
+
+
+def test_reads_copy_nothing():
+    payload = nested_payload()
+    view = cow(payload)
+
+    assert view["data"][1]["value"] == 2
+    assert view["meta"]["source"] is view["meta"]["source"]
+    assert dict(view["meta"]["source"]) == {"id": 7}
+    assert view == payload
+    assert thaw(view) is payload
+
+
+def test_writes_copy_only_their_path():
+    payload = nested_payload()
+    expected = copy.deepcopy(payload)
+    view = cow(payload)
+
+    view["data"][1]["value"] = 20
+    view["meta"]["tags"].append("z")
+    del view["meta"]["source"]["id"]
+    result = thaw(view)
+
+    assert payload == expected
+    assert result["data"][1] == {"name": "b", "value": 20}
+    assert result["data"][0] is payload["data"][0]
+    assert result["meta"]["tags"] == ["x", "y", "z"]
+    assert result["meta"]["source"] == {}
+
+
+def test_list_operations():
+    payload = {"items": [{"n": 3}, {"n": 1}, {"n": 2}]}
+    view = cow(payload)
+    items = view["items"]
+
+    items.sort(key=lambda item: item["n"])
+    items.insert(0, {"n": 0})
+    items[-1]["n"] = 30
+    assert [item["n"] for item in items[1:]] == [1, 2, 30]
+    assert items.pop(0) == {"n": 0}
+
+    assert thaw(view) == {"items": [{"n": 1}, {"n": 2}, {"n": 30}]}
+    assert payload == {"items": [{"n": 3}, {"n": 1}, {"n": 2}]}
+
+
+def test_assigned_values_holding_views_are_thawed():
+    payload = nested_payload()
+    view = cow(payload)
+
+    view["copy"] = {"meta": view["meta"], "first": [view["data"][0]]}
+    view["meta"]["source"]["id"] = 8
+    result = thaw(view)
+
+    assert result["copy"]["first"][0] is payload["data"][0]
+    assert result["copy"]["meta"] == {"source": {"id": 8}, "tags": ["x", "y"]}
+    assert type(result["copy"]["meta"]) is dict
+    assert payload["meta"]["source"] == {"id": 7}
+
+
+def test_copies_are_independent_views():
+    payload = nested_payload()
+    view = cow(payload)
+    view["meta"]["source"]["id"] = 8
+
+    duplicate = copy.deepcopy(view)
+    duplicate["meta"]["source"]["id"] = 9
+
+    assert isinstance(duplicate, CowDict)
+    assert view["meta"]["source"]["id"] == 8
+    assert payload["meta"]["source"]["id"] == 7
+
+
+def test_pickles_as_plain_data():
+    view = cow(nested_payload())
+    view["data"].append({"name": "c", "value": 3})
+
+    loaded = pickle.loads(pickle.dumps(view))
+
+    assert type(loaded) is dict
+    assert type(loaded["data"]) is list
+    assert loaded["data"][2] == {"name": "c", "value": 3}
+    assert isinstance(view["data"], CowList)
+
+
+def test_sinks_write_views(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    view = cow(nested_payload())
+    view["meta"]["source"]["id"] = 8
+
+    with create_sink({"path": path}) as sink:
+        sink.write({"wrapped": view["meta"]})
+
+    assert list(read_records(path)) == [{"wrapped": {"source": {"id": 8}, "tags": ["x", "y"]}}]
+
+
+class TaggingAgent(Agent):
+    """Writes into nested parts of its input."""
+
+    sharing = "shared"
+
+    def process_message(self, message):
+        for item in message["data"]:
+            item["tag"] = self.agent_id
+        message["meta"]["source"]["seen"] = True
+        return message
+
+
+def tagging_config():
+    return {
+        "system_config": {"copy_on_write": True},
+        "agents": {"tagger": {"id": "tagger", "type": "tagger"}},
+        "workflow_definitions": {"tag": {"stages": [{"name": "tag", "agent": "tagger"}]}},
+    }
+
+
+def test_workflow_runs_never_modify_their_input(monkeypatch):
+    monkeypatch.setitem(AGENT_REGISTRY, "tagger", TaggingAgent)
+    payload = nested_payload()
+    expected = copy.deepcopy(payload)
+
+    with WorkflowManager(tagging_config(), agent_pool=None) as manager:
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda _: manager.start_workflow("tag", payload), range(8)))
+        batch = manager.start_workflow_batch("tag", [payload, payload])
+        streamed = list(manager.stream("tag", [payload]))
+
+    assert payload == expected
+    for result in results + batch + streamed:
+        assert type(result) is dict
+        assert [item["tag"] for item in result["data"]] == ["tagger", "tagger"]
+        assert result["meta"]["source"] == {"id": 7, "seen": True}
+        assert result["meta"]["tags"] is payload["meta"]["tags"]
+
+
+def test_data_pipeline_matches_without_copy_on_write():
+    with open(ROOT / "examples" / "data_pipeline" / "config.json", "r") as f:
+        config = json.load(f)
+    payload = {
+        "data": [{"name": "temperature", "value": 20.5}, {"name": "temperature", "value": 22.0}],
+        "schema_version": "1.0"
+    }
+    expected_input = copy.deepcopy(payload)
+
+    with WorkflowManager(copy.deepcopy(config), agent_pool=None) as manager:
+        expected = manager.start_workflow("data_pipeline", copy.deepcopy(payload))
+    config["system_config"] = {**config.get("system_config", {}), "copy_on_write": True}
+    with WorkflowManager(config, agent_pool=None) as manager:
+        result = manager.start_workflow("data_pipeline", payload)
+
+    assert payload == expected_input
+    expected.pop("metadata")
+    result.pop("metadata")
+    assert result == expected
@@ -0,0 +1,212 @@
+"""Tests for columnar record batches and the data agents that use them."""
+
+import copy
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from mas.agents.data_aggregator import DataAggregator
+from mas.agents.data_formatter import DataFormatter
+from mas.agents.data_transformer import DataTransformer
+from mas.agents.data_validator import DataValidator
+from mas.aggregation import factorize
+from mas.payload import json_default
+from mas.record_batch import RecordBatch
+from mas.sinks import read_records
+from mas.workflow import WorkflowManager
+
+ROOT = Path(__file__).parent.parent
+
+SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"name": {"type": "string"}, "value": {"type": "number"}},
+        "required": ["name", "value"]
+    }
+}
+
+
+def sensor_records(n=200, n_groups=5, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"name": f"sensor-{key}", "value": value}
+        for key, value in zip(rng.integers(0, n_groups, n).tolist(), rng.normal(10, 3, n).tolist())
+    ]
+
+
+def test_round_trip_keeps_types_and_missing_fields():
+    records = [
+        {"name": "a", "value": 1, "ok": True, "tags": ["x"], "big": 2 ** 70},
+        {"name": "b", "value": 2.5, "ok": False, "big": 1},
+        {"value": 3, "extra": None},
+    ]
+    batch = RecordBatch.from_records(records)
+
+    assert batch.to_records() == records
+    assert len(batch) == 3
+    assert batch.fields == ["name", "value", "ok", "tags", "big", "extra"]
+    assert batch.dictionaries["name"] == ["a", "b"]
+    assert batch.columns["name"].dtype == np.int32
+    assert batch.columns["value"].dtype == np.float64
+    assert batch.columns["ok"].dtype == bool
+    assert batch.columns["big"].dtype == object
+    assert batch.missing("name") and not batch.missing("value")
+    assert list(batch.column("name")) == ["a", "b", None]
+
+
+def test_columns_are_compact_and_read_only():
+    batch = RecordBatch.from_records(sensor_records(1000))
+
+    assert batch.nbytes == 1000 * (4 + 8)
+    with pytest.raises(ValueError):
+        batch.columns["value"][0] = 1.0
+
+
+def test_encoded_matches_factorize():
+    records = sensor_records()
+    batch = RecordBatch.from_records(records)
+
+    for field in ("name", "value"):
+        groups, codes = batch.encoded(field)
+        expected_groups, expected_codes = factorize([record[field] for record in records])
+        assert groups == expected_groups
+        assert codes.tolist() == expected_codes.tolist()
+
+
+def test_with_column_shares_other_columns():
+    batch = RecordBatch.from_records(sensor_records(10))
+
+    updated = batch.with_column("label", ["even" if i % 2 == 0 else "odd" for i in range(10)])
+
+    assert "label" not in batch
+    assert updated.columns["value"].base is batch.columns["value"].base
+    assert updated.dictionaries["label"] == ["even", "odd"]
+    with pytest.raises(ValueError, match="same length"):
+        batch.with_column("short", np.zeros(3))
+
+
+def test_validate_by_column():
+    batch = RecordBatch.from_records(sensor_records(10))
+
+    assert batch.validate(SCHEMA)
+    assert not batch.validate({**SCHEMA, "minItems": 1})
+    with pytest.raises(ValueError, match="is not of type 'string'"):
+        batch.validate({"items": {"properties": {"value": {"type": "string"}}}})
+    with pytest.raises(ValueError, match="is not one of"):
+        batch.validate({"items": {"properties": {"name": {"enum": ["sensor-0"]}}}})
+    with pytest.raises(ValueError, match="'unit' is a required property"):
+        batch.validate({"items": {"required": ["unit"]}})
+
+
+def test_validator_converts_and_checks_batches():
+    config = {
+        "columnar": True,
+        "input_validation": {"required_fields": ["data"], "schema": {"type": "object", "properties": {"data": SCHEMA}}}
+    }
+    validator = DataValidator("validator", config)
+    records = sensor_records(10)
+
+    result = validator.process_message({"data": records})
+    assert isinstance(result["data"], RecordBatch)
+    assert validator.process_message(result)["data"] is result["data"]
+
+    bad = {"data": RecordBatch.from_records([{"name": 1, "value": 2}])}
+    with pytest.raises(ValueError, match="Schema validation failed"):
+        validator.process_message(bad)
+
+
+@pytest.mark.parametrize("output", ["records", "column"])
+def test_transformer_matches_records(output):
+    transformer = DataTransformer("transformer", {
+        "transformation_type": "normalize",
+        "normalization": {"method": "z_score", "output": output}
+    })
+    records = sensor_records()
+
+    expected = transformer.process_message({"data": copy.deepcopy(records)})
+    result = transformer.process_message({"data": RecordBatch.from_records(records)})
+
+    if output == "records":
+        converted = result["data"].to_records()
+        assert [record["name"] for record in converted] == [record["name"] for record in expected["data"]]
+        assert ([record["normalized_value"] for record in converted]
+                == pytest.approx([record["normalized_value"] for record in expected["data"]]))
+    else:
+        np.testing.assert_allclose(result["normalized_values"], expected["normalized_values"])
+
+
+def test_aggregator_matches_records():
+    aggregator = DataAggregator("aggregator", {"aggregation": {"method": ["count", "mean", "p90", "first"]}})
+    records = sensor_records()
+
+    expected = aggregator.process_message({"data": records})
+    result = aggregator.process_message({"data": RecordBatch.from_records(records)})
+
+    assert list(result["aggregates"]) == list(expected["aggregates"])
+    for group, stats in expected["aggregates"].items():
+        assert result["aggregates"][group] == pytest.approx(stats)
+
+
+def test_streaming_aggregator_accepts_batches():
+    config = {"aggregation": {"mode": "streaming", "method": ["count", "sum"]}}
+    by_records = DataAggregator("a", config)
+    by_batch = DataAggregator("b", config)
+    records = sensor_records()
+
+    for chunk in (records[:120], records[120:]):
+        by_records.process_message({"data": chunk})
+        by_batch.process_message({"data": RecordBatch.from_records(chunk)})
+
+    expected = by_records.flush()["aggregates"]
+    result = by_batch.flush()["aggregates"]
+    assert list(result) == list(expected)
+    for group, stats in expected.items():
+        assert result[group] == pytest.approx(stats)
+
+
+def test_aggregator_missing_group_key():
+    aggregator = DataAggregator("aggregator", {"aggregation": {"method": "sum"}})
+
+    with pytest.raises(ValueError, match="Missing group key"):
+        aggregator.process_message({"data": RecordBatch.from_records([{"name": "a", "value": 1}, {"value": 2}])})
+
+
+def test_formatter_converts_at_the_edge(tmp_path):
+    batch = RecordBatch.from_records(sensor_records(10))
+
+    output = DataFormatter("formatter", {"include_metadata": False}).process_message({"data": batch})
+    assert output["data"] == batch.to_records()
+
+    path = str(tmp_path / "batches.bin")
+    formatter = DataFormatter("formatter", {"columnar": True, "sink": {"format": "binary", "path": path}})
+    assert formatter.process_message({"data": batch})["data"] is batch
+    formatter.close()
+    (record,) = read_records(path, "binary")
+    assert record["data"].to_records() == batch.to_records()
+
+
+def test_columnar_data_pipeline_matches_records():
+    with open(ROOT / "examples" / "data_pipeline" / "config.json", "r") as f:
+        config = json.load(f)
+    payload = {"data": sensor_records(), "schema_version": "1.0"}
+
+    with WorkflowManager(copy.deepcopy(config), agent_pool=None) as manager:
+        expected = manager.start_workflow("data_pipeline", copy.deepcopy(payload))
+    config["agents"]["data_validator"]["config"]["columnar"] = True
+    with WorkflowManager(config, agent_pool=None) as manager:
+        result = manager.start_workflow("data_pipeline", payload)
+
+    assert list(result["aggregates"]) == list(expected["aggregates"])
+    assert result["aggregates"] == pytest.approx(expected["aggregates"])
+
+
+def test_validate_skips_unsupported_types_and_formats_plain_values():
+    batch = RecordBatch.from_records([{"name": "a", "value": 1.5}])
+
+    assert not batch.validate({"items": {"properties": {"value": {"type": ["number", "null"]}}}})
+    with pytest.raises(ValueError, match=r"^1\.5 is not of type 'integer'$"):
+        batch.validate({"items": {"properties": {"value": {"type": "integer"}}}})
+    assert json.loads(json.dumps({"data": batch}, default=json_default)) == {"data": batch.to_records()}
@@ -0,0 +1,206 @@
+"""Tests for circuit breakers and admission control."""
+
+import threading
+
+import pytest
+
+from mas.agent import Agent
+from mas.resilience import AdmissionController, CircuitBreaker, CircuitOpenError, OverloadedError
+from mas.workflow import WorkflowManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_on_failure_rate():
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=10, minimum_calls=4)
+
+    for failures in (0, 1, 0):
+        assert breaker.allow()
+        breaker.record(1000, failures=failures)
+    assert breaker.state == "closed"
+
+    breaker.record(1000, failures=1)
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker(slow_call_duration=5, slow_call_rate_threshold=0.5, minimum_calls=2)
+
+    breaker.record(1_000_000)
+    breaker.record(6_000_000)
+
+    assert breaker.state == "open"
+
+
+def test_breaker_half_open_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(minimum_calls=1, open_duration=1000, half_open_calls=1, clock=clock)
+    breaker.record(1000, failures=1)
+    assert not breaker.allow()
+
+    clock.now = 1.0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record(1000, failures=1)
+    assert breaker.state == "open"
+
+    clock.now = 2.0
+    assert breaker.allow()
+    breaker.record(1000)
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["opened"] == 2
+
+
+def test_breaker_batch_keeps_failure_share():
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=10, minimum_calls=10)
+
+    breaker.record(1000, failures=40, calls=100)
+
+    assert breaker.snapshot()["failure_rate"] == 0.4
+    assert breaker.state == "closed"
+
+
+def test_admission_controller_sheds_excess():
+    admission = AdmissionController(2)
+
+    assert admission.acquire(3) == 2
+    with pytest.raises(OverloadedError):
+        with admission.slot():
+            pass
+    admission.release(2)
+    with admission.slot():
+        assert admission.in_flight == 1
+
+    assert admission.snapshot() == {"max_in_flight": 2, "in_flight": 0, "shed": 2}
+
+
+class FailingAgent(Agent):
+    def __init__(self, agent_id, config):
+        super().__init__(agent_id, config)
+        self.calls = 0
+        self.fail = True
+
+    def process_message(self, message):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("backend down")
+        return {**message, "ok": True}
+
+
+class FallbackAgent(Agent):
+    def process_message(self, message):
+        return {**message, "fallback": True}
+
+
+def breaker_manager(**stage_options):
+    config = {
+        "agents": {
+            "backend": {
+                "id": "backend", "type": "document_reader", "config": {},
+                "circuit_breaker": {"minimum_calls": 2, "window_size": 4, "open_duration": 60000}
+            },
+            "fallback": {"id": "fallback", "type": "document_reader", "config": {}}
+        },
+        "workflow_definitions": {"call": {"stages": [
+            {"name": "call", "agent": "backend", "error_stage": "fallback", **stage_options}
+        ]}}
+    }
+    manager = WorkflowManager(config)
+    manager.agents["backend"] = FailingAgent("backend", {})
+    manager.agents["fallback"] = FallbackAgent("fallback", {})
+    manager.compile_workflows()
+    return manager
+
+
+def test_open_breaker_routes_to_error_stage_without_calling_agent():
+    manager = breaker_manager()
+
+    results = [manager.start_workflow("call", {"id": i}) for i in range(5)]
+
+    assert all(r["fallback"] for r in results)
+    assert manager.agents["backend"].calls == 2
+    health = manager.health()["circuit_breakers"]["backend"]
+    assert health["state"] == "open"
+    assert health["rejected"] == 3
+
+
+def test_open_breaker_is_not_retried():
+    manager = breaker_manager(max_retries=5, retry_delay=1)
+    manager.workflow_definitions["call"]["stages"][0].pop("error_stage")
+    manager.compile_workflows()
+
+    # The breaker opens after two failed attempts, which ends the retries
+    with pytest.raises(CircuitOpenError):
+        manager.start_workflow("call", {"id": 0})
+    with pytest.raises(CircuitOpenError):
+        manager.start_workflow("call", {"id": 1})
+
+    assert manager.agents["backend"].calls == 2
+
+
+def test_open_breaker_rejects_batch():
+    manager = breaker_manager()
+    manager.start_workflow_batch("call", [{"id": 0}, {"id": 1}])
+
+    results = manager.start_workflow_batch("call", [{"id": i} for i in range(3)])
+
+    assert all(r["fallback"] for r in results)
+    assert manager.agents["backend"].calls == 2
+
+
+def test_start_workflow_sheds_beyond_max_in_flight():
+    release = threading.Event()
+    entered = threading.Barrier(3)
+
+    class BlockingAgent(Agent):
+        def process_message(self, message):
+            entered.wait()
+            release.wait()
+            return message
+
+    config = {
+        "system_config": {"max_in_flight": 2},
+        "agents": {"reader": {"id": "reader", "type": "document_reader", "config": {}}},
+        "workflow_definitions": {"block": {"stages": [{"name": "block", "agent": "reader"}]}}
+    }
+    manager = WorkflowManager(config)
+    manager.agents["reader"] = BlockingAgent("block", {})
+    manager.compile_workflows()
+
+    threads = [threading.Thread(target=manager.start_workflow, args=("block", {})) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    entered.wait()
+
+    with pytest.raises(OverloadedError):
+        manager.start_workflow("block", {})
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert manager.health()["admission"] == {"max_in_flight": 2, "in_flight": 0, "shed": 1}
+
+
+def test_batch_sheds_items_beyond_max_in_flight():
+    config = {
+        "system_config": {"max_in_flight": 2},
+        "agents": {"reader": {"id": "reader", "type": "document_reader", "config": {}}},
+        "workflow_definitions": {"read": {"stages": [{"name": "read", "agent": "reader"}]}}
+    }
+    manager = WorkflowManager(config)
+
+    results = manager.start_workflow_batch("read", [{"id": i} for i in range(3)])
+
+    assert results[:2] == [{"id": 0}, {"id": 1}]
+    assert isinstance(results[2], OverloadedError)
+    assert manager.health()["admission"]["in_flight"] == 0
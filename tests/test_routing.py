@@ -0,0 +1,201 @@
+"""Tests for next_stage/error_stage routing and conditional edges."""
+
+import asyncio
+
+import pytest
+
+from mas.agent import Agent
+from mas.routing import compile_condition, compile_route
+from mas.workflow import WorkflowManager
+
+
+class StepAgent(Agent):
+    """Records its id in ``path``, adds ``add`` to ``n`` and fails on ``fail_on`` ids."""
+
+    def process_message(self, message):
+        if message.get("id") in self.config.get("fail_on", ()):
+            raise RuntimeError(f"{self.agent_id} failed")
+        return {
+            **message,
+            "path": message.get("path", []) + [self.agent_id],
+            "n": message.get("n", 0) + self.config.get("add", 0)
+        }
+
+
+def routed_manager(stages, agents, **definition):
+    config = {
+        "agents": {name: {"id": name, "type": "document_reader", "config": {}} for name in agents},
+        "workflow_definitions": {"routed": {"stages": stages, **definition}}
+    }
+    manager = WorkflowManager(config)
+    for name, agent_config in agents.items():
+        manager.agents[name] = StepAgent(name, agent_config)
+    manager.compile_workflows()
+    return manager
+
+
+# Mirrors main_workflow in config.json
+MAIN = [
+    {"name": "initiation", "agent": "start", "next_stage": "processing", "error_stage": "error_handling"},
+    {"name": "processing", "agent": "process", "next_stage": "completion", "error_stage": "error_handling"},
+    {"name": "completion", "agent": "end", "error_stage": "error_handling"},
+    {"name": "error_handling", "agent": "recover", "next_stage": "completion"},
+]
+
+
+def main_manager(fail_on=()):
+    return routed_manager(MAIN, {"start": {}, "process": {"fail_on": fail_on}, "end": {}, "recover": {}})
+
+
+# Loops through "increment" until n reaches 3
+LOOP = [
+    {"name": "increment", "agent": "inc", "next_stage": "check"},
+    {"name": "check", "agent": "check", "next_stage": [
+        {"stage": "increment", "when": {"field": "n", "lt": 3}},
+        {"stage": "done"}
+    ]},
+    {"name": "done", "agent": "done"},
+]
+
+
+def loop_manager(**definition):
+    return routed_manager(LOOP, {"inc": {"add": 1}, "check": {}, "done": {}}, **definition)
+
+
+def test_conditions():
+    assert compile_condition({"field": "a.b", "gte": 2, "lt": 5})({"a": {"b": 3}})
+    assert not compile_condition({"field": "a.b", "gte": 2, "lt": 5})({"a": {"b": 5}})
+    assert compile_condition({"field": "items.1", "in": ["x", "y"]})({"items": ["w", "y"]})
+    assert compile_condition({"field": "missing", "exists": False})({})
+    assert not compile_condition({"field": "missing", "not_equals": 1})({})
+    # Comparing incompatible types does not match rather than raising
+    assert not compile_condition({"field": "a", "gt": 1})({"a": "text"})
+    assert compile_condition([{"field": "a", "equals": 1}, {"field": "b", "exists": True}])({"a": 1, "b": None})
+
+
+def test_route_takes_first_matching_edge():
+    route = compile_route([
+        {"stage": "high", "when": {"field": "score", "gte": 0.8}},
+        {"stage": "low"}
+    ], {"high": 1, "low": 2})
+
+    assert route.next({"score": 0.9}) == 1
+    assert route.next({"score": 0.1}) == 2
+    assert compile_route(None, {}).next({}) is None
+
+
+def test_invalid_routes_fail_at_startup():
+    with pytest.raises(ValueError, match="Unknown next_stage: missing"):
+        routed_manager([{"name": "a", "agent": "a", "next_stage": "missing"}], {"a": {}})
+    with pytest.raises(ValueError, match="Unknown condition operator"):
+        routed_manager([
+            {"name": "a", "agent": "a", "next_stage": [{"stage": "a", "when": {"field": "n", "near": 1}}]}
+        ], {"a": {}})
+    with pytest.raises(ValueError, match="max_hops"):
+        loop_manager(max_hops=0)
+
+
+def test_success_skips_error_stage():
+    result = main_manager().start_workflow("routed", {"id": 0})
+
+    assert result["path"] == ["start", "process", "end"]
+
+
+def test_failure_routes_through_error_stage():
+    manager = main_manager(fail_on=(1,))
+
+    result = manager.start_workflow("routed", {"id": 1})
+
+    # The error stage gets the failed stage's input, then continues to completion
+    assert result["path"] == ["start", "recover", "end"]
+    assert manager.get_plan("routed").cyclic
+
+
+def test_conditional_loop():
+    manager = loop_manager()
+
+    assert manager.start_workflow("routed", {"id": 0})["path"] == ["inc", "check"] * 3 + ["done"]
+    assert manager.start_workflow("routed", {"id": 1, "n": 5})["path"] == ["inc", "check", "done"]
+
+
+def test_max_hops_stops_runaway_loops():
+    manager = loop_manager(max_hops=4)
+
+    with pytest.raises(RuntimeError, match="exceeded max_hops"):
+        manager.start_workflow("routed", {"id": 0})
+    assert manager.start_workflow("routed", {"id": 1, "n": 5})["n"] == 6
+
+
+def test_unrouted_workflows_run_in_order():
+    manager = routed_manager([{"name": "a", "agent": "a"}, {"name": "b", "agent": "b"}], {"a": {}, "b": {}})
+
+    assert not manager.get_plan("routed").routed
+    assert manager.start_workflow("routed", {"id": 0})["path"] == ["a", "b"]
+
+
+def test_batch_routes_each_item():
+    manager = loop_manager(max_hops=6)
+    payloads = [{"id": 0, "n": 1}, {"id": 1, "n": 5}, {"id": 2}]
+
+    results = manager.start_workflow_batch("routed", payloads)
+
+    assert results[0] == manager.start_workflow("routed", payloads[0])
+    assert results[1]["path"] == ["inc", "check", "done"]
+    assert isinstance(results[2], RuntimeError)
+
+
+def test_batch_failure_routes_through_error_stage():
+    results = main_manager(fail_on=(1,)).start_workflow_batch("routed", [{"id": i} for i in range(3)])
+
+    assert [r["path"] for r in results] == [
+        ["start", "process", "end"], ["start", "recover", "end"], ["start", "process", "end"]
+    ]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_stream_routes_and_loops(ordered):
+    manager = loop_manager(max_hops=6)
+    payloads = [{"id": i, "n": i % 4} for i in range(20)]
+
+    results = list(manager.stream("routed", iter(payloads), queue_size=2, ordered=ordered))
+
+    assert len(results) == 20
+    finished = [r for r in results if not isinstance(r, Exception)]
+    assert len(finished) == 15  # n == 0 needs seven hops
+    assert all(r["path"][-1] == "done" and r["n"] >= 3 for r in finished)
+
+
+def test_stream_failure_routes_through_error_stage():
+    results = list(main_manager(fail_on=(1,)).stream("routed", ({"id": i} for i in range(3))))
+
+    assert results[1]["path"] == ["start", "recover", "end"]
+    assert results[2]["path"] == ["start", "process", "end"]
+
+
+class Unorderable:
+    """Stands in for a value whose comparisons raise something other than TypeError."""
+
+    def __add__(self, other):
+        return self
+
+    def __lt__(self, other):
+        raise ValueError("cannot compare")
+
+
+def test_failing_condition_fails_only_its_item():
+    payloads = [{"id": i, "n": Unorderable() if i == 1 else 5} for i in range(3)]
+
+    streamed = list(loop_manager().stream("routed", iter(payloads), queue_size=1))
+    batch = loop_manager().start_workflow_batch("routed", payloads)
+
+    for results in (streamed, batch):
+        assert isinstance(results[1], ValueError)
+        assert [results[i]["path"] for i in (0, 2)] == [["inc", "check", "done"]] * 2
+
+
+def test_async_routing():
+    manager = main_manager(fail_on=(1,))
+
+    result = asyncio.run(manager.astart_workflow("routed", {"id": 1}))
+
+    assert result["path"] == ["start", "recover", "end"]
@@ -0,0 +1,148 @@
+"""Tests for file sinks and the agents that write to them."""
+
+import pytest
+
+from mas.agents.data_formatter import DataFormatter
+from mas.agents.document_writer import DocumentWriter
+from mas.sinks import create_sink, read_records
+from mas.workflow import WorkflowManager
+
+RECORDS = [{"id": i, "name": f"sensor-{i}", "tags": {"room": i % 2}} for i in range(5)]
+
+
+@pytest.mark.parametrize("sink_format", ["jsonl", "binary"])
+@pytest.mark.parametrize("compression", [None, "gzip", "bz2", "lzma"])
+def test_round_trip(tmp_path, sink_format, compression):
+    path = str(tmp_path / "records")
+
+    with create_sink({"format": sink_format, "path": path, "compression": compression, "batch_size": 2}) as sink:
+        assert sink.write_many(iter(RECORDS)) == 5
+
+    assert list(read_records(path, sink_format, compression)) == RECORDS
+
+
+def test_csv_columns_and_nested_values(tmp_path):
+    path = str(tmp_path / "records.csv")
+
+    with create_sink({"format": "csv", "path": path, "fields": ["id", "tags", "missing"]}) as sink:
+        sink.write_many(RECORDS[:2])
+
+    assert list(read_records(path, "csv")) == [
+        {"id": "0", "tags": '{"room": 0}', "missing": ""},
+        {"id": "1", "tags": '{"room": 1}', "missing": ""},
+    ]
+
+
+def test_records_are_written_in_batches(tmp_path):
+    path = tmp_path / "records.jsonl"
+    sink = create_sink({"path": str(path), "batch_size": 3})
+
+    sink.write_many(RECORDS[:2])
+    assert not path.exists()
+    sink.write(RECORDS[2])
+    assert sink.records_written == 3
+    sink.write(RECORDS[3])
+    sink.close()
+
+    assert len(list(read_records(str(path)))) == 4
+    with pytest.raises(ValueError, match="closed"):
+        sink.write(RECORDS[4])
+        sink.flush()
+
+
+def test_append(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    for record in RECORDS[:2]:
+        with create_sink({"path": path, "append": True}) as sink:
+            sink.write(record)
+
+    assert list(read_records(path)) == RECORDS[:2]
+
+
+def test_invalid_sink_config():
+    with pytest.raises(ValueError, match="Unknown sink format"):
+        create_sink({"format": "xml", "path": "out"})
+    with pytest.raises(ValueError, match="needs a path"):
+        create_sink({"format": "jsonl"})
+    with pytest.raises(ValueError, match="Unknown compression"):
+        create_sink({"path": "out", "compression": "zip"})
+    with pytest.raises(ValueError, match="Invalid jsonl sink option"):
+        create_sink({"path": "out", "level": 9})
+
+
+def test_formatter_streams_into_sink(tmp_path):
+    path = str(tmp_path / "formatted.jsonl")
+    formatter = DataFormatter("formatter", {"sink": {"path": path, "batch_size": 2}})
+
+    assert formatter.write_stream({"id": i} for i in range(3)) == 3
+    formatter.close()
+
+    records = list(read_records(path))
+    assert [record["id"] for record in records] == [0, 1, 2]
+    assert records[0]["metadata"]["agent_id"] == "formatter"
+
+
+def test_formatter_returns_record_without_round_trip():
+    payload = {"values": (1, 2)}
+
+    output = DataFormatter("formatter", {"include_metadata": False}).process_message(payload)
+
+    assert output == payload and output is not payload
+    with pytest.raises(ValueError, match="no sink"):
+        DataFormatter("formatter", {}).write_stream([])
+
+
+def test_workflow_shutdown_flushes_sinks(tmp_path):
+    path = str(tmp_path / "documents.bin")
+    config = {
+        "agents": {"writer": {"id": "writer", "type": "document_writer",
+                              "config": {"sink": {"format": "binary", "path": path}}}},
+        "workflow_definitions": {"write": {"stages": [{"name": "write", "agent": "writer"}]}}
+    }
+
+    with WorkflowManager(config) as manager:
+        manager.start_workflow_batch("write", [{"text": str(i)} for i in range(3)])
+        assert isinstance(manager.agents["writer"], DocumentWriter)
+
+    assert [record["text"] for record in read_records(path, "binary")] == ["0", "1", "2"]
+
+
+def test_process_executor_flushes_worker_sinks(tmp_path):
+    path = str(tmp_path / "formatted-{pid}.jsonl")
+    config = {
+        "system_config": {"executors": {"process": {"max_workers": 2}}},
+        "agents": {"formatter": {"id": "formatter", "type": "data_formatter",
+                                 "config": {"sink": {"path": path, "batch_size": 1000}}}},
+        "workflow_definitions": {"format": {"stages": [
+            {"name": "format", "agent": "formatter", "executor": "process"}
+        ]}}
+    }
+
+    with WorkflowManager(config, agent_pool=None) as manager:
+        for i in range(5):
+            manager.start_workflow("format", {"id": i})
+
+    records = [record for file in tmp_path.iterdir() for record in read_records(str(file))]
+    assert sorted(record["id"] for record in records) == list(range(5))
+
+
+def test_unclosed_sink_flushes_when_collected(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    sink = create_sink({"path": path, "batch_size": 1000})
+    sink.write_many(RECORDS)
+
+    del sink
+
+    assert list(read_records(path)) == RECORDS
+
+
+def test_csv_append_writes_header_to_new_file(tmp_path):
+    path = str(tmp_path / "records.csv")
+    for record in RECORDS[:2]:
+        with create_sink({"format": "csv", "path": path, "append": True, "fields": ["id", "name"]}) as sink:
+            sink.write(record)
+
+    assert list(read_records(path, "csv")) == [
+        {"id": "0", "name": "sensor-0"},
+        {"id": "1", "name": "sensor-1"},
+    ]
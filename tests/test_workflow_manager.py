@@ -0,0 +1,486 @@
+"""Tests for WorkflowManager execution paths."""
+
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from mas.agent import Agent
+from mas.retry import RetryPolicy, RetryScheduler
+from mas.workflow import WorkflowManager
+
+ROOT = Path(__file__).parent.parent
+
+
+def load_config(name: str) -> dict:
+    with open(ROOT / "examples" / name / "config.json", "r") as f:
+        return json.load(f)
+
+
+def sensor_payload(*records):
+    return {
+        "data": [{"name": name, "value": value} for name, value in records],
+        "schema_version": "1.0"
+    }
+
+
+def test_batch_matches_single_runs():
+    manager = WorkflowManager(load_config("data_pipeline"))
+    payloads = [
+        sensor_payload(("temperature", 25.5), ("temperature", 26.8)),
+        sensor_payload(("humidity", 60.0), ("humidity", 65.0), ("score", 1.0)),
+    ]
+
+    expected = [
+        manager.start_workflow("data_pipeline", json.loads(json.dumps(p)))["aggregates"]
+        for p in payloads
+    ]
+    results = manager.start_workflow_batch("data_pipeline", payloads)
+
+    assert [r["aggregates"] for r in results] == expected
+
+
+def test_batch_isolates_item_errors():
+    manager = WorkflowManager(load_config("data_pipeline"))
+    payloads = [
+        sensor_payload(("temperature", 25.5)),
+        {"data": []},  # missing schema_version
+        sensor_payload(("humidity", 60.0)),
+    ]
+
+    results = manager.start_workflow_batch("data_pipeline", payloads)
+
+    assert results[0]["aggregates"] == {"temperature": 25.5}
+    assert isinstance(results[1], ValueError)
+    assert results[2]["aggregates"] == {"humidity": 60.0}
+
+
+def test_batch_unknown_workflow():
+    manager = WorkflowManager(load_config("data_pipeline"))
+    with pytest.raises(ValueError):
+        manager.start_workflow_batch("missing", [{}])
+
+
+def test_plans_compiled_at_startup():
+    manager = WorkflowManager(load_config("data_pipeline"))
+    plan = manager.get_plan("data_pipeline")
+
+    assert [stage.name for stage in plan.stages] == ["validate", "transform", "aggregate", "format"]
+    assert plan.stage_index["transform"].agent is manager.agents["data_transformer"]
+
+
+def test_invalid_next_stage_fails_at_startup():
+    config = load_config("data_pipeline")
+    config["workflow_definitions"]["data_pipeline"]["stages"][0]["next_stage"] = "missing"
+
+    with pytest.raises(ValueError, match="next_stage"):
+        WorkflowManager(config)
+
+
+def test_unknown_error_stage_fails_at_startup():
+    config = load_config("data_pipeline")
+    config["workflow_definitions"]["data_pipeline"]["stages"][1]["error_stage"] = "error_handling"
+
+    with pytest.raises(ValueError, match="unknown error_stage: error_handling"):
+        WorkflowManager(config)
+
+
+def test_unknown_stage_agent_fails_at_startup():
+    config = load_config("document_processing")
+    config["workflow_definitions"]["document_processing"]["stages"][1]["agent"] = "missing"
+
+    with pytest.raises(ValueError, match="Unknown agent"):
+        WorkflowManager(config)
+
+
+def test_astart_workflow_matches_sync():
+    manager = WorkflowManager(load_config("document_processing"))
+    payload = {"text": "Hello", "metadata": {}}
+
+    result = asyncio.run(manager.astart_workflow("document_processing", dict(payload)))
+
+    assert result == manager.start_workflow("document_processing", dict(payload))
+
+
+def test_astart_workflow_respects_concurrency_limit():
+    config = load_config("document_processing")
+    config["system_config"]["max_concurrent_workflows"] = 4
+    manager = WorkflowManager(config)
+
+    class SlowAgent(Agent):
+        running = 0
+        peak = 0
+
+        def process_message(self, message):
+            return message
+
+        async def aprocess_message(self, message):
+            SlowAgent.running += 1
+            SlowAgent.peak = max(SlowAgent.peak, SlowAgent.running)
+            await asyncio.sleep(0.001)
+            SlowAgent.running -= 1
+            return message
+
+    manager.agents["document_writer"] = SlowAgent("slow", {})
+    manager.compile_workflows()
+
+    async def run_all():
+        return await asyncio.gather(*[
+            manager.astart_workflow("document_processing", {"text": str(i), "metadata": {}})
+            for i in range(50)
+        ])
+
+    results = asyncio.run(run_all())
+
+    assert [r["text"] for r in results] == [str(i) for i in range(50)]
+    assert SlowAgent.peak == 4
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_stage_executors_match_inline(executor):
+    payloads = [
+        sensor_payload(("temperature", 25.5), ("temperature", 26.8), ("humidity", 60.0)),
+        sensor_payload(("score", 0.0), ("score", 100.0)),
+        {"data": []},
+    ]
+    inline = WorkflowManager(load_config("data_pipeline"))
+    expected = inline.start_workflow_batch("data_pipeline", json.loads(json.dumps(payloads)))
+
+    config = load_config("data_pipeline")
+    for stage in config["workflow_definitions"]["data_pipeline"]["stages"][1:3]:
+        stage["executor"] = executor
+    config["system_config"]["executors"] = {executor: {"max_workers": 2}}
+
+    with WorkflowManager(config) as manager:
+        single = manager.start_workflow("data_pipeline", json.loads(json.dumps(payloads[0])))
+        batch = manager.start_workflow_batch("data_pipeline", json.loads(json.dumps(payloads)))
+        awaited = asyncio.run(manager.astart_workflow("data_pipeline", json.loads(json.dumps(payloads[1]))))
+
+    assert single["aggregates"] == expected[0]["aggregates"]
+    assert [r["aggregates"] for r in batch[:2]] == [r["aggregates"] for r in expected[:2]]
+    assert isinstance(batch[2], ValueError)
+    assert awaited["aggregates"] == expected[1]["aggregates"]
+
+
+def test_unknown_executor_fails_at_startup():
+    config = load_config("data_pipeline")
+    config["workflow_definitions"]["data_pipeline"]["stages"][0]["executor"] = "gpu"
+
+    with pytest.raises(ValueError, match="executor"):
+        WorkflowManager(config)
+
+
+class SleepAgent(Agent):
+    def process_message(self, message):
+        time.sleep(0.01)
+        return {**message, "hops": message.get("hops", 0) + 1}
+
+
+def pipeline_manager(stage_count=4, workers=1):
+    config = {
+        "agents": {"reader": {"id": "reader", "type": "document_reader", "config": {}}},
+        "workflow_definitions": {"pipeline": {"stages": [
+            {"name": f"s{i}", "agent": "reader", "workers": workers} for i in range(stage_count)
+        ]}}
+    }
+    manager = WorkflowManager(config)
+    manager.agents["reader"] = SleepAgent("sleep", {})
+    manager.compile_workflows()
+    return manager
+
+
+def test_stream_matches_batch_in_order():
+    manager = WorkflowManager(load_config("data_pipeline"))
+    payloads = [sensor_payload(("temperature", float(i)), ("humidity", 2.0 * i)) for i in range(20)]
+    payloads.insert(5, {"data": []})
+
+    expected = manager.start_workflow_batch("data_pipeline", json.loads(json.dumps(payloads)))
+    streamed = list(manager.stream("data_pipeline", iter(json.loads(json.dumps(payloads))), queue_size=2))
+
+    assert len(streamed) == len(expected)
+    assert isinstance(streamed[5], ValueError)
+    assert [r["aggregates"] for i, r in enumerate(streamed) if i != 5] == \
+        [r["aggregates"] for i, r in enumerate(expected) if i != 5]
+
+
+def test_stream_overlaps_stages():
+    manager = pipeline_manager(stage_count=4)
+
+    start = time.perf_counter()
+    results = list(manager.stream("pipeline", ({"id": i} for i in range(20))))
+    elapsed = time.perf_counter() - start
+
+    assert [r["id"] for r in results] == list(range(20))
+    assert all(r["hops"] == 4 for r in results)
+    # Sequential execution would take 4 * 20 * 10ms = 0.8s
+    assert elapsed < 0.5
+
+
+def test_stream_unordered_with_parallel_workers():
+    manager = pipeline_manager(stage_count=2, workers=3)
+
+    results = list(manager.stream("pipeline", ({"id": i} for i in range(30)), ordered=False, queue_size=4))
+
+    assert sorted(r["id"] for r in results) == list(range(30))
+
+
+def test_stream_can_stop_early():
+    manager = pipeline_manager(stage_count=2)
+
+    stream = manager.stream("pipeline", ({"id": i} for i in range(10**6)), queue_size=2)
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+
+    assert [r["id"] for r in first] == [0, 1, 2]
+
+
+def test_metrics_snapshot_and_hooks():
+    config = load_config("data_pipeline")
+    config["system_config"]["metrics"] = {"payload_sizes": True}
+    manager = WorkflowManager(config)
+    events = []
+    manager.add_metrics_hook(events.append)
+
+    manager.start_workflow("data_pipeline", sensor_payload(("temperature", 1.0)))
+    manager.start_workflow_batch("data_pipeline", [sensor_payload(("humidity", 2.0)), {"data": []}])
+    with pytest.raises(ValueError):
+        manager.start_workflow("data_pipeline", {"data": []})
+
+    snapshot = manager.metrics()
+    validate = snapshot["stages"]["data_pipeline.validate"]
+    assert validate["calls"] == 4
+    assert validate["errors"] == 2
+    assert validate["latency_ns"]["count"] == 4
+    assert validate["latency_ns"]["p99"] >= validate["latency_ns"]["p50"] > 0
+    assert validate["payload_bytes"]["max"] > 0
+    assert snapshot["stages"]["data_pipeline.format"]["calls"] == 2
+    assert snapshot["agents"]["data_formatter"]["calls"] == 2
+    # One event per stage call, one per stage for the whole batch
+    assert len(events) == 4 + 4 + 1
+    json.dumps(snapshot)
+
+
+def test_failing_metrics_hook_does_not_fail_stage(caplog):
+    manager = WorkflowManager(load_config("data_pipeline"))
+
+    def broken_hook(event):
+        raise RuntimeError("hook failed")
+    manager.add_metrics_hook(broken_hook)
+
+    result = manager.start_workflow("data_pipeline", sensor_payload(("temperature", 1.0)))
+
+    assert result["aggregates"]
+    assert manager.metrics()["stages"]["data_pipeline.validate"]["errors"] == 0
+    assert "Metrics hook failed" in caplog.text
+
+
+def test_error_agent_runs_are_timed():
+    manager = retry_manager(max_retries=1, failures=5)
+    manager.workflow_definitions["pipeline"]["stages"][0]["error_stage"] = "s1"
+    manager.compile_workflows()
+
+    result = manager.start_workflow("pipeline", {"id": 0, "flaky": True})
+
+    assert result["hops"] == 2
+    # s1 ran once as the error agent of s0 and once as the next stage
+    assert manager.metrics()["stages"]["pipeline.s1"]["calls"] == 2
+
+
+def test_metrics_can_be_disabled():
+    config = load_config("data_pipeline")
+    config["system_config"]["metrics"] = {"enabled": False}
+    manager = WorkflowManager(config)
+
+    manager.start_workflow("data_pipeline", sensor_payload(("temperature", 1.0)))
+
+    assert manager.metrics() == {"enabled": False}
+    assert manager.get_plan("data_pipeline").stages[0].runner.run == manager.agents["data_validator"].process_message
+
+
+class FlakyAgent(Agent):
+    """Fails the first ``failures`` times it sees each payload marked ``flaky``."""
+
+    def __init__(self, agent_id, config, failures=2):
+        super().__init__(agent_id, config)
+        self.failures = failures
+        self.attempts = {}
+
+    def process_message(self, message):
+        key = message["id"]
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        if message.get("flaky") and self.attempts[key] <= self.failures:
+            raise RuntimeError(f"transient failure {key}")
+        return {**message, "done": True}
+
+
+class SlowAgent(Agent):
+    def process_message(self, message):
+        time.sleep(self.config["delay"])
+        return {**message, "slow": True}
+
+
+def retry_manager(max_retries=3, retry_delay=1, failures=2, workers=1):
+    manager = pipeline_manager(stage_count=2, workers=workers)
+    stages = manager.workflow_definitions["pipeline"]["stages"]
+    stages[0].update({"max_retries": max_retries, "retry_delay": retry_delay})
+    manager.agents["flaky"] = FlakyAgent("flaky", {}, failures=failures)
+    stages[0]["agent"] = "flaky"
+    manager.compile_workflows()
+    return manager
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(max_retries=5, retry_delay=100, retry_backoff=2.0, retry_max_delay=300, retry_jitter=0.5)
+
+    assert 0.05 <= policy.delay(1) <= 0.1
+    assert 0.1 <= policy.delay(2) <= 0.2
+    assert 0.15 <= policy.delay(4) <= 0.3
+    assert RetryPolicy.from_stage({"name": "s"}) is None
+
+
+def test_retry_scheduler_runs_callbacks_in_due_order():
+    scheduler = RetryScheduler()
+    fired = []
+    done = threading.Event()
+
+    scheduler.schedule(0.06, lambda: (fired.append("c"), done.set()))
+    scheduler.schedule(0.02, lambda: fired.append("a"))
+    scheduler.schedule(0.04, lambda: fired.append("b"))
+    assert done.wait(2)
+    scheduler.shutdown()
+
+    assert fired == ["a", "b", "c"]
+    with pytest.raises(RuntimeError):
+        scheduler.schedule(0, lambda: None)
+
+
+def test_invalid_retry_settings_fail_at_startup():
+    config = load_config("data_pipeline")
+    config["workflow_definitions"]["data_pipeline"]["stages"][0]["max_retries"] = -1
+
+    with pytest.raises(ValueError, match="max_retries"):
+        WorkflowManager(config)
+
+
+def test_start_workflow_retries_stage():
+    manager = retry_manager()
+
+    result = manager.start_workflow("pipeline", {"id": 0, "flaky": True})
+
+    assert result["done"] and result["hops"] == 1
+    assert manager.agents["flaky"].attempts[0] == 3
+
+
+def test_retries_exhausted_raise():
+    manager = retry_manager(max_retries=1)
+
+    with pytest.raises(RuntimeError, match="transient"):
+        manager.start_workflow("pipeline", {"id": 0, "flaky": True})
+    with pytest.raises(RuntimeError, match="transient"):
+        asyncio.run(manager.astart_workflow("pipeline", {"id": 1, "flaky": True}))
+    assert manager.agents["flaky"].attempts == {0: 2, 1: 2}
+
+
+def test_astart_workflow_retries_stage():
+    manager = retry_manager()
+
+    result = asyncio.run(manager.astart_workflow("pipeline", {"id": 0, "flaky": True}))
+
+    assert result["done"]
+
+
+def test_batch_retries_only_failed_items():
+    manager = retry_manager()
+    payloads = [{"id": i, "flaky": i % 3 == 0} for i in range(9)]
+
+    results = manager.start_workflow_batch("pipeline", payloads)
+
+    assert [r["id"] for r in results] == list(range(9))
+    assert all(r["done"] for r in results)
+    attempts = manager.agents["flaky"].attempts
+    assert [attempts[i] for i in range(9)] == [3 if i % 3 == 0 else 1 for i in range(9)]
+
+
+def test_batch_moves_finished_items_on_before_waiting_for_retry():
+    manager = retry_manager(retry_delay=200, failures=1)
+    stages = []
+    manager.add_metrics_hook(lambda event: stages.append((event["stage"], event["calls"])))
+
+    results = manager.start_workflow_batch("pipeline", [{"id": i, "flaky": i == 0} for i in range(4)])
+
+    assert all(r["done"] and r["hops"] == 1 for r in results)
+    # The three items that succeeded went through s1 before item 0 was retried
+    assert stages == [("s0", 4), ("s1", 3), ("s0", 1), ("s1", 1)]
+
+
+def test_retry_does_not_hold_a_branch_thread():
+    # The left branch's retry must not keep the only branch worker from the right branch
+    config = {
+        "system_config": {"executors": {"branch": {"max_workers": 1}}},
+        "agents": {name: {"id": name, "type": "document_reader", "config": {}} for name in ("split", "flaky", "slow")},
+        "workflow_definitions": {"dag": {"stages": [
+            {"name": "split", "agent": "split"},
+            {"name": "left", "agent": "flaky", "depends_on": "split",
+             "max_retries": 1, "retry_delay": 200, "retry_jitter": 0},
+            {"name": "right", "agent": "slow", "depends_on": "split"},
+        ]}}
+    }
+    manager = WorkflowManager(config, agent_pool=None)
+    manager.agents["flaky"] = FlakyAgent("flaky", {}, failures=1)
+    manager.agents["slow"] = SlowAgent("slow", {"delay": 0.2})
+    manager.compile_workflows()
+
+    start = time.perf_counter()
+    with manager:
+        result = manager.start_workflow("dag", {"id": 0, "flaky": True})
+    elapsed = time.perf_counter() - start
+
+    assert result["left"]["done"] and result["right"]["slow"]
+    assert elapsed < 0.35
+
+
+def test_shutdown_fails_runs_waiting_for_retry():
+    manager = retry_manager(retry_delay=10_000, failures=1)
+    outcome = []
+    run = threading.Thread(target=lambda: outcome.append(_capture(
+        lambda: manager.start_workflow("pipeline", {"id": 0, "flaky": True})
+    )))
+    run.start()
+    while manager.agents["flaky"].attempts.get(0) != 1:
+        time.sleep(0.01)
+
+    manager.shutdown()
+    run.join(2)
+
+    assert isinstance(outcome[0], RuntimeError) and "shut down" in str(outcome[0])
+
+
+def _capture(func):
+    try:
+        return func()
+    except Exception as e:
+        return e
+
+
+def test_stream_keeps_working_while_items_wait_for_retry():
+    # One slow-to-recover item must not hold up the others on a single worker
+    manager = retry_manager(retry_delay=200, failures=1)
+
+    results = list(manager.stream("pipeline", ({"id": i, "flaky": i == 0} for i in range(10)), ordered=False))
+
+    assert sorted(r["id"] for r in results) == list(range(10))
+    assert results[-1]["id"] == 0
+    assert all(r["done"] and r["hops"] == 1 for r in results)
+
+
+def test_stream_retries_exhausted_yield_exception():
+    manager = retry_manager(max_retries=2, failures=5, workers=2)
+
+    results = list(manager.stream("pipeline", ({"id": i, "flaky": i == 3} for i in range(6))))
+
+    assert isinstance(results[3], RuntimeError)
+    assert [r["id"] for i, r in enumerate(results) if i != 3] == [0, 1, 2, 4, 5]
+    assert manager.agents["flaky"].attempts[3] == 3